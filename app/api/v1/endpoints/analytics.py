@@ -1,18 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from app.api.v1.fast_json import schema_records, json_response
+from app.api.v1.pagination import NDJSON_MEDIA_TYPE, STREAM_CHUNK, encode_cursor, decode_cursor, check_format
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.metrics import stage
 
 # Importamos los repositorios antiguos
 from app.models.shot import Shot
-from app.schemas.shot import ShotResponse
+from app.schemas.shot import ShotResponse, ShotHeatmapResponse
+from app.repositories.aggregate_repository import AggregateRepository
+from app.repositories.team_repository import TeamRepository
+from app.repositories.shot_repository import ShotRepository, SHOT_RESPONSE_COLUMNS
+from app.services.shot_grid import dense_grid, heatmap_payload
 from app.repositories.analytics_repository import AnalyticsRepository
-from app.schemas.stats import GameStats, GameAdvancedStats, MoneyballResponse
-from app.models.stats import PlayerStat
+from app.schemas.stats import (
+    GameStats, GameAdvancedStats, MoneyballResponse, MoneyballPlayerSchema, PlayerProfileResponse
+)
 
-# IMPORTAMOS EL NUEVO SERVICIO DE PANDAS
-from app.services.analytics import get_advanced_stats 
+# IMPORTAMOS EL NUEVO SERVICIO DE PANDAS (con caché por versión de datos)
+from app.services.result_cache import (
+    get_advanced_stats_cached, get_percentile_base_cached, get_player_advanced_stats, advanced_stats_cache,
+    get_data_version
+)
 
-from app.schemas.stats import MoneyballResponse, PlayerProfileResponse
+from app.services.percentiles import def_score
 
 router = APIRouter()
 
@@ -22,36 +37,19 @@ def get_player_profile(
     team: str = Query(None),
     db: Session = Depends(get_db)
 ):
-    # 1. Obtenemos Stats de TODOS (para percentiles)
-    df = get_advanced_stats(db, min_games=1, min_minutes=5)
+    # 1 y 2. Stats del jugador; los percentiles salen del índice precalculado de la liga
+    with stage("player_stats"):
+        player_row = get_player_advanced_stats(db, name, team, min_games=1, min_minutes=5)
     
-    if df.empty: raise HTTPException(404, "Sin datos")
-
-    # 2. Filtramos al jugador
-    player_row = df[df['Jugador'].str.lower() == name.lower()]
-    if team: player_row = player_row[player_row['Equipo'].str.contains(team, case=False)]
+    if player_row is None: raise HTTPException(404, "Sin datos")
         
     if player_row.empty: raise HTTPException(404, f"Jugador '{name}' no encontrado")
         
     profile_data = player_row.to_dict(orient="records")[0]
 
-    # 3. Obtenemos Tiros
-    p_stat = db.query(PlayerStat).filter(PlayerStat.nombre == profile_data['Jugador']).first()
-    if not p_stat: return {"profile": profile_data, "shots": []}
-
-    # Buscamos tiros por dorsal y partidos jugados
-    # (Simplificado: buscamos por nombre de jugador en tabla Shots si tienes player_id o cruce)
-    # Si tu tabla Shot tiene dorsal, usaremos eso + game_ids del jugador
-    stats_jugador = db.query(PlayerStat).filter(PlayerStat.nombre == profile_data['Jugador']).all()
-    game_ids = [s.game_id for s in stats_jugador]
-    
-    # Asumiendo que el dorsal es constante, cogemos el del primer partido
-    dorsal = stats_jugador[0].dorsal 
-
-    shots = db.query(Shot).filter(
-        Shot.dorsal == dorsal,
-        Shot.game_id.in_(game_ids)
-    ).all()
+    # 3. Obtenemos Tiros (atribuidos al jugador en la ingesta; índice sobre player_pk)
+    with stage("shots_query"):
+        shots = db.query(Shot).filter(Shot.player_pk == int(profile_data['player_pk'])).all()
 
     return {"profile": profile_data, "shots": shots}
 
@@ -62,37 +60,58 @@ def get_moneyball_stats(
     min_minutes: int = Query(10, description="Mínimo de minutos por partido"),
     team: str = Query(None, description="Filtrar por nombre de equipo (ej: 'Pumarin')"),
     sort_by: str = Query("GmSc", description="Ordenar por: GmSc, TS%, USG%, PPP"),
+    limit: int = Query(None, ge=1, le=1000, description="Jugadores por página (sin límite: todos)"),
+    cursor: str = Query(None, description="next_cursor de la página anterior"),
+    format: str = Query("json", description="json | ndjson (una fila por línea, en streaming)"),
     db: Session = Depends(get_db)
 ):
     """
     Devuelve el ranking 'Moneyball' de toda la temporada usando datos reales (Actas).
     Calcula USG%, TS%, eFG% y Game Score.
+    Paginado por cursor con `limit` / `cursor`; con format=ndjson las filas van en streaming
+    (total y cursor siguiente en las cabeceras X-Total-Count / X-Next-Cursor).
     """
+    check_format(format)
     # 1. Llamamos a Pandas para que haga los cálculos matemáticos
-    df = get_advanced_stats(db, min_games=min_games, min_minutes=min_minutes)
+    with stage("advanced_stats"):
+        df = get_advanced_stats_cached(db, min_games=min_games, min_minutes=min_minutes)
     
-    if df.empty:
-        return {"total_jugadores": 0, "filtros_aplicados": {}, "data": []}
+    # Sin datos de temporada: página vacía, por el mismo camino (ndjson / FAST_JSON) que el resto
+    total, next_cursor = 0, None
+    if not df.empty:
+        with stage("filter_sort"):
+            # 2. Filtrado por equipo (si el usuario lo pide)
+            if team:
+                # Filtro case-insensitive
+                df = df[df['Equipo'].str.contains(team, case=False, na=False, regex=False)]
 
-    # 2. Filtrado por equipo (si el usuario lo pide)
-    if team:
-        # Filtro case-insensitive
-        df = df[df['Equipo'].str.contains(team, case=False, na=False)]
-
-    # 3. Ordenación dinámica
-    sort_map = {
-        "gmsc": "GmSc",
-        "ts": "TS%",  # Pandas usa 'TS%', el Schema espera 'TS_pct' (lo renombramos abajo)
-        "usg": "USG%",
-        "eff": "eFG%",
-        "pts": "PPP",
-        "reb": "RPP",
-        "ast": "APP"
-    }
-    col_name = sort_map.get(sort_by.lower(), "GmSc")
-    
-    if col_name in df.columns:
-        df = df.sort_values(by=col_name, ascending=False)
+            # 3. Ordenación dinámica
+            sort_map = {
+                "gmsc": "GmSc",
+                "ts": "TS%",  # Pandas usa 'TS%', el Schema espera 'TS_pct' (lo renombramos abajo)
+                "usg": "USG%",
+                "eff": "eFG%",
+                "pts": "PPP",
+                "reb": "RPP",
+                "ast": "APP"
+            }
+            col_name = sort_map.get(sort_by.lower(), "GmSc")
+
+            # Orden total (columna pedida de mayor a menor, NaN al final, y player_pk para desempatar):
+            # es la clave del cursor, así que dos peticiones iguales dan siempre el mismo orden
+            orden = df[col_name].astype(float).fillna(-np.inf) if col_name in df.columns else 0.0
+            df = df.assign(_orden=orden).sort_values(['_orden', 'player_pk'], ascending=[False, True])
+            total = len(df)
+
+            # 3b. Página: lo que va después del cursor, hasta `limit`
+            if cursor:
+                valor, pk = decode_cursor(cursor, (float, int))
+                df = df[(df['_orden'] < valor) | ((df['_orden'] == valor) & (df['player_pk'] > pk))]
+            if limit is not None and len(df) > limit:
+                df = df.iloc[:limit]
+                ultimo = df.iloc[-1]
+                next_cursor = encode_cursor(float(ultimo['_orden']), int(ultimo['player_pk']))
+            df = df.drop(columns='_orden')
 
     # 4. Mapeo de nombres para coincidir con el Schema de Pydantic
     # Pandas tiene '%' en el nombre, Pydantic prefiere no tenerlo.
@@ -105,16 +124,83 @@ def get_moneyball_stats(
     # Limpieza de NaNs (nulos)
     df = df.fillna(0)
 
-    # 5. Retorno
+    filtros = {
+        "min_games": min_games,
+        "min_minutes": min_minutes,
+        "team": team
+    }
+
+    # 5a. Streaming: las filas salen por bloques según se serializan (solo los campos del Schema)
+    if format == "ndjson":
+        columnas = [c for c in MoneyballPlayerSchema.model_fields if c in df.columns]
+
+        def filas():
+            for inicio in range(0, len(df), STREAM_CHUNK):
+                bloque = df.iloc[inicio:inicio + STREAM_CHUNK][columnas].to_dict(orient="records")
+                yield "".join(json.dumps(fila, ensure_ascii=False) + "\n" for fila in bloque)
+
+        headers = {"X-Total-Count": str(total)}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return StreamingResponse(filas(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    # 5b. Retorno (con FAST_JSON, bytes de orjson sin validar fila a fila: ver app/api/v1/fast_json.py)
+    if settings.FAST_JSON:
+        with stage("to_json"):
+            return json_response({
+                "total_jugadores": total,
+                "filtros_aplicados": filtros,
+                "data": schema_records(df, MoneyballPlayerSchema),
+                "next_cursor": next_cursor
+            })
+    with stage("to_dict"):
+        data = df.to_dict(orient="records")
     return {
-        "total_jugadores": len(df),
-        "filtros_aplicados": {
-            "min_games": min_games,
-            "min_minutes": min_minutes,
-            "team": team
-        },
-        "data": df.to_dict(orient="records")
+        "total_jugadores": total,
+        "filtros_aplicados": filtros,
+        "data": data,
+        "next_cursor": next_cursor
+    }
+
+@router.get("/season/percentiles")
+def get_what_if_percentiles(
+    usg: float = Query(None, description="USG% (0-100)"),
+    ast: float = Query(None, description="Asistencias por partido"),
+    reb: float = Query(None, description="Rebotes por partido"),
+    tpa: float = Query(None, description="Triples intentados por partido"),
+    efg: float = Query(None, description="eFG% (0-100)"),
+    rdef: float = Query(None, description="Rebotes defensivos por partido"),
+    rec: float = Query(None, description="Recuperaciones por partido"),
+    min_games: int = Query(1, description="Mínimo de partidos del pool de comparación"),
+    min_minutes: int = Query(5, description="Mínimo de minutos del pool de comparación"),
+    db: Session = Depends(get_db)
+):
+    """
+    Percentiles 'what-if' de una línea estadística cualquiera (no tiene que estar en la BD),
+    comparada con el pool de la liga. Los que no se puedan calcular salen a null.
+    """
+    _, index = get_percentile_base_cached(db, min_games=min_games, min_minutes=min_minutes)
+    if index is None: raise HTTPException(404, "Sin datos")
+
+    values = {
+        'USG%': usg,
+        'asistencias': ast,
+        'rebotes_total': reb,
+        't3_intentados': tpa,
+        'eFG%': efg / 100 if efg is not None else None,
+        'Def_Score': def_score(rdef, rec) if rdef is not None and rec is not None else None,
     }
+    return {"pool": index.size, "percentiles": index.what_if(values)}
+
+@router.get("/season/version")
+def get_season_version(db: Session = Depends(get_db)):
+    """Versión de datos actual: cambia con cada ingesta (los clientes la usan como clave de caché)."""
+    return {"data_version": get_data_version(db)}
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Aciertos / fallos de la caché de estadísticas avanzadas y versión de datos actual."""
+    return advanced_stats_cache.stats()
 
 # --- ENDPOINTS ANTIGUOS (Shot Chart / Proxies) ---
 # Se mantienen igual, pero ten en cuenta que dependen de tener datos en la tabla 'Shot'
@@ -123,7 +209,8 @@ def get_moneyball_stats(
 @router.get("/games/{game_id}/stats/players-advanced", response_model=GameAdvancedStats)
 def get_game_player_advanced_stats(game_id: str, db: Session = Depends(get_db)):
     repo = AnalyticsRepository(db)
-    stats = repo.get_advanced_player_stats(game_id)
+    with stage("query"):
+        stats = repo.get_advanced_player_stats(game_id)
     if not stats:
         # Si no hay datos antiguos, lanzamos 404
         raise HTTPException(status_code=404, detail="No se encontraron datos de tracking de tiro")
@@ -132,14 +219,85 @@ def get_game_player_advanced_stats(game_id: str, db: Session = Depends(get_db)):
 @router.get("/games/{game_id}/stats/zones", response_model=GameStats)
 def get_game_zone_stats(game_id: str, db: Session = Depends(get_db)):
     repo = AnalyticsRepository(db)
-    team_stats = repo.get_shooting_stats_by_game(game_id)
+    with stage("query"):
+        team_stats = repo.get_shooting_stats_by_game(game_id)
     if not team_stats:
         raise HTTPException(status_code=404, detail="No se encontraron estadísticas de zona")
     return GameStats(game_id=game_id, team_stats=team_stats)
 
 @router.get("/games/{game_id}/shots", response_model=list[ShotResponse])
-def get_game_shots(game_id: str, db: Session = Depends(get_db)):
-    shots = db.query(Shot).filter(Shot.game_id == game_id).all()
-    if not shots:
+def get_game_shots(
+    game_id: str,
+    response: Response,
+    limit: int = Query(None, ge=1, le=5000, description="Tiros por página (sin límite: todos)"),
+    cursor: str = Query(None, description="Cabecera X-Next-Cursor de la página anterior"),
+    format: str = Query("json", description="json | ndjson (un tiro por línea, en streaming)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Tiros del partido en orden. Paginado por cursor (keyset sobre seq): con `limit`, la cabecera
+    X-Next-Cursor trae el cursor de la página siguiente. Con format=ndjson van en streaming.
+    """
+    check_format(format)
+    repo = ShotRepository(db)
+    after_seq = decode_cursor(cursor, (int,))[0] if cursor else None
+
+    if format == "ndjson":
+        campos = [c.key for c in SHOT_RESPONSE_COLUMNS]
+
+        def tamaño(pendientes):
+            return STREAM_CHUNK if pendientes is None else min(STREAM_CHUNK, pendientes)
+
+        # El primer bloque se pide antes de empezar la respuesta: partido sin tiros -> 404, igual que en JSON
+        primero = repo.game_shots_page(game_id, after_seq, tamaño(limit))
+        if not primero and after_seq is None:
+            raise HTTPException(status_code=404, detail="No se encontraron eventos de tiro")
+
+        def tiros():
+            # Bloques de STREAM_CHUNK por keyset: nunca hay más de un bloque en memoria
+            bloque, pendientes = primero, limit
+            while bloque:
+                yield "".join(json.dumps(dict(zip(campos, fila[1:])), ensure_ascii=False) + "\n" for fila in bloque)
+                if pendientes is not None:
+                    pendientes -= len(bloque)
+                    if pendientes <= 0:
+                        return
+                bloque = repo.game_shots_page(game_id, bloque[-1].seq, tamaño(pendientes))
+
+        return StreamingResponse(tiros(), media_type=NDJSON_MEDIA_TYPE)
+
+    with stage("query"):
+        # Una fila de más para saber si hay página siguiente
+        shots = repo.game_shots_page(game_id, after_seq, None if limit is None else limit + 1)
+    if not shots and after_seq is None:
         raise HTTPException(status_code=404, detail="No se encontraron eventos de tiro")
-    return shots
\ No newline at end of file
+    if limit is not None and len(shots) > limit:
+        shots = shots[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(shots[-1].seq)
+    if settings.FAST_JSON:
+        campos = [c.key for c in SHOT_RESPONSE_COLUMNS]
+        with stage("to_json"):
+            cursor_header = {k: v for k, v in response.headers.items() if k == "x-next-cursor"}
+            return json_response([dict(zip(campos, fila[1:])) for fila in shots], headers=cursor_header)
+    return shots
+
+@router.get("/shots/heatmap", response_model=ShotHeatmapResponse)
+def get_shot_heatmap(
+    player_pk: int = Query(None, description="Jugador (player_pk del perfil)"),
+    team: str = Query(None, description="Equipo (nombre canónico)"),
+    game_id: str = Query(None, description="Partido"),
+    db: Session = Depends(get_db)
+):
+    """
+    Mapa de calor de tiro: intentos, aciertos y FG% en una rejilla fija de media pista.
+    Los filtros se combinan (jugador en un partido, equipo en un partido...); sin filtros, toda la liga.
+    """
+    team_pk = None
+    if team:
+        team_pk = TeamRepository(db).get_by_name(team)
+        if team_pk is None: raise HTTPException(404, f"Equipo '{team}' no encontrado")
+
+    with stage("query"):
+        cells = AggregateRepository(db).load_shot_grid(player_pk=player_pk, team_pk=team_pk, game_id=game_id)
+    with stage("grid"):
+        return heatmap_payload(*dense_grid(cells))
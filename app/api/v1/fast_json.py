@@ -0,0 +1,30 @@
+import orjson
+from fastapi.responses import Response
+
+# --- RESPUESTAS JSON RÁPIDAS (opt-in: FAST_JSON=true) ---
+# Por defecto FastAPI valida cada fila contra su Schema de Pydantic y la serializa con el encoder
+# estándar: con la caché caliente eso cuesta más que el cálculo. Con FAST_JSON el endpoint:
+#   1. proyecta la tabla a los campos del Schema, en su orden y con su tipo (int / float / str / bool)
+#   2. escribe los bytes con orjson y devuelve la respuesta tal cual (sin validación)
+# El response_model sigue declarado en la ruta: OpenAPI documenta lo mismo. Que ambos caminos
+# devuelven los mismos campos, tipos y valores lo comprueba check_contract.py.
+
+_CASTS = {int: "int64", float: "float64", bool: "bool"}
+
+def schema_records(df, schema) -> list[dict]:
+    """Filas del DataFrame como dicts con exactamente los campos del Schema (tipos nativos de Python)."""
+    if df.empty:
+        return [] # sin filas puede no haber ni columnas
+    campos = list(schema.model_fields)
+    columnas = []
+    for name, field in schema.model_fields.items():
+        col = df[name]
+        if field.annotation in _CASTS:
+            col = col.astype(_CASTS[field.annotation])
+        elif field.annotation is str:
+            col = col.astype(str)
+        columnas.append(col.tolist()) # tolist: escalares nativos de golpe (no fila a fila)
+    return [dict(zip(campos, fila)) for fila in zip(*columnas)]
+
+def json_response(payload, headers: dict = None) -> Response:
+    return Response(orjson.dumps(payload), media_type="application/json", headers=headers)
@@ -0,0 +1,37 @@
+import base64
+import json
+from fastapi import HTTPException
+
+# --- PAGINACIÓN POR CURSOR (KEYSET) Y STREAMING NDJSON ---
+# El cursor es la clave de orden de la última fila devuelta (base64 de JSON: opaco para el cliente).
+# La página siguiente empieza justo después de esa clave, sin OFFSET: la página 1000 cuesta lo mismo
+# que la primera y no se salta ni repite filas aunque entren datos nuevos por detrás.
+# Con format=ndjson la respuesta va en streaming, una fila JSON por línea y por bloques de STREAM_CHUNK.
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK = 500
+
+def encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, types: tuple) -> list:
+    """Valores de la clave guardados en el cursor, uno por tipo de `types` (400 si el cursor no es válido)."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Cursor no válido")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise HTTPException(400, "Cursor no válido")
+    if not all(_is_type(value, kind) for value, kind in zip(values, types)):
+        raise HTTPException(400, "Cursor no válido")
+    return values
+
+def _is_type(value, kind) -> bool:
+    """Tipo JSON de un valor del cursor (un float puede llegar como entero; un bool nunca vale)."""
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, (int, float) if kind is float else kind)
+
+def check_format(format: str):
+    if format not in ("json", "ndjson"):
+        raise HTTPException(400, f"Formato desconocido: '{format}' (json | ndjson)")
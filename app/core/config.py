@@ -16,6 +16,35 @@ class Settings(BaseSettings):
     FBPA_PUSH_TOKEN: str
     FBPA_APP_VERSION: str
 
+    # Caché de resultados de la API (nº de combinaciones de filtros en memoria)
+    ADVANCED_STATS_CACHE_SIZE: int = 32
+
+    # Snapshot Parquet de la temporada (lo escribe el crawler al terminar)
+    SNAPSHOT_DIR: str = "data/snapshot"
+    # De dónde lee la API: "aggregates" (BD) o "snapshot" (Parquet, sin consultas a la BD)
+    ANALYTICS_SOURCE: str = "aggregates"
+
+    # Crawler: partidos en paralelo y peticiones por segundo al servidor de la Federación
+    CRAWLER_WORKERS: int = 4
+    CRAWLER_REQUESTS_PER_SECOND: float = 4.0
+    CRAWLER_BURST: int = 4
+
+    # Cliente HTTP: conexiones reutilizables y reintentos (backoff exponencial con jitter)
+    HTTP_POOL_SIZE: int = 10
+    HTTP_MAX_ATTEMPTS: int = 4
+    HTTP_BACKOFF_MAX: float = 8.0
+
+    # Archivo de respuestas crudas de la Federación (para reingestas offline)
+    RAW_ARCHIVE_ENABLED: bool = True
+    RAW_ARCHIVE_DIR: str = "data/raw"
+
+    # Consultas SQL: las que tarden más de esto (s) se sacan por consola con su plan (0 = desactivado)
+    SLOW_QUERY_SECONDS: float = 0.5
+
+    # API: respuestas grandes (/season/advanced, /games/{id}/shots) escritas directamente con orjson,
+    # sin validar fila a fila con Pydantic (el contrato lo comprueba check_contract.py)
+    FAST_JSON: bool = False
+
     class Config:
         env_file = ".env"
         extra = "ignore" # Ignora variables extra en el .env si las hubiera
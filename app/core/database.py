@@ -1,5 +1,8 @@
 # app/core/database.py
-from sqlalchemy import create_engine
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import settings
 
@@ -19,6 +22,115 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 class Base(DeclarativeBase):
     pass
 
+# --- INSTRUMENTACIÓN DE CONSULTAS ---
+# Los eventos del engine cuentan, para la petición en curso (ver app/main.py), las consultas,
+# el tiempo en BD y las filas devueltas. Las lentas se sacan por consola con su EXPLAIN.
+
+class QueryStats:
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.rows_known = True # False si el driver no da el nº de filas de algún SELECT
+        self.statements = []
+
+# Contadores de la petición / bloque en curso. None fuera de uno.
+_query_stats: ContextVar = ContextVar("query_stats", default=None)
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - context._query_start
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += seconds
+        # rowcount de un SELECT: psycopg2 lo da; sqlite3 devuelve -1 (no se sabe sin leer el cursor)
+        if cursor.rowcount >= 0:
+            stats.rows += cursor.rowcount
+        else:
+            stats.rows_known = False
+        stats.statements.append(statement)
+    if settings.SLOW_QUERY_SECONDS and seconds >= settings.SLOW_QUERY_SECONDS:
+        _log_slow_query(conn, statement, parameters, seconds, executemany)
+
+def _log_slow_query(conn, statement, parameters, seconds, executemany):
+    print(f"🐢 Consulta lenta ({seconds * 1000:.0f} ms): {' '.join(statement.split())[:500]}")
+    if executemany or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        # Cursor DBAPI directo: mismos parámetros y sin volver a disparar estos eventos
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = cursor.fetchall()
+        finally:
+            cursor.close()
+    except Exception as e:
+        print(f"   (sin plan: {e})")
+        return
+    for fila in plan:
+        print(f"   {' | '.join(str(v) for v in fila)}")
+
+def start_query_stats():
+    """Empieza a contar consultas. Devuelve (token para end_query_stats, contadores)."""
+    stats = QueryStats()
+    return _query_stats.set(stats), stats
+
+def end_query_stats(token):
+    _query_stats.reset(token)
+
+@contextmanager
+def count_queries():
+    """Cuenta las consultas del bloque: `with count_queries() as q: ...; q.queries`."""
+    token, stats = start_query_stats()
+    try:
+        yield stats
+    finally:
+        end_query_stats(token)
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Falla (AssertionError) si el bloque lanza más de `limit` consultas: detecta N+1."""
+    with count_queries() as stats:
+        yield stats
+    if stats.queries > limit:
+        listado = "\n".join(f"  {n + 1}. {' '.join(s.split())[:200]}" for n, s in enumerate(stats.statements))
+        raise AssertionError(f"{stats.queries} consultas (máximo {limit}):\n{listado}")
+
+def dialect_insert(db):
+    """Devuelve el `insert` del dialecto activo (el que soporta ON CONFLICT)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert no soportado para el dialecto '{dialect}'")
+    return insert
+
+def bulk_upsert(db, table, rows: list[dict], key_cols: list[str]):
+    """
+    INSERT ... ON CONFLICT (clave natural) DO UPDATE para todas las filas de golpe.
+    Con executemany SQLAlchemy 2 agrupa las filas en INSERT ... VALUES (...), (...) multi-fila
+    ("insertmanyvalues") y la sentencia compilada se cachea: nada de un objeto ORM por fila.
+    """
+    if not rows:
+        return
+    stmt = dialect_insert(db)(table)
+    update_cols = [c for c in rows[0] if c not in key_cols]
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=key_cols,
+            set_={c: stmt.excluded[c] for c in update_cols}
+        ),
+        rows
+    )
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,27 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from app.core.config import settings
+
+# --- SESIÓN HTTP COMPARTIDA ---
+# Una sola requests.Session para todo el proceso: las conexiones (TLS incluido)
+# se reutilizan con keep-alive en vez de abrir una nueva por cada petición.
+# El pool de urllib3 es seguro entre hilos (lo comparten los workers del crawler).
+
+_session = None
+_lock = threading.Lock()
+
+def get_http_session() -> requests.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=settings.HTTP_POOL_SIZE,
+                pool_maxsize=settings.HTTP_POOL_SIZE,
+                pool_block=True, # Sin conexiones libres se espera, no se abren más
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
@@ -0,0 +1,142 @@
+import bisect
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# --- MÉTRICAS DE RENDIMIENTO ---
+# stage("nombre") mide un trozo de código:
+#   - se apunta en la petición en curso (cabecera Server-Timing, ver app/main.py)
+#   - se acumula en un histograma por etapa para /metrics (formato texto de Prometheus)
+# Sin dependencias: el formato de exposición se escribe a mano.
+
+# Límites (segundos) de los buckets de los histogramas
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Percentiles de latencia por ruta, sobre las últimas RESERVOIR_SIZE peticiones
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+RESERVOIR_SIZE = 1024
+
+# Etapas de la petición en curso: lista de (nombre, segundos). None fuera de una petición.
+_request_stages: ContextVar = ContextVar("request_stages", default=None)
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1) # El último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}           # etapa -> Histogram
+        self.requests = {}         # (método, ruta, status) -> nº de peticiones
+        self.latency = {}          # (método, ruta) -> Histogram
+        self.recent = {}           # (método, ruta) -> últimas latencias (percentiles)
+
+    def observe_stage(self, name: str, seconds: float):
+        with self._lock:
+            self.stages.setdefault(name, Histogram()).observe(seconds)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        with self._lock:
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            self.latency.setdefault((method, route), Histogram()).observe(seconds)
+            self.recent.setdefault((method, route), deque(maxlen=RESERVOIR_SIZE)).append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.requests.clear()
+            self.latency.clear()
+            self.recent.clear()
+
+    def render(self) -> str:
+        """Todas las métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        lines = []
+        with self._lock:
+            lines += _histogram_lines(
+                "moneyball_stage_duration_seconds", "Duración de cada etapa instrumentada",
+                {(("stage", name),): h for name, h in self.stages.items()}
+            )
+
+            lines += ["# HELP moneyball_http_requests_total Peticiones HTTP atendidas",
+                      "# TYPE moneyball_http_requests_total counter"]
+            for (method, route, status), n in sorted(self.requests.items()):
+                lines.append(f'moneyball_http_requests_total{_labels((("method", method), ("route", route), ("status", str(status))))} {n}')
+
+            lines += _histogram_lines(
+                "moneyball_http_request_duration_seconds", "Latencia de las peticiones HTTP",
+                {(("method", m), ("route", r)): h for (m, r), h in self.latency.items()}
+            )
+
+            lines += ["# HELP moneyball_http_request_latency_seconds Percentiles de latencia (últimas peticiones)",
+                      "# TYPE moneyball_http_request_latency_seconds summary"]
+            for (method, route), valores in sorted(self.recent.items()):
+                ordenados = sorted(valores)
+                base = (("method", method), ("route", route))
+                for q in QUANTILES:
+                    valor = ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+                    lines.append(f'moneyball_http_request_latency_seconds{_labels(base + (("quantile", str(q)),))} {valor:.6f}')
+                h = self.latency[(method, route)]
+                lines.append(f"moneyball_http_request_latency_seconds_sum{_labels(base)} {h.sum:.6f}")
+                lines.append(f"moneyball_http_request_latency_seconds_count{_labels(base)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(pairs) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _histogram_lines(name: str, help_text: str, series: dict) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, h in sorted(series.items()):
+        acumulado = 0
+        for limite, n in zip(BUCKETS + ("+Inf",), h.counts):
+            acumulado += n
+            lines.append(f"{name}_bucket{_labels(labels + (('le', str(limite)),))} {acumulado}")
+        lines.append(f"{name}_sum{_labels(labels)} {h.sum:.6f}")
+        lines.append(f"{name}_count{_labels(labels)} {h.count}")
+    return lines
+
+registry = MetricsRegistry()
+
+@contextmanager
+def stage(name: str):
+    """Mide el bloque: histograma global + etapa de la petición en curso (Server-Timing)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        registry.observe_stage(name, seconds)
+        stages = _request_stages.get()
+        if stages is not None:
+            stages.append((name, seconds))
+
+def start_request():
+    """Empieza a recoger las etapas de una petición. Devuelve el token para end_request."""
+    return _request_stages.set([])
+
+def end_request(token) -> list:
+    """Etapas medidas en la petición (en orden) y deja el contexto como estaba."""
+    stages = _request_stages.get() or []
+    _request_stages.reset(token)
+    return stages
+
+def server_timing(stages: list, total: float) -> str:
+    """Valor de la cabecera Server-Timing (duraciones en ms; una etapa repetida se suma)."""
+    acumulado = {}
+    for name, seconds in stages:
+        acumulado[name] = acumulado.get(name, 0.0) + seconds
+    # Los nombres de Server-Timing son tokens HTTP: sin espacios, corchetes...
+    partes = [f"{re.sub(r'[^A-Za-z0-9_.-]', '_', name)};dur={seconds * 1000:.1f}" for name, seconds in acumulado.items()]
+    partes.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(partes)
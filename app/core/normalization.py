@@ -1,5 +1,17 @@
 # app/core/normalization.py
 
+def parse_tiempo_jugado(raw_value) -> int:
+    """
+    Convierte el tiempo jugado de la Federación ("24:36") a segundos (1476).
+    Cualquier valor raro cuenta como 0.
+    """
+    try:
+        if not isinstance(raw_value, str) or ":" not in raw_value: return 0
+        m, s = map(int, raw_value.split(":"))
+        return m * 60 + s
+    except (ValueError, TypeError):
+        return 0
+
 def normalize_team_name(raw_name: str) -> str:
     """
     Recibe el nombre sucio de la Federación y devuelve el Nombre Canónico.
@@ -0,0 +1,43 @@
+import argparse
+import threading
+import time
+
+class TokenBucket:
+    """
+    Limitador de peticiones compartido entre hilos (token bucket).
+    Se reponen `rate` fichas por segundo hasta un máximo de `burst`;
+    cada petición gasta una y, si no quedan, espera a que se reponga.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        # Con rate <= 0 nunca se repondrían fichas (y acquire dividiría entre cero)
+        if rate <= 0:
+            raise ValueError(f"rate tiene que ser > 0 (peticiones por segundo), no {rate}")
+        if burst < 1:
+            raise ValueError(f"burst tiene que ser >= 1, no {burst}")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        """Bloquea hasta poder gastar `tokens` fichas."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            # Dormimos fuera del lock para no bloquear a los demás hilos
+            time.sleep(wait)
+
+def positive_rate(value: str) -> float:
+    """Tipo de argparse para --rate: peticiones por segundo, > 0."""
+    rate = float(value)
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(f"tiene que ser > 0, no {value}")
+    return rate
@@ -0,0 +1,86 @@
+# app/core/rules.py
+
+# --- REGLAS DE CLASIFICACIÓN (POSICIÓN Y ROL TÁCTICO) ---
+# Tablas ordenadas: gana la PRIMERA regla que se cumple (como los if encadenados).
+# Cada regla es (etiqueta, alternativas): basta con que se cumpla UNA alternativa,
+# y una alternativa es una lista de condiciones que se tienen que cumplir TODAS.
+# Condición: (columna, operador, umbral). Operadores: >, <, >=, <=, in, isna.
+# Para ajustar umbrales se toca aquí, no en app/services/analytics.py.
+
+def todas(*bloques):
+    """AND entre bloques de alternativas: [[a], [b]] y [[c]] -> [[a, c], [b, c]]."""
+    resultado = [[]]
+    for bloque in bloques:
+        resultado = [previa + alternativa for previa in resultado for alternativa in bloque]
+    return resultado
+
+# ==============================================================================
+# POSICIÓN (LÓGICA V3.0 - AJUSTE DE PÍVOTS)
+# ==============================================================================
+
+# Interiores: hay que rebotar MUCHO (Top 28%) o vivir en la zona
+ES_INTERIOR = [
+    [("P_REB", ">", 0.72)],
+    [("P_REB", ">", 0.60), ("rim_freq", ">", 0.45)],
+]
+
+POSITION_RULES = [
+    # Sin percentiles (no entra en el pool)
+    ("Rotación", [[("P_3PA", "isna")]]),
+
+    # 1. BASE (PG) - Filtro estricto
+    ("Base (PG)", [
+        [("P_AST", ">", 0.80), ("P_REB", "<", 0.70), ("rim_freq", "<", 0.60)],  # Base puro
+        [("P_AST", ">", 0.65), ("P_REB", "<", 0.50), ("rim_freq", "<", 0.60)],  # Base bajito
+    ]),
+
+    # 2. INTERIORES Y POINT FORWARDS
+    ("Alero/Generador (Point Fwd)", todas(ES_INTERIOR, [[("P_AST", ">", 0.65)]])),
+    ("Ala-Pívot (PF)", todas(ES_INTERIOR, [[("P_3PA", ">", 0.55)]])),  # Stretch Big
+    # Filtro anti-falsos pívots: solo si juegas cerca del aro o rebotas una barbaridad
+    ("Pívot (C)", todas(ES_INTERIOR, [[("rim_freq", ">", 0.35)], [("P_REB", ">", 0.85)]])),
+    ("Ala-Pívot (PF)", ES_INTERIOR),  # Rebota pero juega por fuera: 4 móvil
+
+    # 3. EXTERIORES (Wings/Guards) - El resto
+    ("Combo Guard (CG)", [[("P_AST", ">", 0.55)]]),
+    ("Alero (SF)", [[("P_REB", ">", 0.55)]]),
+    ("Escolta (SG)", [[("P_3PA", ">", 0.55)]]),
+]
+POSITION_DEFAULT = "Exterior (G/F)"
+
+# ==============================================================================
+# ROL TÁCTICO
+# ==============================================================================
+
+ES_POSICION_INTERIOR = [
+    [("Posicion", "in", ["Pívot (C)", "Ala-Pívot (PF)", "Point Center", "Alero/Generador (Point Forward)"])],
+]
+
+ROLE_RULES = [
+    ("Fondo de Armario", [[("P_USG", "isna")]]),
+
+    # --- NIVEL 1: ELITE & MOTORES ---
+    ("Motor Ofensivo (Offensive Engine)", [[("P_USG", ">", 0.85), ("P_AST", ">", 0.75)]]),
+    ("Director de Juego (Floor General)", [[("P_AST", ">", 0.90)]]),
+    ("Anotador Élite (Bucket Getter)", [[("P_USG", ">", 0.80), ("P_EFF", ">", 0.70)]]),
+
+    # --- NIVEL 2: INTERIORES ---
+    ("Interior Abierto (Stretch Big)", todas(ES_POSICION_INTERIOR, [[("P_3PA", ">", 0.65), ("3P%", ">", 32.0)]])),
+    ("Distribuidor desde Poste", todas(ES_POSICION_INTERIOR, [[("P_AST", ">", 0.75)]])),
+    ("Ancla Defensiva (Rim Protector)", todas(ES_POSICION_INTERIOR, [[("P_DEF", ">", 0.80)]])),
+    ("Finalizador (Rim Runner)", todas(ES_POSICION_INTERIOR, [[("rim_freq", ">", 0.50)]])),
+
+    # --- NIVEL 3: PERÍMETRO / ESPECIALISTAS ---
+    ("Francotirador (Sniper)", [[("P_3PA", ">", 0.75), ("3P%", ">", 34.0), ("P_EFF", ">", 0.70)]]),
+    ("Tirador de Volumen (Volume Shooter)", [[("P_3PA", ">", 0.75), ("3P%", ">", 34.0)]]),
+    ("Especialista de Esquina (3&D)", [[("P_3PA", ">", 0.60), ("3P%", ">", 30.0), ("P_DEF", ">", 0.70), ("corner_freq", ">", 0.20)]]),
+    ("3&D Wing", [[("P_3PA", ">", 0.60), ("3P%", ">", 30.0), ("P_DEF", ">", 0.70)]]),
+    ("Penetrador (Slasher)", [[("rim_freq", ">", 0.40), ("P_USG", ">", 0.50)]]),
+
+    # --- NIVEL 4: ROLES DE SOPORTE ---
+    ("Conector (Connector)", [[("P_AST", ">", 0.70)]]),
+    ("Especialista Defensivo", [[("P_DEF", ">", 0.70)]]),
+    ("Oportunista Eficiente", [[("P_EFF", ">", 0.70)]]),
+    ("Microondas (High Volume)", [[("P_USG", ">", 0.80)]]),
+]
+ROLE_DEFAULT = "Rol de Rotación"
@@ -0,0 +1,47 @@
+# app/core/shot_zones.py
+import re
+
+# --- ATRIBUTOS DEL TIRO (ZONA Y VALOR) ---
+# Se calculan UNA vez en la ingesta y se guardan en shots (shot_value, is_corner, is_rim, zone_code):
+# las consultas agregan enteros y booleanos en vez de buscar texto con LIKE / str.contains.
+#
+# Zonas de la Federación: "Z<número>-<lado>" (Z1-CE, Z11-IZ, Z13-DE...), lado CE / IZ / DE.
+# zone_code = número * 10 + lado (CE=0, IZ=1, DE=2): Z11-IZ -> 111. None si la zona no sigue el formato.
+
+ZONE_SIDES = {"CE": 0, "IZ": 1, "DE": 2}
+_ZONE_RE = re.compile(r"^Z(\d+)-(CE|IZ|DE)$")
+
+# Triples desde las esquinas
+CORNER_ZONES = {"Z11-IZ", "Z11-DE", "Z13-IZ", "Z13-DE"}
+
+def zone_code(zone: str | None) -> int | None:
+    m = _ZONE_RE.match((zone or "").strip().upper())
+    if m is None:
+        return None
+    return int(m.group(1)) * 10 + ZONE_SIDES[m.group(2)]
+
+def is_corner(zone: str | None) -> bool:
+    return zone in CORNER_ZONES
+
+def is_rim(zone: str | None) -> bool:
+    """Tiro junto al aro: zonas Z1-* (Z11, Z12 y Z13 son triples)."""
+    zone = zone or ""
+    return "Z1-" in zone and not any(z in zone for z in ("Z11", "Z12", "Z13"))
+
+def shot_value(action_type: str | None) -> int | None:
+    """Valor del tiro por su tipo de acción (TIRO3, CANASTA-3P... -> 3). None si no es de 2 ni de 3."""
+    action_type = action_type or ""
+    if "3" in action_type:
+        return 3
+    if "2" in action_type:
+        return 2
+    return None
+
+def shot_attributes(action_type: str | None, zone: str | None) -> dict:
+    """Columnas derivadas de un tiro, listas para el INSERT."""
+    return {
+        "shot_value": shot_value(action_type),
+        "is_corner": is_corner(zone),
+        "is_rim": is_rim(zone),
+        "zone_code": zone_code(zone),
+    }
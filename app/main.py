@@ -1,5 +1,9 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from app.core.database import start_query_stats, end_query_stats
+from app.core.metrics import registry, start_request, end_request, server_timing
 
 # IMPORTANTE: Importa el router donde definimos los endpoints nuevos.
 # Si tu archivo se llama 'analytics.py' (como te sugerí) usa este import:
@@ -31,7 +35,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- 2. REGISTRAR RUTAS ---
+# --- 2. MÉTRICAS DE RENDIMIENTO ---
+# Cada respuesta lleva la cabecera Server-Timing con las etapas medidas (app/core/metrics.py),
+# el tiempo en BD y el total, y X-DB-Queries / X-DB-Rows con las consultas SQL de la petición
+# (X-DB-Rows solo si el driver da el nº de filas de los SELECT: Postgres sí, SQLite no).
+# Latencias por ruta y por etapa en /metrics (formato de Prometheus).
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    token = start_request()
+    db_token, db_stats = start_query_stats()
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        total = time.perf_counter() - t0
+        stages = end_request(token)
+        end_query_stats(db_token)
+        # Plantilla de la ruta (/games/{game_id}/shots), no la URL: si no, una serie por partido
+        route = request.scope.get("route")
+        registry.observe_request(request.method, getattr(route, "path", "unmatched"), status, total)
+    response.headers["Server-Timing"] = server_timing(stages + [("db", db_stats.seconds)], total)
+    response.headers["X-DB-Queries"] = str(db_stats.queries)
+    if db_stats.rows_known:
+        response.headers["X-DB-Rows"] = str(db_stats.rows)
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+# --- 3. REGISTRAR RUTAS ---
 # Aquí "enchufamos" el archivo de analítica al servidor principal.
 # El prefijo "/api/v1" significa que todas tus URLs empezarán por ahí.
 app.include_router(analytics.router, prefix="/api/v1", tags=["Analytics"])
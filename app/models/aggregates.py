@@ -0,0 +1,65 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.core.database import Base
+
+# --- AGREGADOS DE TEMPORADA ---
+# Se actualizan de forma incremental en cada ingesta de partido, así la API
+# lee filas ya agregadas en vez de recorrer player_stats y shots enteras.
+
+class TeamGameTotals(Base):
+    """Totales de equipo por partido (base del USG%)."""
+    __tablename__ = "team_game_totals"
+
+    game_id = Column(String, primary_key=True)
+    team_pk = Column(Integer, primary_key=True) # teams.id
+
+    team_mp = Column(Float, default=0)
+    team_fga = Column(Integer, default=0)
+    team_fta = Column(Integer, default=0)
+    team_tov = Column(Integer, default=0)
+
+class PlayerSeasonAggregate(Base):
+    """Sumas acumuladas de temporada por jugador (y dorsal, para sacar la moda)."""
+    __tablename__ = "player_season_aggregates"
+
+    player_pk = Column(Integer, primary_key=True) # players.id
+    dorsal = Column(String, primary_key=True)
+
+    partidos = Column(Integer, default=0)
+
+    # Sumas de las métricas por partido (media = suma / partidos)
+    sum_mp = Column(Float, default=0)
+    sum_puntos = Column(Float, default=0)
+    sum_rebotes_total = Column(Float, default=0)
+    sum_rebotes_of = Column(Float, default=0)
+    sum_rebotes_def = Column(Float, default=0)
+    sum_recuperaciones = Column(Float, default=0)
+    sum_asistencias = Column(Float, default=0)
+    sum_perdidas = Column(Float, default=0)
+    sum_t3_intentados = Column(Float, default=0)
+    sum_3p_pct = Column(Float, default=0)
+    sum_fga = Column(Float, default=0)
+    sum_usg = Column(Float, default=0)
+    sum_ts = Column(Float, default=0)
+    sum_efg = Column(Float, default=0)
+    sum_gmsc = Column(Float, default=0)
+
+class ShotProfileAggregate(Base):
+    """Conteos acumulados del mapa de tiro por jugador."""
+    __tablename__ = "shot_profile_aggregates"
+
+    player_pk = Column(Integer, primary_key=True) # players.id
+
+    total_mapped = Column(Integer, default=0)
+    corner_3s = Column(Integer, default=0)
+    rim_shots = Column(Integer, default=0)
+
+class ShotGridCell(Base):
+    """Rejilla del mapa de calor por partido y jugador (solo celdas con tiros; ver app/services/shot_grid.py)."""
+    __tablename__ = "shot_grid_cells"
+
+    game_id = Column(String, primary_key=True)
+    player_pk = Column(Integer, primary_key=True, index=True) # players.id (0 = tiro sin atribuir)
+    cell = Column(Integer, primary_key=True) # fila * GRID_COLS + columna
+
+    attempts = Column(Integer, default=0)
+    makes = Column(Integer, default=0)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+class CrawlLedger(Base):
+    """
+    Registro del crawler: última descarga de cada endpoint de cada partido.
+    Con el hash de la respuesta se sabe si algo cambió sin reescribir el partido.
+    """
+    __tablename__ = "crawl_ledger"
+
+    game_id = Column(String, primary_key=True)
+    endpoint = Column(String, primary_key=True) # "estadisticas" / "mapa-de-tiro"
+
+    fetched_at = Column(DateTime(timezone=True))
+    payload_hash = Column(String(64)) # sha256 de la respuesta (sin la key)
+    estado = Column(String, nullable=True) # Estado del partido según el boxscore
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer
+from app.core.database import Base
+
+class DataVersion(Base):
+    """Contador global de datos: cada commit de ingesta lo incrementa."""
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True) # Siempre 1 (fila única)
+    version = Column(Integer, default=0)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from app.core.database import Base
+
+class Player(Base):
+    """Dimensión de jugadores: un id entero por (nombre, equipo canónico)."""
+    __tablename__ = "players"
+    __table_args__ = (UniqueConstraint("nombre", "equipo", name="uq_players_nombre_equipo"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    nombre = Column(String, nullable=False)
+    equipo = Column(String, nullable=False) # Nombre canónico (teams.nombre)
+    team_pk = Column(Integer, ForeignKey("teams.id"), index=True)
+
+    # Id del jugador en el mapa de tiro de la Federación (se aprende al ingerir tiros)
+    componente_id = Column(String, index=True, nullable=True)
@@ -1,16 +1,32 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Float, Boolean, BigInteger, Integer
+from sqlalchemy import String, Float, Boolean, BigInteger, Integer, SmallInteger, ForeignKey, UniqueConstraint, Index
 from app.core.database import Base
 
 class Shot(Base):
     __tablename__ = "shots"
+    __table_args__ = (
+        # Clave natural: posición del tiro en el mapa de la Federación (la usa el upsert de la ingesta)
+        UniqueConstraint("game_id", "seq", name="uq_shots_game_seq"),
+        # Índices compuestos que cubren las agregaciones por partido y por jugador
+        # (la BD las resuelve leyendo solo el índice, sin ir a la tabla):
+        #   /games/{id}/stats/zones            -> (game_id, team_id, zone, is_made)
+        #   /games/{id}/stats/players-advanced -> (game_id, player_id, dorsal, team_id, shot_value, action_type)
+        #   tiros de un jugador (perfil)       -> (player_pk, game_id)
+        Index("ix_shots_game_team_zone", "game_id", "team_id", "zone", "is_made"),
+        Index("ix_shots_game_player_action", "game_id", "player_id", "dorsal", "team_id", "shot_value", "action_type"),
+        Index("ix_shots_player_pk_game", "player_pk", "game_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     
     # IDs externos
-    game_id: Mapped[str] = mapped_column(String, index=True)
+    game_id: Mapped[str] = mapped_column(String) # Índices: uq_shots_game_seq y los compuestos
+    seq: Mapped[int | None] = mapped_column(Integer, nullable=True) # Orden en la lista de tiros
     team_id: Mapped[int] = mapped_column(BigInteger, index=True)
     player_id: Mapped[str] = mapped_column(String, index=True)
+
+    # Jugador resuelto en la ingesta (dimensión players)
+    player_pk: Mapped[int | None] = mapped_column(ForeignKey("players.id"), nullable=True) # Índice: ix_shots_player_pk_game
     
     # Datos del tiro
     dorsal: Mapped[str] = mapped_column(String(10))
@@ -21,4 +37,10 @@ class Shot(Base):
     x: Mapped[float] = mapped_column(Float)
     y: Mapped[float] = mapped_column(Float)
     zone: Mapped[str] = mapped_column(String(20))
-    is_made: Mapped[bool] = mapped_column(Boolean, default=False)
\ No newline at end of file
+    is_made: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    # Derivados en la ingesta (app/core/shot_zones.py)
+    shot_value: Mapped[int | None] = mapped_column(SmallInteger, nullable=True) # 2 / 3
+    is_corner: Mapped[bool] = mapped_column(Boolean, default=False)
+    is_rim: Mapped[bool] = mapped_column(Boolean, default=False)
+    zone_code: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
\ No newline at end of file
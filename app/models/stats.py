@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.core.database import Base # Asumo que tu Base viene de aquí
 
@@ -19,16 +19,21 @@ class Game(Base):
 
 class PlayerStat(Base):
     __tablename__ = "player_stats"
+    # Clave natural: un jugador aparece una vez por partido (la usa el upsert de la ingesta)
+    __table_args__ = (UniqueConstraint("game_id", "player_pk", name="uq_player_stats_game_player"),)
 
     id = Column(Integer, primary_key=True, index=True)
     game_id = Column(String, ForeignKey("games.id")) # Relación con el partido
     
+    player_pk = Column(Integer, ForeignKey("players.id"), index=True) # Dimensión de jugadores
     equipo = Column(String) # Nombre del equipo del jugador
+    team_pk = Column(Integer, ForeignKey("teams.id"), index=True) # Equipo canónico (team_aliases)
     nombre = Column(String)
     dorsal = Column(String)
     es_titular = Column(Boolean, default=False)
     
     minutos = Column(String) # "24:36"
+    segundos_jugados = Column(Integer) # 1476 (mismo dato que 'minutos', ya numérico)
     puntos = Column(Integer)
     valoracion = Column(Integer)
     mas_menos = Column(Integer)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from app.core.database import Base
+
+class Team(Base):
+    """Equipos con su nombre canónico."""
+    __tablename__ = "teams"
+
+    id = Column(Integer, primary_key=True, index=True)
+    nombre = Column(String, unique=True, nullable=False)
+
+class TeamAlias(Base):
+    """
+    Nombre crudo de la Federación -> equipo canónico.
+    Los alias nuevos se crean solos en la ingesta (con normalize_team_name);
+    para corregir o añadir uno basta con tocar esta tabla, sin desplegar código.
+    """
+    __tablename__ = "team_aliases"
+
+    alias = Column(String, primary_key=True)
+    team_id = Column(Integer, ForeignKey("teams.id"), index=True, nullable=False)
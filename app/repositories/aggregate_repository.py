@@ -0,0 +1,236 @@
+import pandas as pd
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func, case, cast, Float, literal
+from app.core.database import dialect_insert
+from app.repositories.frame_loader import read_player_stats, read_shots
+from app.models.stats import PlayerStat
+from app.models.shot import Shot
+from app.models.player import Player
+from app.models.aggregates import TeamGameTotals, PlayerSeasonAggregate, ShotProfileAggregate, ShotGridCell
+
+# Métrica por partido (columna de Pandas) -> columna de suma en player_season_aggregates
+PLAYER_SUM_COLUMNS = {
+    'MP': 'sum_mp',
+    'puntos': 'sum_puntos',
+    'rebotes_total': 'sum_rebotes_total',
+    'rebotes_of': 'sum_rebotes_of',
+    'rebotes_def': 'sum_rebotes_def',
+    'recuperaciones': 'sum_recuperaciones',
+    'asistencias': 'sum_asistencias',
+    'perdidas': 'sum_perdidas',
+    't3_intentados': 'sum_t3_intentados',
+    '3P%': 'sum_3p_pct',
+    'FGA': 'sum_fga',
+    'USG%': 'sum_usg',
+    'TS%': 'sum_ts',
+    'eFG%': 'sum_efg',
+    'GmSc': 'sum_gmsc',
+}
+
+# Totales de equipo (Pandas) -> columnas de team_game_totals
+TEAM_TOTAL_COLUMNS = {
+    'Team_MP': 'team_mp',
+    'Team_FGA': 'team_fga',
+    'Team_FTA': 'team_fta',
+    'Team_TOV': 'team_tov',
+}
+
+def _player_game_metrics():
+    """Fila por jugador y partido con sus tiros y los totales de su equipo (ventana)."""
+    mp = cast(func.coalesce(PlayerStat.segundos_jugados, 0), Float) / 60.0
+    fga = PlayerStat.t2_intentados + PlayerStat.t3_intentados
+    team = {"partition_by": [PlayerStat.game_id, PlayerStat.team_pk]}
+    return select(
+        PlayerStat.player_pk, PlayerStat.dorsal,
+        PlayerStat.puntos, PlayerStat.rebotes_total, PlayerStat.rebotes_of, PlayerStat.rebotes_def,
+        PlayerStat.recuperaciones, PlayerStat.asistencias, PlayerStat.perdidas,
+        PlayerStat.t1_anotados, PlayerStat.t1_intentados,
+        PlayerStat.t3_anotados, PlayerStat.t3_intentados,
+        PlayerStat.faltas_cometidas,
+        mp.label("mp"),
+        fga.label("fga"),
+        (PlayerStat.t2_anotados + PlayerStat.t3_anotados).label("fg"),
+        PlayerStat.t1_intentados.label("fta"),
+        func.sum(mp).over(**team).label("team_mp"),
+        func.sum(fga).over(**team).label("team_fga"),
+        func.sum(PlayerStat.t1_intentados).over(**team).label("team_fta"),
+        func.sum(PlayerStat.perdidas).over(**team).label("team_tov"),
+    )
+
+class AggregateRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # --- LECTURA ---
+
+    def load_player_sums(self) -> pd.DataFrame:
+        """Sumas de temporada con los nombres de columna de Pandas ('MP', 'USG%'...)."""
+        df = pd.read_sql(select(PlayerSeasonAggregate), self.db.connection())
+        return df.rename(columns={v: k for k, v in PLAYER_SUM_COLUMNS.items()})
+
+    def load_shot_profiles(self) -> pd.DataFrame:
+        return pd.read_sql(select(ShotProfileAggregate), self.db.connection())
+
+    def load_shot_grid(self, player_pk: int | None = None, team_pk: int | None = None,
+                       game_id: str | None = None) -> pd.DataFrame:
+        """Celdas (cell, attempts, makes) sumadas en la BD para el filtro pedido (sin filtro: toda la liga)."""
+        stmt = select(
+            ShotGridCell.cell,
+            func.sum(ShotGridCell.attempts).label("attempts"),
+            func.sum(ShotGridCell.makes).label("makes"),
+        )
+        if player_pk is not None:
+            stmt = stmt.where(ShotGridCell.player_pk == player_pk)
+        if team_pk is not None:
+            stmt = stmt.join(Player, Player.id == ShotGridCell.player_pk).where(Player.team_pk == team_pk)
+        if game_id is not None:
+            stmt = stmt.where(ShotGridCell.game_id == game_id)
+        return pd.read_sql(stmt.group_by(ShotGridCell.cell), self.db.connection())
+
+    def load_player_rows(self, game_id: str | None = None) -> pd.DataFrame:
+        """Filas crudas de player_stats (de un partido o de toda la temporada), en formato compacto.
+        Usa la conexión de la sesión: ve también lo pendiente de commit."""
+        return read_player_stats(self.db.connection(), game_id)
+
+    def load_shot_rows(self, game_id: str | None = None) -> pd.DataFrame:
+        return read_shots(self.db.connection(), game_id)
+
+    # --- CÁLCULO EN LA BASE DE DATOS ---
+    # Mismas fórmulas que app/services/analytics.compute_game_metrics, pero en SQL:
+    # a Python solo vuelven filas ya agregadas, agrupadas por las claves enteras player_pk / team_pk.
+
+    def sql_player_sums(self) -> pd.DataFrame:
+        """Sumas de temporada por (player_pk, dorsal) calculadas en la BD."""
+        per_game = _player_game_metrics().subquery()
+        c = per_game.c
+
+        def _no_cero(expr):
+            # Equivalente a .replace(0, 1) de Pandas
+            return case((expr == 0, 1.0), else_=expr)
+
+        player_poss = c.fga + 0.44 * c.fta + c.perdidas
+        team_poss = c.team_fga + 0.44 * c.team_fta + c.team_tov
+        mp_safe = case((c.mp == 0, 9999.0), else_=c.mp)
+
+        metrics = {
+            'sum_mp': c.mp,
+            'sum_puntos': c.puntos,
+            'sum_rebotes_total': c.rebotes_total,
+            'sum_rebotes_of': c.rebotes_of,
+            'sum_rebotes_def': c.rebotes_def,
+            'sum_recuperaciones': c.recuperaciones,
+            'sum_asistencias': c.asistencias,
+            'sum_perdidas': c.perdidas,
+            'sum_t3_intentados': c.t3_intentados,
+            'sum_3p_pct': cast(c.t3_anotados, Float) / _no_cero(c.t3_intentados) * 100,
+            'sum_fga': c.fga,
+            # NULLIF: sin posesiones de equipo el USG% queda NULL (NaN en Pandas)
+            'sum_usg': 100 * (player_poss * (c.team_mp / 5)) / (mp_safe * func.nullif(team_poss, 0)),
+            'sum_ts': cast(c.puntos, Float) / _no_cero(2 * (c.fga + 0.44 * c.fta)),
+            'sum_efg': (c.fg + 0.5 * c.t3_anotados) / _no_cero(c.fga),
+            'sum_gmsc': (
+                c.puntos + 0.4 * c.fg - 0.7 * c.fga - 0.4 * (c.t1_intentados - c.t1_anotados) +
+                0.7 * c.rebotes_of + 0.3 * c.rebotes_def + c.recuperaciones +
+                0.7 * c.asistencias - 0.4 * c.faltas_cometidas - c.perdidas
+            ),
+        }
+        dorsal = func.coalesce(c.dorsal, literal(""))
+        stmt = (
+            select(
+                c.player_pk, dorsal.label("dorsal"),
+                func.count().label("partidos"),
+                *[func.sum(cast(expr, Float)).label(name) for name, expr in metrics.items()]
+            )
+            .where(c.player_pk > 0) # Como compute_season_sums: sin jugador resuelto (NULL / 0) no cuenta
+            .group_by(c.player_pk, dorsal)
+        )
+        df = pd.read_sql(stmt, self.db.connection())
+        return df.rename(columns={v: k for k, v in PLAYER_SUM_COLUMNS.items()})
+
+    def sql_team_totals(self) -> pd.DataFrame:
+        """Totales por (partido, team_pk) con GROUP BY en la BD."""
+        mp = cast(func.coalesce(PlayerStat.segundos_jugados, 0), Float) / 60.0
+        stmt = (
+            select(
+                PlayerStat.game_id, PlayerStat.team_pk,
+                cast(func.sum(mp), Float).label("Team_MP"),
+                func.sum(PlayerStat.t2_intentados + PlayerStat.t3_intentados).label("Team_FGA"),
+                func.sum(PlayerStat.t1_intentados).label("Team_FTA"),
+                func.sum(PlayerStat.perdidas).label("Team_TOV"),
+            )
+            .group_by(PlayerStat.game_id, PlayerStat.team_pk)
+        )
+        return pd.read_sql(stmt, self.db.connection())
+
+    def sql_shot_profiles(self) -> pd.DataFrame:
+        """Perfil de tiro por jugador con GROUP BY en la BD (is_corner / is_rim ya vienen de la ingesta)."""
+        stmt = (
+            select(
+                Shot.player_pk,
+                func.count(Shot.id).label("total_mapped"),
+                func.sum(case((Shot.is_corner, 1), else_=0)).label("corner_3s"),
+                func.sum(case((Shot.is_rim, 1), else_=0)).label("rim_shots"),
+            )
+            .where(Shot.player_pk > 0) # Como compute_shot_profiles
+            .group_by(Shot.player_pk)
+        )
+        return pd.read_sql(stmt, self.db.connection())
+
+    # --- ESCRITURA (sin commit: lo hace el servicio que llama) ---
+
+    def add_player_sums(self, sums: pd.DataFrame, sign: int = 1):
+        """Suma (sign=1) o resta (sign=-1) la contribución de un partido."""
+        rows = sums.rename(columns=PLAYER_SUM_COLUMNS).to_dict(orient="records")
+        self._upsert_increment(PlayerSeasonAggregate, ["player_pk", "dorsal"], rows, sign)
+        if sign < 0:
+            self.db.execute(delete(PlayerSeasonAggregate).where(PlayerSeasonAggregate.partidos <= 0))
+
+    def add_shot_profiles(self, profiles: pd.DataFrame, sign: int = 1):
+        rows = profiles.to_dict(orient="records")
+        self._upsert_increment(ShotProfileAggregate, ["player_pk"], rows, sign)
+        if sign < 0:
+            self.db.execute(delete(ShotProfileAggregate).where(ShotProfileAggregate.total_mapped <= 0))
+
+    def replace_team_totals(self, game_id: str, totals: pd.DataFrame):
+        """Reescribe los totales (game_id, team_pk) de un partido."""
+        self.delete_team_totals(game_id)
+        self.insert_team_totals(totals)
+
+    def insert_team_totals(self, totals: pd.DataFrame):
+        rows = totals.rename(columns=TEAM_TOTAL_COLUMNS).to_dict(orient="records")
+        if rows:
+            self.db.execute(TeamGameTotals.__table__.insert(), rows)
+
+    def delete_team_totals(self, game_id: str):
+        self.db.execute(delete(TeamGameTotals).where(TeamGameTotals.game_id == game_id))
+
+    def replace_shot_grid(self, game_id: str, cells: pd.DataFrame):
+        """Reescribe las celdas del mapa de calor de un partido."""
+        self.db.execute(delete(ShotGridCell).where(ShotGridCell.game_id == game_id))
+        self.insert_shot_grid(cells)
+
+    def insert_shot_grid(self, cells: pd.DataFrame):
+        rows = cells.astype({"player_pk": int, "cell": int, "attempts": int, "makes": int}).to_dict(orient="records")
+        if rows:
+            self.db.execute(ShotGridCell.__table__.insert(), rows)
+
+    def clear(self):
+        """Vacía todas las tablas de agregados (para reconstruir desde cero)."""
+        for model in (TeamGameTotals, PlayerSeasonAggregate, ShotProfileAggregate, ShotGridCell):
+            self.db.execute(delete(model))
+
+    def _upsert_increment(self, model, key_cols: list[str], rows: list[dict], sign: int):
+        if not rows:
+            return
+        table = model.__table__
+        value_cols = [c for c in rows[0] if c not in key_cols]
+        signed = [{k: (v * sign if k in value_cols else v) for k, v in r.items()} for r in rows]
+
+        insert = dialect_insert(self.db)
+        stmt = insert(table)
+        # ON CONFLICT: incremento atómico (seguro aunque haya varias ingestas a la vez)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_cols,
+            set_={c: table.c[c] + stmt.excluded[c] for c in value_cols}
+        )
+        self.db.execute(stmt, signed)
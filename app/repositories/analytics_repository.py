@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, Integer  # <--- IMPORTANTE: Añadir Integer
+from sqlalchemy import select, func, Integer, case
 from app.models.shot import Shot
 from app.schemas.stats import PlayerAdvancedStats, ZoneStat
 
@@ -10,14 +10,14 @@ class AnalyticsRepository:
     def get_shooting_stats_by_game(self, game_id: str):
         """
         Calcula estadísticas de tiro agrupadas por Equipo y Zona.
+        La consulta sale entera del índice ix_shots_game_team_zone (sin leer la tabla).
         """
         stmt = (
             select(
                 Shot.team_id,
                 Shot.zone,
                 func.count(Shot.id).label("total"),
-                # CORRECCIÓN AQUÍ: Usamos Integer (SQL) en lugar de int (Python)
-                func.sum(func.cast(Shot.is_made, Integer)).label("made") 
+                func.sum(func.cast(Shot.is_made, Integer)).label("made")
             )
             .where(Shot.game_id == game_id)
             .group_by(Shot.team_id, Shot.zone)
@@ -48,18 +48,23 @@ class AnalyticsRepository:
     def get_advanced_player_stats(self, game_id: str):
         """
         Calcula eFG%, distribución de tiro y puntos generados por jugador.
+        El intento sale de shot_value; la canasta, del tipo de acción (CANASTA-2P / CANASTA-3P), como
+        siempre. Todo sale del índice ix_shots_game_player_action, sin leer la tabla.
         """
+        def _cuenta(cond):
+            return func.sum(case((cond, 1), else_=0))
+
         stmt = (
             select(
                 Shot.player_id,
                 Shot.dorsal,
                 Shot.team_id,
                 # Tiros de 2
-                func.sum(func.cast(Shot.action_type.like('%2%'), Integer)).label("fga2"),
-                func.sum(func.cast(Shot.action_type.like('%CANASTA-2P%'), Integer)).label("fgm2"),
+                _cuenta(Shot.shot_value == 2).label("fga2"),
+                _cuenta(Shot.action_type.like('%CANASTA-2P%')).label("fgm2"),
                 # Tiros de 3
-                func.sum(func.cast(Shot.action_type.like('%3%'), Integer)).label("fga3"),
-                func.sum(func.cast(Shot.action_type.like('%CANASTA-3P%'), Integer)).label("fgm3"),
+                _cuenta(Shot.shot_value == 3).label("fga3"),
+                _cuenta(Shot.action_type.like('%CANASTA-3P%')).label("fgm3"),
             )
             .where(Shot.game_id == game_id)
             .group_by(Shot.player_id, Shot.dorsal, Shot.team_id)
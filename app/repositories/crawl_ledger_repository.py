@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from app.core.database import dialect_insert
+from app.models.crawl_ledger import CrawlLedger
+
+ENDPOINT_STATS = "estadisticas"
+ENDPOINT_SHOTS = "mapa-de-tiro"
+ESTADO_FINALIZADO = "FINALIZADO"
+
+class CrawlLedgerRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_hash(self, game_id: str, endpoint: str):
+        return self.db.execute(
+            select(CrawlLedger.payload_hash)
+            .where(CrawlLedger.game_id == game_id, CrawlLedger.endpoint == endpoint)
+        ).scalar()
+
+    def is_finalized(self, game_id: str) -> bool:
+        """True si el boxscore se guardó ya FINALIZADO y el mapa de tiro también está descargado."""
+        rows = dict(self.db.execute(
+            select(CrawlLedger.endpoint, CrawlLedger.estado).where(CrawlLedger.game_id == game_id)
+        ).all())
+        return (
+            str(rows.get(ENDPOINT_STATS) or "").upper() == ESTADO_FINALIZADO
+            and ENDPOINT_SHOTS in rows
+        )
+
+    def record(self, game_id: str, endpoint: str, payload_hash: str, estado: str = None):
+        """Apunta una descarga (sin commit: va en la transacción de la ingesta)."""
+        values = {
+            "game_id": game_id,
+            "endpoint": endpoint,
+            "fetched_at": datetime.now(timezone.utc),
+            "payload_hash": payload_hash,
+            "estado": estado,
+        }
+        insert = dialect_insert(self.db)
+        stmt = insert(CrawlLedger.__table__).values(**values)
+        update_cols = ["fetched_at", "payload_hash"] + (["estado"] if estado is not None else [])
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=["game_id", "endpoint"],
+            set_={c: stmt.excluded[c] for c in update_cols}
+        ))
@@ -0,0 +1,23 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from app.core.database import dialect_insert
+from app.models.data_version import DataVersion
+
+class DataVersionRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self) -> int:
+        version = self.db.execute(select(DataVersion.version).where(DataVersion.id == 1)).scalar()
+        return version or 0
+
+    def bump(self):
+        """Incrementa la versión (sin commit: va en la transacción de la ingesta)."""
+        table = DataVersion.__table__
+        insert = dialect_insert(self.db)
+        stmt = insert(table).values(id=1, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={"version": table.c.version + 1}
+        )
+        self.db.execute(stmt)
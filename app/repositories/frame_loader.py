@@ -0,0 +1,93 @@
+import pandas as pd
+from sqlalchemy import select
+from app.models.stats import PlayerStat
+from app.models.shot import Shot
+
+# --- CARGA COMPACTA DE TABLAS CRUDAS A PANDAS ---
+# Solo se piden las columnas que usa la analítica y se convierten a tipos pequeños:
+# - contadores del boxscore -> int16 (NULL cuenta como 0)
+# - textos muy repetidos (partido, equipo, jugador, dorsal, zona, tipo de acción) -> category
+# - coordenadas de tiro -> float32
+# - claves enteras player_pk / team_pk -> int32 (NULL, sin resolver, queda a 0)
+#
+# Presupuesto de memoria por 100.000 filas (medido con memory_usage(deep=True),
+# ids de partido de 96 caracteres como los reales):
+#   player_stats: ~57 MB con read_sql de la tabla entera  ->  ~5 MB con read_player_stats
+#   shots:        ~45 MB con read_sql de la tabla entera  ->  ~0.6 MB (columnas del perfil)
+#                                                          ->  ~3 MB (todas las de SHOT_DTYPES)
+
+PLAYER_STAT_COUNTERS = [
+    'segundos_jugados', 'puntos',
+    'rebotes_total', 'rebotes_def', 'rebotes_of',
+    'asistencias', 'perdidas', 'recuperaciones',
+    't1_anotados', 't1_intentados',
+    't2_anotados', 't2_intentados',
+    't3_anotados', 't3_intentados',
+    'faltas_cometidas',
+]
+PLAYER_STAT_CATEGORIES = ['game_id', 'equipo', 'nombre', 'dorsal']
+
+PLAYER_STAT_KEYS = ['player_pk', 'team_pk']
+
+# Columnas crudas de player_stats que necesita la analítica
+# (nombre y equipo no hacen falta: salen de las dimensiones players / teams)
+PLAYER_STAT_COLUMNS = PLAYER_STAT_KEYS + ['game_id', 'dorsal'] + PLAYER_STAT_COUNTERS
+
+SHOT_DTYPES = {
+    'id': 'int32',
+    'player_pk': 'int32',
+    'game_id': 'category',
+    'team_id': 'int64',
+    'player_id': 'category',
+    'dorsal': 'category',
+    'action_type': 'category',
+    'zone': 'category',
+    'x': 'float32',
+    'y': 'float32',
+    'is_made': 'bool',
+    'shot_value': 'int8',
+    'is_corner': 'bool',
+    'is_rim': 'bool',
+    'zone_code': 'int16',
+}
+
+# Lo mínimo para el perfil de tiro (esquinas / aro, ya calculados en la ingesta)
+SHOT_ANALYTICS_COLUMNS = ['player_pk', 'is_corner', 'is_rim']
+
+def compact_player_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Aplica los tipos compactos a un DataFrame de player_stats (venga de la BD o de otro sitio)."""
+    df = df.copy()
+    for col in PLAYER_STAT_KEYS:
+        if col in df.columns:
+            df[col] = df[col].fillna(0).astype('int32')
+    for col in PLAYER_STAT_COUNTERS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype('int16')
+    for col in PLAYER_STAT_CATEGORIES:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def compact_shots(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for col, dtype in SHOT_DTYPES.items():
+        if col not in df.columns:
+            continue
+        if dtype.startswith('int') or dtype == 'bool':
+            df[col] = df[col].fillna(0)
+        df[col] = df[col].astype(dtype)
+    return df
+
+def read_player_stats(conn, game_id: str | None = None) -> pd.DataFrame:
+    """player_stats con las columnas de la analítica y tipos compactos."""
+    stmt = select(*[getattr(PlayerStat, c) for c in PLAYER_STAT_COLUMNS])
+    if game_id is not None:
+        stmt = stmt.where(PlayerStat.game_id == game_id)
+    return compact_player_stats(pd.read_sql(stmt, conn))
+
+def read_shots(conn, game_id: str | None = None, columns: list[str] = SHOT_ANALYTICS_COLUMNS) -> pd.DataFrame:
+    """shots con las columnas pedidas (por defecto, las del perfil de tiro) y tipos compactos."""
+    stmt = select(*[getattr(Shot, c) for c in columns])
+    if game_id is not None:
+        stmt = stmt.where(Shot.game_id == game_id)
+    return compact_shots(pd.read_sql(stmt, conn))
@@ -0,0 +1,115 @@
+import pandas as pd
+from collections import Counter, defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, tuple_
+from app.core.database import dialect_insert
+from app.models.player import Player
+from app.models.stats import PlayerStat
+
+class PlayerRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def load_frame(self) -> pd.DataFrame:
+        """Dimensión de jugadores para poner nombre a las claves enteras (player_pk, nombre, equipo)."""
+        stmt = select(Player.id.label("player_pk"), Player.nombre, Player.equipo)
+        return pd.read_sql(stmt, self.db.connection())
+
+    def resolve_many(self, claves: list[tuple[str, str]], team_pks: dict = None) -> dict:
+        """
+        (nombre, equipo canónico) -> player_pk, creando los jugadores que falten.
+        `team_pks` (equipo canónico -> teams.id) se guarda en los jugadores nuevos.
+        ON CONFLICT DO NOTHING: dos ingestas a la vez no duplican jugadores.
+        """
+        claves = list(dict.fromkeys(claves))
+        if not claves:
+            return {}
+        team_pks = team_pks or {}
+        insert = dialect_insert(self.db)
+        self.db.execute(
+            insert(Player.__table__).on_conflict_do_nothing(index_elements=["nombre", "equipo"]),
+            [{"nombre": nombre, "equipo": equipo, "team_pk": team_pks.get(equipo)} for nombre, equipo in claves]
+        )
+        rows = self.db.execute(
+            select(Player.nombre, Player.equipo, Player.id)
+            .where(tuple_(Player.nombre, Player.equipo).in_(claves))
+        ).all()
+        return {(nombre, equipo): pk for nombre, equipo, pk in rows}
+
+    def attribute_shots(self, game_id: str, tiros: list[tuple]) -> list:
+        """
+        player_pk de cada tiro de un partido; `tiros` son tuplas (equipo_id, componente_id, dorsal).
+        1. Por componente_id, si ya lo conocemos y ese jugador está en el boxscore del partido.
+        2. Si no, por equipo + dorsal: el equipo_id del mapa de tiro se empareja con el equipo
+           del boxscore con el que más dorsales comparte.
+        Los componente_id resueltos por dorsal se guardan en players para la próxima vez.
+        Los tiros que no casan quedan a None.
+        """
+        box = self.db.execute(
+            select(PlayerStat.player_pk, PlayerStat.equipo, PlayerStat.dorsal)
+            .where(PlayerStat.game_id == game_id, PlayerStat.player_pk.is_not(None))
+        ).all()
+        if not box or not tiros:
+            return [None] * len(tiros)
+
+        por_dorsal = defaultdict(dict)
+        for pk, equipo, dorsal in box:
+            por_dorsal[equipo][str(dorsal)] = pk
+        equipo_de_pk = {pk: equipo for pk, equipo, _ in box}
+
+        componentes = {c for _, c, _ in tiros if c}
+        por_componente = {}
+        if componentes:
+            por_componente = {
+                c: pk for c, pk in self.db.execute(
+                    select(Player.componente_id, Player.id).where(Player.componente_id.in_(componentes))
+                ).all()
+                if pk in equipo_de_pk
+            }
+
+        # Afinidad equipo_id -> equipo del boxscore (un componente conocido pesa más que un dorsal)
+        afinidad = defaultdict(Counter)
+        dorsales_tiro = defaultdict(set)
+        for equipo_id, componente, dorsal in tiros:
+            if componente in por_componente:
+                afinidad[equipo_id][equipo_de_pk[por_componente[componente]]] += 100
+            dorsales_tiro[equipo_id].add(str(dorsal))
+        for equipo_id, dorsales in dorsales_tiro.items():
+            for equipo, plantilla in por_dorsal.items():
+                afinidad[equipo_id][equipo] += len(dorsales & plantilla.keys())
+        equipo_de_tiro = self._emparejar_equipos(afinidad)
+
+        resultado = []
+        aprendidos = {}
+        for equipo_id, componente, dorsal in tiros:
+            pk = por_componente.get(componente)
+            if pk is None:
+                pk = por_dorsal.get(equipo_de_tiro.get(equipo_id), {}).get(str(dorsal))
+                if pk is not None and componente:
+                    aprendidos.setdefault(pk, componente)
+            resultado.append(pk)
+
+        for pk, componente in aprendidos.items():
+            self.db.execute(
+                update(Player)
+                .where(Player.id == pk, Player.componente_id.is_(None))
+                .values(componente_id=componente)
+            )
+        return resultado
+
+    @staticmethod
+    def _emparejar_equipos(afinidad: dict) -> dict:
+        """
+        equipo_id -> equipo del boxscore. Con dos y dos (lo normal) se elige el cruce
+        con más coincidencias en conjunto; si no, el mejor de cada uno.
+        """
+        ids = list(afinidad)
+        equipos = sorted({e for c in afinidad.values() for e in c})
+        if len(ids) == 2 and len(equipos) == 2:
+            a, b = ids
+            directo = afinidad[a][equipos[0]] + afinidad[b][equipos[1]]
+            cruzado = afinidad[a][equipos[1]] + afinidad[b][equipos[0]]
+            if directo >= cruzado:
+                return {a: equipos[0], b: equipos[1]}
+            return {a: equipos[1], b: equipos[0]}
+        return {i: c.most_common(1)[0][0] for i, c in afinidad.items() if c}
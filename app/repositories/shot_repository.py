@@ -1,32 +1,38 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from app.core.database import bulk_upsert
 from app.models.shot import Shot
-from app.schemas.shot import ShotIngest
+
+# Columnas de ShotResponse (app/schemas/shot.py): se leen filas planas, no objetos ORM
+SHOT_RESPONSE_COLUMNS = [Shot.id, Shot.game_id, Shot.player_id, Shot.action_type, Shot.x, Shot.y, Shot.is_made]
 
 class ShotRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_batch(self, game_id: str, shots_data: list[ShotIngest]):
-        """Guarda una lista masiva de tiros de golpe (Batch Insert)"""
-        db_shots = []
-        for data in shots_data:
-            # Convertimos del DTO (Pydantic) a la Entidad (SQLAlchemy)
-            shot = Shot(
-                game_id=game_id,
-                team_id=data.equipo_id,
-                player_id=data.componente_id,
-                dorsal=data.dorsal,
-                period=data.numero_periodo,
-                action_type=data.accion_tipo,
-                x=data.posicion_x, # Ya viene limpio (float)
-                y=data.posicion_y,
-                zone=data.zona,
-                is_made=bool(data.metido)
-            )
-            db_shots.append(shot)
-        
-        if db_shots:
-            self.db.add_all(db_shots)
-            self.db.commit()
-            return len(db_shots)
-        return 0
\ No newline at end of file
+    def game_shots_page(self, game_id: str, after_seq: int | None = None, limit: int | None = None):
+        """
+        Tiros del partido en orden de `seq`, empezando después de `after_seq` (keyset sobre
+        uq_shots_game_seq). Filas (seq, columnas de ShotResponse).
+        """
+        stmt = select(Shot.seq, *SHOT_RESPONSE_COLUMNS).where(Shot.game_id == game_id)
+        if after_seq is not None:
+            stmt = stmt.where(Shot.seq > after_seq)
+        stmt = stmt.order_by(Shot.seq)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return self.db.execute(stmt).all()
+
+    def replace_game_shots(self, game_id: str, rows: list[dict]) -> int:
+        """
+        Deja en la BD exactamente `rows` (con su `seq`) para el partido:
+        upsert por (game_id, seq) en lotes multi-fila y borrado de los tiros sobrantes.
+        Sin commit: el llamador cierra la transacción.
+        """
+        bulk_upsert(self.db, Shot.__table__, rows, ["game_id", "seq"])
+        self.db.execute(
+            delete(Shot.__table__)
+            .where(Shot.__table__.c.game_id == game_id)
+            .where((Shot.__table__.c.seq >= len(rows)) | Shot.__table__.c.seq.is_(None))
+        )
+        return len(rows)
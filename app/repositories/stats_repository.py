@@ -0,0 +1,29 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from app.core.database import bulk_upsert
+from app.models.stats import Game, PlayerStat
+
+class StatsRepository:
+    """Escritura del boxscore con SQLAlchemy Core (sin commit: lo hace el servicio)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def game_exists(self, game_id: str) -> bool:
+        return self.db.execute(select(Game.id).where(Game.id == game_id)).first() is not None
+
+    def upsert_game(self, game: dict):
+        bulk_upsert(self.db, Game.__table__, [game], ["id"])
+
+    def replace_player_stats(self, game_id: str, rows: list[dict]):
+        """
+        Deja en la BD exactamente `rows` para el partido: upsert por (game_id, player_pk)
+        y borrado de los jugadores que ya no vienen en el acta.
+        """
+        bulk_upsert(self.db, PlayerStat.__table__, rows, ["game_id", "player_pk"])
+        player_pks = [r["player_pk"] for r in rows]
+        self.db.execute(
+            delete(PlayerStat.__table__)
+            .where(PlayerStat.__table__.c.game_id == game_id)
+            .where(PlayerStat.__table__.c.player_pk.not_in(player_pks))
+        )
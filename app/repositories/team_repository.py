@@ -0,0 +1,43 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from app.core.database import dialect_insert
+from app.core.normalization import normalize_team_name
+from app.models.team import Team, TeamAlias
+
+class TeamRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _lookup(self, alias: str):
+        return self.db.execute(
+            select(Team.id, Team.nombre)
+            .join(TeamAlias, TeamAlias.team_id == Team.id)
+            .where(TeamAlias.alias == alias)
+        ).first()
+
+    def resolve(self, raw_name: str) -> tuple[int, str]:
+        """
+        Nombre crudo de la Federación -> (team_pk, nombre canónico).
+        Si el alias no existe se deduce con normalize_team_name y se guardan
+        el equipo y el alias (ON CONFLICT DO NOTHING, seguro con ingestas en paralelo).
+        """
+        alias = raw_name or ""
+        row = self._lookup(alias)
+        if row is None:
+            insert = dialect_insert(self.db)
+            canonico = normalize_team_name(raw_name)
+            self.db.execute(
+                insert(Team.__table__).on_conflict_do_nothing(index_elements=["nombre"]),
+                [{"nombre": canonico}]
+            )
+            team_pk = self.db.execute(select(Team.id).where(Team.nombre == canonico)).scalar_one()
+            self.db.execute(
+                insert(TeamAlias.__table__).on_conflict_do_nothing(index_elements=["alias"]),
+                [{"alias": alias, "team_id": team_pk}]
+            )
+            row = self._lookup(alias)
+        return row.id, row.nombre
+
+    def get_by_name(self, nombre: str):
+        """team_pk de un nombre canónico (None si no existe)."""
+        return self.db.execute(select(Team.id).where(Team.nombre == nombre)).scalar()
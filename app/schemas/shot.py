@@ -40,4 +40,14 @@ class ShotResponse(BaseModel):
     y: float
     is_made: bool
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+# 3. MAPA DE CALOR: rejilla fija (ver app/services/shot_grid.py)
+class ShotHeatmapResponse(BaseModel):
+    rows: int
+    cols: int
+    cell_size: float # En % de la pista (ancho y fondo de media pista)
+    total_attempts: int
+    total_makes: int
+    attempts: list[list[int]]
+    makes: list[list[int]]
+    fg_pct: list[list[float | None]] # None = celda sin tiros
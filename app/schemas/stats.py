@@ -1,8 +1,9 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 # --- BLOQUE NUEVO (Moneyball / Boxscore Real) ---
 class MoneyballPlayerSchema(BaseModel):
+    player_pk: int  # Clave del jugador (para /shots/heatmap)
     Jugador: str
     Equipo: str
     PJ: int         
@@ -30,9 +31,10 @@ class MoneyballPlayerSchema(BaseModel):
     P_DEF: float
 
 class MoneyballResponse(BaseModel):
-    total_jugadores: int
+    total_jugadores: int # Todos los que cumplen los filtros (no solo los de esta página)
     filtros_aplicados: dict
     data: List[MoneyballPlayerSchema]
+    next_cursor: Optional[str] = None # Para pedir la página siguiente (None = última)
 
 # DTO Maestro para el perfil individual (Stats + Mapa de Tiros)
 from app.schemas.shot import ShotResponse # Asegúrate de tener este import
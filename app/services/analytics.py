@@ -1,29 +1,37 @@
 import pandas as pd
 import numpy as np
 from sqlalchemy.orm import Session
-from app.models.stats import PlayerStat
-from app.models.shot import Shot
-from app.core.normalization import normalize_team_name
-
-def get_advanced_stats(db: Session, min_games=3, min_minutes=10):
-    # 1. CARGA DE DATOS
-    df = pd.read_sql(db.query(PlayerStat).statement, db.bind)
-    df_shots = pd.read_sql(db.query(Shot).statement, db.bind)
-    
-    if df.empty:
-        return pd.DataFrame()
+from app.core.metrics import stage
+from app.core.rules import POSITION_RULES, POSITION_DEFAULT, ROLE_RULES, ROLE_DEFAULT
+from app.repositories.aggregate_repository import AggregateRepository, PLAYER_SUM_COLUMNS
+from app.repositories.player_repository import PlayerRepository
+from app.services.percentiles import PercentileIndex, def_score
 
-    # 2. PRE-PROCESAMIENTO
-    df['equipo'] = df['equipo'].apply(normalize_team_name)
+# Métricas por partido que se promedian en la temporada (en este orden)
+SEASON_MEAN_COLUMNS = list(PLAYER_SUM_COLUMNS)
+# Conteos enteros: su suma es exacta por cualquier camino y la media (una sola división) también
+COUNT_MEAN_COLUMNS = ['puntos', 'rebotes_total', 'rebotes_of', 'rebotes_def', 'recuperaciones',
+                      'asistencias', 'perdidas', 't3_intentados', 'FGA']
+MEAN_DECIMALS = 9
 
-    def parse_minutos(val):
-        try:
-            if not isinstance(val, str) or ":" not in val: return 0.0
-            m, s = map(int, val.split(":"))
-            return m + s/60
-        except: return 0.0
+def compute_team_totals(df):
+    """Totales de equipo por partido (a partir de compute_game_metrics)."""
+    team_stats = df.groupby(['game_id', 'team_pk'], observed=True)[['MP', 'FGA', 'FTA', 'perdidas']].sum().reset_index()
+    team_stats.columns = ['game_id', 'team_pk', 'Team_MP', 'Team_FGA', 'Team_FTA', 'Team_TOV']
+    return team_stats
 
-    df['MP'] = df['minutos'].apply(parse_minutos)
+def compute_game_metrics(df):
+    """
+    Métricas de cada jugador en cada partido (USG%, TS%, eFG%, GmSc...).
+    Recibe filas crudas de player_stats; vale para un partido o para la temporada entera.
+    """
+    df = df.copy()
+
+    # PRE-PROCESAMIENTO
+    # El equipo canónico ya viene resuelto de la ingesta (team_pk, vía team_aliases)
+
+    # Minutos: columna numérica rellenada en la ingesta (sin parsear "24:36" aquí)
+    df['MP'] = df['segundos_jugados'].fillna(0) / 60
     
     # Cálculos básicos de tiro
     df['FGA'] = df['t2_intentados'] + df['t3_intentados']
@@ -35,11 +43,9 @@ def get_advanced_stats(db: Session, min_games=3, min_minutes=10):
     df['2P%'] = (df['t2_anotados'] / df['t2_intentados'].replace(0, 1)) * 100
 
     # Totales de equipo
-    team_stats = df.groupby(['game_id', 'equipo'])[['MP', 'FGA', 'FTA', 'perdidas']].sum().reset_index()
-    team_stats.columns = ['game_id', 'equipo', 'Team_MP', 'Team_FGA', 'Team_FTA', 'Team_TOV']
-    df = pd.merge(df, team_stats, on=['game_id', 'equipo'])
+    df = pd.merge(df, compute_team_totals(df), on=['game_id', 'team_pk'])
 
-    # 3. MÉTRICAS AVANZADAS
+    # MÉTRICAS AVANZADAS
     df['eFG%'] = (df['FG'] + 0.5 * df['t3_anotados']) / df['FGA'].replace(0, 1)
     df['TS%'] = df['puntos'] / (2 * (df['FGA'] + 0.44 * df['FTA'])).replace(0, 1)
     
@@ -53,166 +59,206 @@ def get_advanced_stats(db: Session, min_games=3, min_minutes=10):
         0.7 * df['rebotes_of'] + 0.3 * df['rebotes_def'] + df['recuperaciones'] + 
         0.7 * df['asistencias'] - 0.4 * df['faltas_cometidas'] - df['perdidas']
     )
+    return df
+
+def compute_season_sums(df):
+    """
+    Suma de las métricas por partido para cada (player_pk, dorsal).
+    Es lo que guardamos en player_season_aggregates: media = suma / partidos.
+    Las filas sin jugador resuelto (player_pk 0) no cuentan.
+    """
+    df = df[df['player_pk'] > 0]
+    df = df.assign(dorsal=df['dorsal'].astype(object).fillna(""))
+    grouped = df.groupby(['player_pk', 'dorsal'], observed=True)
+    sums = grouped[SEASON_MEAN_COLUMNS].sum()
+    sums.insert(0, 'partidos', grouped.size())
+    return sums.reset_index()
+
+def compute_shot_profiles(df_shots):
+    """Conteos del mapa de tiro por jugador (total, triples de esquina, tiros junto al aro)."""
+    # is_corner / is_rim se calculan en la ingesta (app/core/shot_zones.py)
+    df_shots = df_shots[df_shots['player_pk'] > 0]
+
+    profiles = df_shots.groupby('player_pk').agg(
+        total_mapped=('player_pk', 'size'),
+        corner_3s=('is_corner', 'sum'),
+        rim_shots=('is_rim', 'sum')
+    ).reset_index()
+    return profiles.astype({'total_mapped': int, 'corner_3s': int, 'rim_shots': int})
+
+_OPERADORES = {
+    ">": np.greater,
+    "<": np.less,
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+}
+
+def _condition_mask(df, condicion):
+    columna, operador, *umbral = condicion
+    valores = df[columna].to_numpy() if columna in df.columns else np.zeros(len(df))
+    if operador == "isna":
+        return pd.isna(valores)
+    if operador == "in":
+        return np.isin(valores, umbral[0])
+    return _OPERADORES[operador](valores.astype(float), umbral[0])
+
+def classify(df, rules, default):
+    """
+    Evalúa una tabla de reglas ordenada en una sola pasada vectorizada.
+    Devuelve un array con la etiqueta de la primera regla que cumple cada fila.
+    """
+    if df.empty:
+        return np.array([], dtype=object)
+    condiciones = [
+        np.logical_or.reduce([
+            np.logical_and.reduce([_condition_mask(df, c) for c in alternativa])
+            for alternativa in alternativas
+        ])
+        for _, alternativas in rules
+    ]
+    etiquetas = [etiqueta for etiqueta, _ in rules]
+    return np.select(condiciones, etiquetas, default=default)
+
+def season_sums_from_sql(db: Session):
+    """
+    Sumas de temporada calculadas en la BD (ventanas + GROUP BY por player_pk).
+    Solo viajan filas agregadas, ya con la clave final.
+    """
+    return AggregateRepository(db).sql_player_sums()
+
+def team_totals_from_sql(db: Session):
+    return AggregateRepository(db).sql_team_totals()
+
+def get_advanced_stats(db: Session, min_games=3, min_minutes=10, source="aggregates"):
+    """
+    Ranking Moneyball de la temporada.
+    - source="aggregates": lee los agregados calculados en la ingesta (lo que usa la API).
+      (Si la BD se llenó antes de existir los agregados: `python rebuild_aggregates.py`)
+    - source="sql": calcula las sumas en la BD en el momento, sin depender de los agregados.
+    - source="raw": descarga las filas crudas (carga compacta) y lo calcula todo en Pandas.
+    """
+    if source not in ("aggregates", "sql", "raw"):
+        raise ValueError(f"source desconocido: {source}")
+    repo = AggregateRepository(db)
+    with stage("load_inputs"):
+        players = PlayerRepository(db).load_frame()
+        if source == "raw":
+            inputs = (repo.load_player_rows(), repo.load_shot_rows())
+        elif source == "sql":
+            inputs = (season_sums_from_sql(db), repo.sql_shot_profiles())
+        else:
+            inputs = (repo.load_player_sums(), repo.load_shot_profiles())
+    if source == "raw":
+        return get_advanced_stats_from_frames(*inputs, players, min_games, min_minutes)
+    return build_advanced_stats(*inputs, players, min_games, min_minutes)
+
+def get_advanced_stats_from_frames(df, df_shots, players, min_games=3, min_minutes=10):
+    """Mismo resultado que get_advanced_stats, pero partiendo de filas crudas (player_stats / shots)."""
+    if df.empty:
+        return pd.DataFrame()
+    with stage("season_sums"):
+        sums = compute_season_sums(compute_game_metrics(df))
+        shot_sums = compute_shot_profiles(df_shots) if not df_shots.empty else pd.DataFrame()
+    return build_advanced_stats(sums, shot_sums, players, min_games, min_minutes)
+
+def build_advanced_stats(player_sums, shot_sums, players, min_games=3, min_minutes=10):
+    """De las sumas de temporada a la tabla final (medias, percentiles, posición y rol)."""
+    with stage("season_means"):
+        means = season_means(player_sums, shot_sums, players)
+    return finalize_advanced_stats(means, min_games, min_minutes)
+
+def season_means(player_sums, shot_sums, players):
+    """
+    Medias de temporada por jugador (y frecuencias de esquina / aro) a partir de las sumas.
+    Todo se agrupa por player_pk; nombre y equipo salen de la dimensión `players`.
+    """
+    if player_sums.empty:
+        return pd.DataFrame()
+
+    # Dorsal como texto plano (la carga compacta lo trae como category)
+    player_sums = player_sums.astype({'dorsal': object})
 
     # 4. MAPA DE CALOR
     shot_profiles = pd.DataFrame()
-    if not df_shots.empty:
-        df_shots['is_corner'] = df_shots['zone'].isin(['Z11-IZ', 'Z11-DE', 'Z13-IZ', 'Z13-DE'])
-        df_shots['is_rim'] = df_shots['zone'].str.contains('Z1-', na=False) & ~df_shots['zone'].str.contains('Z11|Z12|Z13', na=False)
-
-        shot_profiles = df_shots.groupby('dorsal').agg(
-            total_mapped=('id', 'count'),
-            corner_3s=('is_corner', 'sum'),
-            rim_shots=('is_rim', 'sum')
-        ).reset_index()
-        
+    if not shot_sums.empty:
+        shot_profiles = shot_sums.copy()
         shot_profiles['corner_freq'] = (shot_profiles['corner_3s'] / shot_profiles['total_mapped']).fillna(0)
         shot_profiles['rim_freq'] = (shot_profiles['rim_shots'] / shot_profiles['total_mapped']).fillna(0)
 
     # 5. AGREGACIÓN (MEDIAS)
-    def get_mode(x): return x.mode().iloc[0] if not x.mode().empty else x.iloc[0]
-
-    final_stats = df.groupby(['nombre', 'equipo']).agg({
-        'dorsal': get_mode,
-        'game_id': 'count',
-        'MP': 'mean',
-        'puntos': 'mean',
-        'rebotes_total': 'mean',
-        'rebotes_of': 'mean',
-        'rebotes_def': 'mean',
-        'recuperaciones': 'mean',
-        'asistencias': 'mean',
-        'perdidas': 'mean',
-        't3_intentados': 'mean',
-        '3P%': 'mean',
-        'FGA': 'mean',
-        'USG%': 'mean',
-        'TS%': 'mean',
-        'eFG%': 'mean',
-        'GmSc': 'mean'
-    }).reset_index()
+    # Moda del dorsal: el más repetido (en empate, el menor, igual que Series.mode)
+    dorsales = player_sums.sort_values(
+        ['player_pk', 'partidos', 'dorsal'], ascending=[True, False, True]
+    ).drop_duplicates('player_pk').set_index('player_pk')['dorsal']
+
+    totals = player_sums.groupby('player_pk')[['partidos'] + SEASON_MEAN_COLUMNS].sum()
+    final_stats = totals[SEASON_MEAN_COLUMNS].div(totals['partidos'], axis=0)
+    # Redondeo a 9 decimales de las métricas con decimales (MP, USG%, TS%...): sus sumas llegan con
+    # ruido de coma flotante distinto según el camino (Pandas, SQL o agregados sumados y restados en
+    # cada ingesta, ~1e-13). Sin él, empates de verdad se desempatan en los percentiles y algún x.x5
+    # redondea distinto según el orden de ingesta. Los conteos no se redondean: son exactos, y
+    # Def_Score (rebotes_def + 1.5 * recuperaciones) sobre medias redondeadas arrastraría ~1e-9 de
+    # ruido que desempata jugadores empatados en el cálculo original.
+    decimales = [c for c in SEASON_MEAN_COLUMNS if c not in COUNT_MEAN_COLUMNS]
+    final_stats[decimales] = final_stats[decimales].round(MEAN_DECIMALS)
+    final_stats.insert(0, 'game_id', totals['partidos'])
+    final_stats.insert(0, 'dorsal', dorsales)
+    final_stats = final_stats.reset_index()
+
+    # Nombre y equipo desde la dimensión de jugadores (mismo orden de siempre: nombre, equipo)
+    final_stats = pd.merge(players[['player_pk', 'nombre', 'equipo']], final_stats, on='player_pk')
+    final_stats = final_stats.sort_values(['nombre', 'equipo'], kind='stable').reset_index(drop=True)
 
     if not shot_profiles.empty:
-        final_stats = pd.merge(final_stats, shot_profiles[['dorsal', 'corner_freq', 'rim_freq']], on='dorsal', how='left')
+        final_stats = pd.merge(final_stats, shot_profiles[['player_pk', 'corner_freq', 'rim_freq']], on='player_pk', how='left')
         final_stats[['corner_freq', 'rim_freq']] = final_stats[['corner_freq', 'rim_freq']].fillna(0)
     else:
         final_stats['corner_freq'] = 0
         final_stats['rim_freq'] = 0
 
-    # 6. FILTRADO
+    return final_stats
+
+def pool_filter(final_stats, min_games, min_minutes):
+    """Jugadores que cuentan para los percentiles (con su Def_Score ya calculado)."""
     pool_stats = final_stats[
         (final_stats['game_id'] >= min_games) & (final_stats['MP'] >= min_minutes)
     ].copy()
+    pool_stats['Def_Score'] = def_score(pool_stats['rebotes_def'], pool_stats['recuperaciones'])
+    return pool_stats
+
+def finalize_advanced_stats(final_stats, min_games=3, min_minutes=10, percentile_index=None):
+    """
+    Filtrado, percentiles, posición, rol y limpieza de columnas.
+    Con `percentile_index` (de todo el pool) se puede finalizar solo un subconjunto
+    de jugadores (p.ej. uno, para su perfil) sin recalcular el ranking de la liga.
+    """
+    if final_stats.empty:
+        return pd.DataFrame()
+
+    # 6. FILTRADO
+    pool_stats = pool_filter(final_stats, min_games, min_minutes)
 
     if pool_stats.empty: return pd.DataFrame()
 
     # --- PERCENTILES ---
-    pool_stats['P_USG'] = pool_stats['USG%'].rank(pct=True)
-    pool_stats['P_AST'] = pool_stats['asistencias'].rank(pct=True)
-    pool_stats['P_REB'] = pool_stats['rebotes_total'].rank(pct=True)
-    pool_stats['P_3PA'] = pool_stats['t3_intentados'].rank(pct=True)
-    pool_stats['P_EFF'] = pool_stats['eFG%'].rank(pct=True)
-    
-    pool_stats['Def_Score'] = pool_stats['rebotes_def'] + (pool_stats['recuperaciones'] * 1.5)
-    pool_stats['P_DEF'] = pool_stats['Def_Score'].rank(pct=True)
+    with stage("percentiles"):
+        if percentile_index is None:
+            percentile_index = PercentileIndex.from_pool(pool_stats)
+        pool_stats = pool_stats.join(percentile_index.percentiles(pool_stats))
 
-    final_stats = pd.merge(final_stats, pool_stats[['nombre', 'equipo', 'P_USG', 'P_AST', 'P_REB', 'P_3PA', 'P_EFF', 'P_DEF']], on=['nombre', 'equipo'], how='left')
+        final_stats = pd.merge(final_stats, pool_stats[['player_pk', 'P_USG', 'P_AST', 'P_REB', 'P_3PA', 'P_EFF', 'P_DEF']], on='player_pk', how='left')
     
     # ==============================================================================
-    # 7. LÓGICA V3.0 (AJUSTE DE PÍVOTS)
+    # 7. POSICIÓN Y ROL TÁCTICO (reglas en app/core/rules.py)
     # ==============================================================================
 
-    def estimar_posicion(row):
-        if pd.isna(row.get('P_3PA')): return "Rotación"
-
-        p_ast = row.get('P_AST', 0)      
-        p_reb = row.get('P_REB', 0)      
-        p_3pa = row.get('P_3PA', 0)      
-        rim_freq = row.get('rim_freq', 0)
-
-        # 1. BASE (PG) - Filtro estricto
-        cond_base_puro = (p_ast > 0.80 and p_reb < 0.70)
-        cond_base_bajito = (p_ast > 0.65 and p_reb < 0.50)
-        
-        if (cond_base_puro or cond_base_bajito) and rim_freq < 0.60:
-            return "Base (PG)"
-
-        # 2. INTERIORES Y POINT FORWARDS (La red para los altos)
-        # Subimos el listón: Hay que rebotar MUCHO (Top 28%) o vivir en la zona
-        if p_reb > 0.72 or (p_reb > 0.60 and rim_freq > 0.45):
-            
-            # Point Forward / Center (Jokic/Draymond)
-            if p_ast > 0.65: return "Alero/Generador (Point Fwd)"
-            
-            # Stretch Big (Pívot tirador)
-            if p_3pa > 0.55: return "Ala-Pívot (PF)"
-            
-            # --- FILTRO ANTI-FALSOS PÍVOTS ---
-            # Si has caído aquí es que rebotas, pero no tiras triples ni asistes.
-            # ¿Eres realmente un pívot? Solo si juegas cerca del aro o rebotas una barbaridad.
-            if rim_freq > 0.35 or p_reb > 0.85:
-                return "Pívot (C)"
-            
-            # Si rebotas bien pero juegas por fuera (rim_freq bajo) y no tiras triples...
-            # Eres un Alero físico o un 4 móvil.
-            return "Ala-Pívot (PF)" 
-
-        # 3. EXTERIORES (Wings/Guards) - El resto
-        if p_ast > 0.55: return "Combo Guard (CG)" 
-        if p_reb > 0.55: return "Alero (SF)" 
-        if p_3pa > 0.55: return "Escolta (SG)"
-        
-        return "Exterior (G/F)"
-
-    def definir_rol_dinamico(row):
-        if pd.isna(row['P_USG']): return "Fondo de Armario"
-        
-        p_usg = row['P_USG']
-        p_eff = row['P_EFF']
-        p_def = row['P_DEF']
-        p_3pa = row['P_3PA']
-        p_ast = row['P_AST']
-        pct_3pt_real = row.get('3P%', 0)
-        rim_freq = row.get('rim_freq', 0)
-        corner_freq = row.get('corner_freq', 0)
-
-        # --- NIVEL 1: ELITE & MOTORES ---
-        if p_usg > 0.85 and p_ast > 0.75: return "Motor Ofensivo (Offensive Engine)"
-        if p_ast > 0.90: return "Director de Juego (Floor General)"
-        if p_usg > 0.80 and p_eff > 0.70: return "Anotador Élite (Bucket Getter)"
-
-        # --- NIVEL 2: INTERIORES ---
-        if row['Posicion'] in ["Pívot (C)", "Ala-Pívot (PF)", "Point Center", "Alero/Generador (Point Forward)"]:
-            if p_3pa > 0.65 and pct_3pt_real > 32.0: return "Interior Abierto (Stretch Big)"
-            if p_ast > 0.75: return "Distribuidor desde Poste"
-            if p_def > 0.80: return "Ancla Defensiva (Rim Protector)"
-            if rim_freq > 0.50: return "Finalizador (Rim Runner)"
-
-        # --- NIVEL 3: PERÍMETRO / ESPECIALISTAS ---
-        if p_3pa > 0.75 and pct_3pt_real > 34.0:
-            if p_eff > 0.70: return "Francotirador (Sniper)"
-            return "Tirador de Volumen (Volume Shooter)"
-
-        if p_3pa > 0.60 and pct_3pt_real > 30.0 and p_def > 0.70:
-            if corner_freq > 0.20: return "Especialista de Esquina (3&D)"
-            return "3&D Wing"
-        
-        if rim_freq > 0.40 and p_usg > 0.50: return "Penetrador (Slasher)"
-
-        # --- NIVEL 4: ROLES DE SOPORTE ---
-        if p_ast > 0.70: return "Conector (Connector)"
-        if p_def > 0.70: return "Especialista Defensivo"
-        if p_eff > 0.70: return "Oportunista Eficiente"
-        if p_usg > 0.80: return "Microondas (High Volume)"
-
-        return "Rol de Rotación"
-
-    final_stats['Posicion'] = final_stats.apply(estimar_posicion, axis=1)
-    final_stats['Rol Tactical'] = final_stats.apply(definir_rol_dinamico, axis=1)
+    with stage("classify"):
+        final_stats['Posicion'] = classify(final_stats, POSITION_RULES, POSITION_DEFAULT)
+        final_stats['Rol Tactical'] = classify(final_stats, ROLE_RULES, ROLE_DEFAULT)
 
     # 8. LIMPIEZA FINAL
     final_stats.columns = [
-        'Jugador', 'Equipo', 'Dorsal', 'PJ', 'MPP', 'PPP', 'RPP', 'ROf', 'RDef', 'Rec', 'APP', 
+        'player_pk', 'Jugador', 'Equipo', 'Dorsal', 'PJ', 'MPP', 'PPP', 'RPP', 'ROf', 'RDef', 'Rec', 'APP', 
         'perdidas_mean', 't3_intentados_mean', '3P_pct_real', 'fga_mean', 
         'USG%', 'TS%', 'eFG%', 'GmSc', 'Corner_Freq', 'Rim_Freq',
         'P_USG', 'P_AST', 'P_REB', 'P_3PA', 'P_EFF', 'P_DEF', 'Posicion', 'Rol Tactical'
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+# Percentil -> métrica de temporada sobre la que se calcula
+PERCENTILE_METRICS = {
+    'P_USG': 'USG%',
+    'P_AST': 'asistencias',
+    'P_REB': 'rebotes_total',
+    'P_3PA': 't3_intentados',
+    'P_EFF': 'eFG%',
+    'P_DEF': 'Def_Score',
+}
+
+def def_score(rebotes_def, recuperaciones):
+    """Impacto defensivo: rebote defensivo + robos (que pesan 1.5)."""
+    return rebotes_def + (recuperaciones * 1.5)
+
+class PercentileIndex:
+    """
+    Arrays ordenados de cada métrica del pool de jugadores.
+    Un percentil es una búsqueda binaria (O(log n)) en vez de un rank() de toda la liga.
+    Para jugadores del pool da exactamente lo mismo que Series.rank(pct=True).
+    """
+
+    def __init__(self, sorted_values: dict):
+        self.sorted_values = sorted_values
+
+    @classmethod
+    def from_pool(cls, pool: pd.DataFrame):
+        """El pool debe traer las columnas de PERCENTILE_METRICS (incluida Def_Score)."""
+        sorted_values = {}
+        for p_col, metric in PERCENTILE_METRICS.items():
+            values = pool[metric].to_numpy(dtype=float)
+            sorted_values[p_col] = np.sort(values[~np.isnan(values)])
+        return cls(sorted_values)
+
+    @property
+    def size(self) -> int:
+        return max((len(v) for v in self.sorted_values.values()), default=0)
+
+    def _lookup(self, p_col: str, values, in_pool: bool):
+        arr = self.sorted_values[p_col]
+        values = np.asarray(values, dtype=float)
+        n = len(arr)
+        left = np.searchsorted(arr, values, side='left')
+        right = np.searchsorted(arr, values, side='right')
+        if in_pool:
+            # Rango medio de los empates (method='average'), 1-based, sobre n
+            result = (left + (right - left + 1) / 2) / n if n else np.full(values.shape, np.nan)
+        else:
+            # Como si el valor se añadiera al pool: n + 1 jugadores
+            result = (left + (right - left + 2) / 2) / (n + 1)
+        return np.where(np.isnan(values), np.nan, result)
+
+    def percentiles(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Percentiles (P_USG, P_AST...) de jugadores que forman parte del pool."""
+        return pd.DataFrame(
+            {p_col: self._lookup(p_col, df[metric].to_numpy(), in_pool=True)
+             for p_col, metric in PERCENTILE_METRICS.items()},
+            index=df.index
+        )
+
+    def what_if(self, values: dict) -> dict:
+        """
+        Percentiles de una línea estadística que no está en la BD.
+        `values` usa los nombres de métrica de PERCENTILE_METRICS ('USG%', 'asistencias'...);
+        las que falten salen como None.
+        """
+        result = {}
+        for p_col, metric in PERCENTILE_METRICS.items():
+            value = values.get(metric)
+            result[p_col] = None if value is None else float(self._lookup(p_col, value, in_pool=False))
+        return result
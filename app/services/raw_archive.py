@@ -0,0 +1,49 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from urllib.parse import urlparse
+from app.core.config import settings
+
+# --- ARCHIVO DE RESPUESTAS CRUDAS DE LA FEDERACIÓN ---
+# Cada respuesta JSON (calendario, estadisticas, mapa-de-tiro) se guarda comprimida,
+# con el nombre del hash de la petición que la produjo:
+#   <RAW_ARCHIVE_DIR>/3f/3fa9...e1.json.gz
+# La misma petición siempre cae en el mismo fichero, así que en modo offline
+# (run_ingest.py --from-archive) el scraper pide lo mismo de siempre y lo lee de disco.
+
+# Parámetros que cambian entre sesiones y no identifican la petición
+_VOLATILE_PARAMS = {"key"}
+
+def request_hash(url: str, payload: dict) -> str:
+    """sha256 de endpoint + parámetros (sin la key ni el host: vale contra cualquier servidor)."""
+    params = {k: str(v) for k, v in payload.items() if k not in _VOLATILE_PARAMS}
+    contenido = json.dumps({"endpoint": urlparse(url).path, "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode()).hexdigest()
+
+class RawArchive:
+    def __init__(self, path: str = None):
+        self.path = path or settings.RAW_ARCHIVE_DIR
+
+    def _file(self, digest: str) -> str:
+        return os.path.join(self.path, digest[:2], f"{digest}.json.gz")
+
+    def save(self, url: str, payload: dict, body: bytes) -> str:
+        """Guarda el cuerpo tal cual llegó. Escritura atómica: seguro con varios workers."""
+        digest = request_hash(url, payload)
+        destino = self._file(digest)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        tmp = f"{destino}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(body, compresslevel=6))
+        os.replace(tmp, destino)
+        return digest
+
+    def load(self, url: str, payload: dict):
+        """JSON archivado para esta petición (None si nunca se descargó)."""
+        try:
+            with open(self._file(request_hash(url, payload)), "rb") as f:
+                return json.loads(gzip.decompress(f.read()))
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,132 @@
+import threading
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import stage
+from app.repositories.aggregate_repository import AggregateRepository
+from app.repositories.data_version_repository import DataVersionRepository
+from app.repositories.player_repository import PlayerRepository
+from app.services.analytics import build_advanced_stats, season_means, pool_filter, finalize_advanced_stats
+from app.services.percentiles import PercentileIndex
+from app.services.snapshot import read_snapshot_sums, read_snapshot_version
+
+class VersionedLRUCache:
+    """
+    Caché LRU en memoria cuyas claves empiezan por la versión de datos.
+    Cuando aparece una versión nueva se descartan las entradas de versiones anteriores.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, version: int, key: tuple, compute):
+        full_key = (version,) + key
+        with self._lock:
+            if version != self._version:
+                # Datos nuevos: lo cacheado ya no sirve
+                self._data.clear()
+                self._version = version
+            if full_key in self._data:
+                self._data.move_to_end(full_key)
+                self.hits += 1
+                return self._data[full_key]
+            self.misses += 1
+
+        # Calculamos fuera del lock para no bloquear al resto de peticiones
+        value = compute()
+
+        with self._lock:
+            if version == self._version:
+                self._data[full_key] = value
+                self._data.move_to_end(full_key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "data_version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._version = None
+
+advanced_stats_cache = VersionedLRUCache(maxsize=settings.ADVANCED_STATS_CACHE_SIZE)
+
+def _season_inputs(db: Session):
+    """
+    (versión de datos, función que carga (sumas de jugadores, perfiles de tiro, jugadores)).
+    Con ANALYTICS_SOURCE="snapshot" ambas cosas salen del Parquet (sin BD);
+    si todavía no se ha escrito ningún snapshot se sirve desde la BD.
+    """
+    if settings.ANALYTICS_SOURCE == "snapshot":
+        version = read_snapshot_version()
+        if version is not None:
+            return version, _timed(read_snapshot_sums)
+    repo = AggregateRepository(db)
+    return DataVersionRepository(db).get(), _timed(lambda: (
+        repo.load_player_sums(), repo.load_shot_profiles(), PlayerRepository(db).load_frame()
+    ))
+
+def get_data_version(db: Session):
+    """Versión de datos con la que se calcula la analítica (la de la BD o la del snapshot)."""
+    return _season_inputs(db)[0]
+
+def _timed(load):
+    def run():
+        with stage("load_inputs"):
+            return load()
+    return run
+
+def get_advanced_stats_cached(db: Session, min_games=3, min_minutes=10):
+    """
+    get_advanced_stats servido desde memoria mientras no cambie la versión de datos.
+    OJO: el DataFrame devuelto es compartido, no modificarlo in-place.
+    """
+    version, load_inputs = _season_inputs(db)
+    return advanced_stats_cache.get_or_compute(
+        version,
+        ("advanced", min_games, min_minutes),
+        lambda: build_advanced_stats(*load_inputs(), min_games=min_games, min_minutes=min_minutes)
+    )
+
+def get_percentile_base_cached(db: Session, min_games=1, min_minutes=5):
+    """
+    (medias de temporada de todos los jugadores, índice de percentiles del pool),
+    construido una vez por versión de datos.
+    """
+    version, load_inputs = _season_inputs(db)
+
+    def compute():
+        means = season_means(*load_inputs())
+        if means.empty:
+            return means, None
+        return means, PercentileIndex.from_pool(pool_filter(means, min_games, min_minutes))
+
+    return advanced_stats_cache.get_or_compute(version, ("percentiles", min_games, min_minutes), compute)
+
+def get_player_advanced_stats(db: Session, name: str, team: str = None, min_games=1, min_minutes=5):
+    """
+    Las filas de get_advanced_stats de un jugador (por nombre y, opcionalmente, equipo),
+    con percentiles por búsqueda binaria en vez de clasificar a toda la liga.
+    Devuelve None si no hay datos de temporada.
+    """
+    means, index = get_percentile_base_cached(db, min_games, min_minutes)
+    if means.empty:
+        return None
+    rows = means[means['nombre'].str.lower() == name.lower()]
+    if team:
+        rows = rows[rows['equipo'].str.contains(team, case=False, regex=False)]
+    return finalize_advanced_stats(rows, min_games, min_minutes, percentile_index=index)
@@ -1,20 +1,101 @@
 import requests
 import json
-import time
+import pandas as pd
+import hashlib
+import threading
 import urllib3
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 from sqlalchemy.orm import Session
-from app.models.stats import Game, PlayerStat
 from app.core.config import settings
+from app.core.http import get_http_session
+from app.core.normalization import parse_tiempo_jugado
+from app.core.shot_zones import shot_attributes
 from app.repositories.shot_repository import ShotRepository
+from app.repositories.stats_repository import StatsRepository
+from app.repositories.frame_loader import (
+    PLAYER_STAT_COLUMNS, SHOT_ANALYTICS_COLUMNS, compact_player_stats, compact_shots
+)
+from app.repositories.player_repository import PlayerRepository
+from app.repositories.team_repository import TeamRepository
 from app.schemas.shot import ShotIngest
+from app.repositories.data_version_repository import DataVersionRepository
+from app.repositories.crawl_ledger_repository import CrawlLedgerRepository, ENDPOINT_STATS, ENDPOINT_SHOTS
+from app.services.raw_archive import RawArchive
+from app.services.shot_grid import GRID_SHOT_COLUMNS
+from app.services.season_aggregates import (
+    add_game_stats, remove_game_stats, add_game_shots, remove_game_shots, replace_game_grid
+)
 
 # Desactivar advertencias SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+class _ServerError(Exception):
+    """Respuesta 5xx de la Federación (se reintenta con backoff)."""
+
+def _json_or_none(r):
+    try:
+        return r.json()
+    except ValueError:
+        return None
+
+def _key_caducada(data: dict) -> bool:
+    return "key" in str(data.get("error", "")).lower()
+
+def _clean_id(val) -> str:
+    return str(val or "").replace('"', '').replace("'", "").strip()
+
+def _partidos_terminados(lista_raw):
+    """Partidos con resultado de un calendario en bruto, en el formato que usa la ingesta."""
+    partidos_validos = []
+    for p in lista_raw:
+        estado = p.get("Estado", "")
+        res = p.get("Resultados", {})
+        pts_local = str(res.get("ResultadoLocal", ""))
+        
+        if estado == "Terminado" and pts_local and pts_local != "-" and pts_local != "0":
+            partidos_validos.append({
+                "id": p.get("IdPartido"),
+                "local": p.get("NombreEquipoLocal"),
+                "visitante": p.get("NombreEquipoVisitante"),
+                "fecha": p.get("Fecha"),
+                "jornada": p.get("NumeroJornada")
+            })
+    return partidos_validos
+
+class _Archivada:
+    """Respuesta leída del archivo local (modo offline): imita lo que usamos de requests.Response."""
+    def __init__(self, data):
+        self.status_code = 200 if data is not None else 404
+
+def _payload_hash(data: dict) -> str:
+    """sha256 estable de una respuesta (sin la key, que cambia en cada sesión)."""
+    contenido = {k: v for k, v in data.items() if k != "key"}
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+class SessionKey:
+    """
+    Key de sesión de la Federación con su lock. Varios ScraperService pueden compartirla
+    (un servicio por hilo en run_crawler): cuando caduca, un solo login la renueva para todos.
+    """
+    def __init__(self):
+        self.value = ""
+        self.lock = threading.Lock()
+
+
 class ScraperService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, rate_limiter=None, archive: RawArchive = None, offline: bool = False,
+                 session_key: SessionKey = None):
         self.db = db
+        self.http = get_http_session() # Pool compartido (keep-alive)
+        self.rate_limiter = rate_limiter # TokenBucket opcional (crawler)
+        # Archivo de respuestas crudas: se escribe en cada descarga y, con offline=True,
+        # es la única fuente (sin red, sin login, sin límite de peticiones)
+        self.offline = offline
+        if archive is None and (offline or settings.RAW_ARCHIVE_ENABLED):
+            archive = RawArchive()
+        self.archive = archive
         self.headers = {
             "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
             "Accept": "application/json",
@@ -37,10 +118,108 @@ class ScraperService:
         self.push_token = clean(settings.FBPA_PUSH_TOKEN)
         self.app_version = clean(settings.FBPA_APP_VERSION)
         
-        self.key = "" 
+        # Varios hilos pueden compartir este servicio (get_league_calendar) o su key (session_key,
+        # run_crawler): la key se renueva con el lock de la SessionKey
+        self.session_key = session_key if session_key is not None else SessionKey()
+        self._key_lock = self.session_key.lock
+
+        # Nombre crudo del equipo -> (team_pk, nombre canónico), resuelto una vez por proceso
+        self._equipos = {}
 
         print(f"🔧 Configuración cargada: Fase='{self.id_fase}', Grupo='{self.id_grupo}'")
 
+    @property
+    def key(self) -> str:
+        return self.session_key.value
+
+    @key.setter
+    def key(self, value: str):
+        self.session_key.value = value
+
+    def _resolve_team(self, nombre_equipo):
+        """Equipo canónico de un nombre de la Federación (tabla team_aliases, memoizado)."""
+        if nombre_equipo not in self._equipos:
+            self._equipos[nombre_equipo] = TeamRepository(self.db).resolve(nombre_equipo)
+        return self._equipos[nombre_equipo]
+
+    def is_game_finalized(self, game_id: str) -> bool:
+        """El partido ya se guardó FINALIZADO (boxscore y tiros): no hace falta volver a pedirlo."""
+        return CrawlLedgerRepository(self.db).is_finalized(game_id)
+
+    def _unchanged(self, game_id: str, endpoint: str, payload_hash: str) -> bool:
+        """La respuesta es idéntica a la última guardada: solo se apunta la fecha de descarga."""
+        ledger = CrawlLedgerRepository(self.db)
+        if ledger.get_hash(game_id, endpoint) != payload_hash:
+            return False
+        ledger.record(game_id, endpoint, payload_hash)
+        return True
+
+    def _commit(self, changed: bool = True):
+        """Commit de ingesta: si hubo cambios sube la versión de datos para invalidar las cachés de la API."""
+        if changed:
+            DataVersionRepository(self.db).bump()
+        self.db.commit()
+
+    def _send(self, url, payload_dict, timeout):
+        """
+        POST (y GET si el POST da 4xx, como ha hecho siempre el scraper).
+        5xx, timeouts y errores de conexión se reintentan con backoff exponencial + jitter.
+        """
+        for attempt in Retrying(
+            retry=retry_if_exception_type((requests.Timeout, requests.ConnectionError, _ServerError)),
+            wait=wait_exponential_jitter(initial=0.5, max=settings.HTTP_BACKOFF_MAX),
+            stop=stop_after_attempt(settings.HTTP_MAX_ATTEMPTS),
+            reraise=True,
+        ):
+            with attempt:
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
+                r = self.http.post(url, data=urlencode(payload_dict), headers=self.headers, verify=False, timeout=timeout)
+                if 400 <= r.status_code < 500:
+                    r = self.http.get(url, params=payload_dict, headers=self.headers, verify=False, timeout=timeout)
+                if r.status_code >= 500:
+                    raise _ServerError(f"HTTP {r.status_code} en {url}")
+        return r
+
+    def _request(self, url, payload_dict, timeout=10):
+        """
+        Petición autenticada a cualquier endpoint: devuelve (respuesta, JSON o None si no es JSON).
+        Si la Federación responde que la key ha caducado, se hace login y se repite una vez.
+        Las respuestas correctas se guardan en el archivo crudo; en modo offline se leen de ahí.
+        """
+        if self.offline:
+            data = self.archive.load(url, payload_dict)
+            return _Archivada(data), data
+
+        key_enviada = self.key
+        payload_dict = dict(payload_dict, key=key_enviada)
+        r = self._send(url, payload_dict, timeout)
+        data = _json_or_none(r)
+
+        if data is not None and data.get("resultado") != "correcto" and _key_caducada(data):
+            if self._refresh_key(key_enviada):
+                payload_dict["key"] = self.key
+                r = self._send(url, payload_dict, timeout)
+                data = _json_or_none(r)
+
+        if data is not None and data.get("key"):
+            with self._key_lock:
+                self.key = data.get("key")
+        if self.archive is not None and data is not None and data.get("resultado") == "correcto":
+            self.archive.save(url, payload_dict, r.content)
+        return r, data
+
+    def _refresh_key(self, key_caducada: str) -> bool:
+        """
+        Login tras una key caducada. Si varios hilos la ven caducar a la vez, solo el primero
+        hace login: los demás encuentran la key ya renovada y la reutilizan.
+        """
+        with self._key_lock:
+            if self.key != key_caducada:
+                return True
+            print("   🔄 Key caducada, reintentando login...")
+            return self.login()
+
     def login(self):
         """
         Login usando credenciales desde variables de entorno.
@@ -55,16 +234,13 @@ class ScraperService:
             "version": self.app_version      # <-- VARIABLE
         }
         
-        body_str = urlencode(payload)
-        
         try:
             print("🔑 Autenticando en Gesdeportiva...")
             # Usamos la URL desde variable de entorno
-            r = requests.post(self.login_url, data=body_str, headers=self.headers, verify=False, timeout=15)
+            r = self._send(self.login_url, payload, timeout=15)
             
-            try:
-                data = r.json()
-            except:
+            data = _json_or_none(r)
+            if data is None:
                 print(f"❌ Error Login: Respuesta no JSON (Status {r.status_code})")
                 return False
 
@@ -80,77 +256,50 @@ class ScraperService:
             print(f"⚠️ Excepción en Login: {e}")
             return False
 
-    def get_calendar_from_team(self, id_equipo_hash):
-        id_equipo_hash = str(id_equipo_hash).replace('"', '').replace("'", "").strip()
+    def _fetch_calendar(self, id_equipo_hash):
+        """JSON del calendario de un equipo (None si no es JSON)."""
         url = f"{self.base_url}/equipo.ashx"        
         
         payload_dict = {
             "accion": "horariosJornadas", 
             "id_equipo": id_equipo_hash,
             "id_dispositivo": self.id_dispositivo,
-            "key": self.key,
             "id_fase": self.id_fase,
             "id_grupo": self.id_grupo,
             "id_ronda": "",
             "fecha_inicial": "2025-09-01 00:00",
             "fecha_final": "2026-06-30 23:59"
         }
-        
-        payload_str = urlencode(payload_dict)
+        r, data = self._request(url, payload_dict, timeout=15)
+
+        if data is None:
+            print(f"❌ Error Calendario: No JSON. Status: {r.status_code}")
+        return data
+
+    def get_calendar_from_team(self, id_equipo_hash):
+        id_equipo_hash = _clean_id(id_equipo_hash)
         
         try:
-            print(f"🔄 Consultando calendario...")
-            r = requests.post(url, data=payload_str, headers=self.headers, verify=False, timeout=15)
-            
-            if r.status_code >= 400:
-                 r = requests.get(url, params=payload_dict, headers=self.headers, verify=False, timeout=15)
+            print("🔄 Consultando calendario...")
+            data = self._fetch_calendar(id_equipo_hash)
 
-            try:
-                data = r.json()
-            except:
-                print(f"❌ Error Calendario: No JSON. Status: {r.status_code}")
+            if data is None:
                 return []
             
-            print(f"🔍 DEBUG API CALENDARIO:")
+            print("🔍 DEBUG API CALENDARIO:")
             print(f"   - IDs enviados: Fase='{self.id_fase[:5]}...', Grupo='{self.id_grupo[:5]}...', Equipo='{id_equipo_hash[:5]}...'")
             lista_raw = data.get("partidos", [])
             print(f"   - Partidos en bruto recibidos: {len(lista_raw)}")
             if len(lista_raw) > 0:
                 print(f"   - Ejemplo estado partido 1: {lista_raw[0].get('Estado')} | Local: {lista_raw[0].get('Resultados', {}).get('ResultadoLocal')}")
             else:
-                print(f"   - La API devolvió lista vacía. Revisa FASE y GRUPO.")
+                print("   - La API devolvió lista vacía. Revisa FASE y GRUPO.")
             
             if data.get("resultado") != "correcto":
-                 # Reintento de login si la key caducó
-                 if "key" in str(data.get("error", "")).lower():
-                     print("   🔄 Key caducada, reintentando login...")
-                     if self.login():
-                         payload_dict["key"] = self.key
-                         payload_str = urlencode(payload_dict)
-                         return self.get_calendar_from_team(id_equipo_hash)
-                 
                  print(f"❌ Error API Calendario: {data.get('error')}")
                  return []
-            
-            if data.get("key"): self.key = data.get("key")
 
-            lista_raw = data.get("partidos", [])
-            partidos_validos = []
-            
-            for p in lista_raw:
-                estado = p.get("Estado", "")
-                res = p.get("Resultados", {})
-                pts_local = str(res.get("ResultadoLocal", ""))
-                
-                if estado == "Terminado" and pts_local and pts_local != "-" and pts_local != "0":
-                    partidos_validos.append({
-                        "id": p.get("IdPartido"),
-                        "local": p.get("NombreEquipoLocal"),
-                        "visitante": p.get("NombreEquipoVisitante"),
-                        "fecha": p.get("Fecha"),
-                        "jornada": p.get("NumeroJornada")
-                    })
-            
+            partidos_validos = _partidos_terminados(data.get("partidos", []))
             print(f"✅ Partidos listos: {len(partidos_validos)}")
             return partidos_validos
 
@@ -158,155 +307,289 @@ class ScraperService:
             print(f"❌ Error crítico en calendario: {e}")
             return []
 
-    def ingest_game_statistics(self, game_metadata):
-        game_hash = game_metadata["id"]
-        url = "https://appaficionfbpa.indalweb.net/v2/envivo/estadisticas.ashx"
-        
+    def _league_calendar_page(self, id_equipo_hash):
+        """Partidos en bruto de un equipo para el recorrido de la liga ([] si falla)."""
+        try:
+            data = self._fetch_calendar(id_equipo_hash)
+        except Exception as e:
+            print(f"   ⚠️ Calendario de {id_equipo_hash[:10]}... no disponible: {e}")
+            return []
+        if data is None or data.get("resultado") != "correcto":
+            return []
+        return data.get("partidos", [])
+
+    def get_league_calendar(self, id_equipo_inicial, workers: int = 4):
+        """
+        Partidos terminados de TODOS los equipos de la fase/grupo, cada uno una sola vez.
+        No hay endpoint con la lista de equipos: se recorre en anchura desde un equipo,
+        sacando los rivales de IdEquipoLocal / IdEquipoVisitante de cada calendario.
+        Los calendarios de cada nivel se piden en paralelo.
+        Los hilos comparten este ScraperService a propósito: la key (un solo re-login, ver _refresh_key)
+        y la sesión HTTP del proceso, de la que solo se usa el pool de urllib3, seguro entre hilos
+        (cabeceras y parámetros van en cada petición; la sesión no se modifica).
+        Devuelve (partidos, nº de equipos).
+        """
+        inicial = _clean_id(id_equipo_inicial)
+        equipos = {inicial}
+        pendientes = [inicial]
+        partidos = {} # IdPartido -> partido (cada partido sale en dos calendarios)
+
+        print("🔄 Recorriendo los calendarios de la liga...")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            while pendientes:
+                nuevos = []
+                for lista_raw in pool.map(self._league_calendar_page, pendientes):
+                    for p in lista_raw:
+                        for id_equipo in (p.get("IdEquipoLocal"), p.get("IdEquipoVisitante")):
+                            id_equipo = _clean_id(id_equipo)
+                            if id_equipo and id_equipo not in equipos:
+                                equipos.add(id_equipo)
+                                nuevos.append(id_equipo)
+                    for partido in _partidos_terminados(lista_raw):
+                        partidos.setdefault(partido["id"], partido)
+                pendientes = nuevos
+
+        print(f"✅ Liga: {len(equipos)} equipos, {len(partidos)} partidos terminados distintos")
+        return list(partidos.values()), len(equipos)
+
+    # --- DESCARGA ---
+
+    def _fetch_stats(self, game_id: str):
+        """JSON del boxscore (None si la Federación no lo devuelve)."""
+        url = f"{self.base_url}/envivo/estadisticas.ashx"
         payload_dict = {
             "id_dispositivo": self.id_dispositivo,
-            "key": self.key,
-            "id_partido": game_hash,
+            "id_partido": game_id,
             "id_fase": self.id_fase,
             "id_grupo": self.id_grupo
         }
-        payload_str = urlencode(payload_dict)
+        r, data = self._request(url, payload_dict)
+
+        if data is None:
+            print(f"   ⚠️ Error Stats: Respuesta no JSON (Status {r.status_code})")
+            return None
+        if data.get("resultado") != "correcto":
+            print(f"   ⚠️ API Error (Stats): {data.get('error')}")
+            return None
+        return data
 
+    def _fetch_shots(self, game_id: str):
+        """JSON del mapa de tiro (None si la Federación no lo devuelve)."""
+        url = f"{self.base_url}/envivo/mapa-de-tiro.ashx"
+        payload_dict = {
+            "id_dispositivo": self.id_dispositivo,
+            "id_partido": game_id
+        }
+        r, data = self._request(url, payload_dict)
+
+        if data is None:
+            print("   ⚠️ Error ShotChart: Respuesta no JSON")
+            return None
+        if data.get("resultado") != "correcto":
+            print(f"   ⚠️ Error API ShotChart: {data.get('error')}")
+            return None
+        return data
+
+    # --- ESCRITURA (Core, multi-fila, sin commit) ---
+
+    def _write_stats(self, game_metadata, data, force: bool = False) -> bool:
+        """
+        Upsert del partido y de su boxscore por clave natural.
+        Devuelve False si la respuesta no había cambiado (solo se apunta en crawl_ledger).
+        """
+        game_hash = game_metadata["id"]
+        stats_repo = StatsRepository(self.db)
+        existing = stats_repo.game_exists(game_hash)
+        payload_hash = _payload_hash(data)
+        if existing and not force and self._unchanged(game_hash, ENDPOINT_STATS, payload_hash):
+            print("   ⏭️ Boxscore sin cambios")
+            return False
+
+        if existing:
+            # Restamos su contribución a los agregados antes de reescribirlo
+            remove_game_stats(self.db, game_hash)
+
+        info = data["partido"]
         try:
-            r = requests.post(url, data=payload_str, headers=self.headers, verify=False, timeout=10)
-            if r.status_code >= 400:
-                 r = requests.get(url, params=payload_dict, headers=self.headers, verify=False, timeout=10)
+            pl = int(info.get("tanteo_local", 0))
+            pv = int(info.get("tanteo_visitante", 0))
+        except:
+            pl, pv = 0, 0
 
-            data = r.json()
+        stats_repo.upsert_game({
+            "id": game_hash,
+            "jornada": str(game_metadata["jornada"]),
+            "fecha": game_metadata["fecha"],
+            "equipo_local": info["local"],
+            "equipo_visitante": info["visitante"],
+            "puntos_local": pl,
+            "puntos_visitante": pv,
+            "estado": info["estado_partido"]
+        })
 
-            if data.get("resultado") != "correcto":
-                print(f"   ⚠️ API Error (Stats): {data.get('error')}")
-                return False
+        stats_root = data["estadisticas"]
+        plantillas = [
+            (stats_root.get(key_nombre), [j for j in stats_root.get(key_lista, []) if j["nombre"] != "TOTALES"])
+            for key_lista, key_nombre in [("estadisticasequipolocal", "equipolocal"), ("estadisticasequipovisitante", "equipovisitante")]
+        ]
 
-            existing = self.db.query(Game).filter(Game.id == game_hash).first()
-            if existing:
-                self.db.delete(existing)
-                self.db.commit()
-
-            info = data["partido"]
-            try:
-                pl = int(info.get("tanteo_local", 0))
-                pv = int(info.get("tanteo_visitante", 0))
-            except:
-                pl, pv = 0, 0
-
-            new_game = Game(
-                id=game_hash,
-                jornada=str(game_metadata["jornada"]),
-                fecha=game_metadata["fecha"],
-                equipo_local=info["local"],
-                equipo_visitante=info["visitante"],
-                puntos_local=pl,
-                puntos_visitante=pv,
-                estado=info["estado_partido"]
-            )
-            self.db.add(new_game)
-            
-            stats_root = data["estadisticas"]
-            for key_lista, key_nombre in [("estadisticasequipolocal", "equipolocal"), ("estadisticasequipovisitante", "equipovisitante")]:
-                nombre_equipo = stats_root.get(key_nombre)
-                jugadores = stats_root.get(key_lista, [])
-
-                for j in jugadores:
-                    if j["nombre"] == "TOTALES": continue
-                    
-                    p_stat = PlayerStat(
-                        game_id=game_hash,
-                        equipo=nombre_equipo,
-                        nombre=j.get("nombre"),
-                        dorsal=j.get("dorsal"),
-                        es_titular=j.get("quintetotitular", False),
-                        minutos=j.get("tiempo_jugado", "00:00"),
-                        puntos=j.get("puntos", 0),
-                        valoracion=j.get("valoracion", 0),
-                        mas_menos=j.get("masMenos", 0),
-                        rebotes_total=j.get("rebotes", 0),
-                        rebotes_def=j.get("rebotedefensivo", 0),
-                        rebotes_of=j.get("reboteofensivo", 0),
-                        asistencias=j.get("asistencias", 0),
-                        perdidas=j.get("perdidas", 0),
-                        recuperaciones=j.get("recuperaciones", 0),
-                        t1_anotados=j.get("canasta1p", 0),
-                        t1_intentados=j.get("tiro1p", 0),
-                        t2_anotados=j.get("canasta2p", 0),
-                        t2_intentados=j.get("tiro2p", 0),
-                        t3_anotados=j.get("canasta3p", 0),
-                        t3_intentados=j.get("tiro3p", 0),
-                        faltas_cometidas=j.get("faltascometidas", 0),
-                        faltas_recibidas=j.get("faltasrecibidas", 0)
-                    )
-                    self.db.add(p_stat)
-            
-            self.db.commit()
+        # Claves enteras de equipo y jugador (nombre + equipo canónico), creando los nuevos
+        equipos = {nombre_equipo: self._resolve_team(nombre_equipo) for nombre_equipo, _ in plantillas}
+        player_pks = PlayerRepository(self.db).resolve_many(
+            [(j.get("nombre") or "", equipos[nombre_equipo][1]) for nombre_equipo, jugadores in plantillas for j in jugadores],
+            team_pks={canonico: team_pk for team_pk, canonico in equipos.values()}
+        )
+
+        rows = {}
+        for nombre_equipo, jugadores in plantillas:
+            team_pk, canonico = equipos[nombre_equipo]
+            for j in jugadores:
+                tiempo_jugado = j.get("tiempo_jugado", "00:00")
+                player_pk = player_pks[(j.get("nombre") or "", canonico)]
+                # Clave natural (game_id, player_pk): si el acta repite jugador, manda la última fila
+                rows[player_pk] = {
+                    "game_id": game_hash,
+                    "player_pk": player_pk,
+                    "team_pk": team_pk,
+                    "equipo": nombre_equipo,
+                    "nombre": j.get("nombre"),
+                    "dorsal": j.get("dorsal"),
+                    "es_titular": j.get("quintetotitular", False),
+                    "minutos": tiempo_jugado,
+                    "segundos_jugados": parse_tiempo_jugado(tiempo_jugado),
+                    "puntos": j.get("puntos", 0),
+                    "valoracion": j.get("valoracion", 0),
+                    "mas_menos": j.get("masMenos", 0),
+                    "rebotes_total": j.get("rebotes", 0),
+                    "rebotes_def": j.get("rebotedefensivo", 0),
+                    "rebotes_of": j.get("reboteofensivo", 0),
+                    "asistencias": j.get("asistencias", 0),
+                    "perdidas": j.get("perdidas", 0),
+                    "recuperaciones": j.get("recuperaciones", 0),
+                    "t1_anotados": j.get("canasta1p", 0),
+                    "t1_intentados": j.get("tiro1p", 0),
+                    "t2_anotados": j.get("canasta2p", 0),
+                    "t2_intentados": j.get("tiro2p", 0),
+                    "t3_anotados": j.get("canasta3p", 0),
+                    "t3_intentados": j.get("tiro3p", 0),
+                    "faltas_cometidas": j.get("faltascometidas", 0),
+                    "faltas_recibidas": j.get("faltasrecibidas", 0)
+                }
+        rows = list(rows.values())
+        stats_repo.replace_player_stats(game_hash, rows)
+
+        # Agregados de temporada con las filas que acabamos de escribir (sin releerlas)
+        add_game_stats(self.db, game_hash, rows=compact_player_stats(pd.DataFrame(rows, columns=PLAYER_STAT_COLUMNS)))
+        CrawlLedgerRepository(self.db).record(game_hash, ENDPOINT_STATS, payload_hash, info["estado_partido"])
+        return True
+
+    def _write_shots(self, game_id: str, data, force: bool = False) -> bool:
+        """
+        Upsert de los tiros por (game_id, seq), ya atribuidos a jugadores.
+        Devuelve False si la respuesta no había cambiado.
+        """
+        payload_hash = _payload_hash(data)
+        if not force and self._unchanged(game_id, ENDPOINT_SHOTS, payload_hash):
+            print("   ⏭️ Mapa de tiro sin cambios")
+            return False
+
+        # Restamos los tiros viejos de los agregados antes de reescribirlos
+        remove_game_shots(self.db, game_id)
+
+        # Filas planas para el INSERT (sin un objeto Pydantic/ORM por tiro)
+        rows = [
+            {
+                "game_id": game_id,
+                "seq": seq,
+                "team_id": int(s["equipo_id"]),
+                "player_id": str(s["componente_id"]),
+                "dorsal": str(s["dorsal"]),
+                "period": int(s["numero_periodo"]),
+                "action_type": s["accion_tipo"],
+                "x": ShotIngest.clean_percentage(s["posicion_x"]), # "13.88%" -> 13.88
+                "y": ShotIngest.clean_percentage(s["posicion_y"]),
+                "zone": s["zona"],
+                "is_made": bool(int(s["metido"])),
+                **shot_attributes(s["accion_tipo"], s["zona"]),
+            }
+            for seq, s in enumerate(data.get("mapadetiro", {}).get("tiros", []))
+        ]
+
+        # Atribución a jugadores: componente_id conocido o equipo + dorsal del boxscore
+        player_pks = PlayerRepository(self.db).attribute_shots(
+            game_id, [(r["team_id"], r["player_id"], r["dorsal"]) for r in rows]
+        )
+        for row, player_pk in zip(rows, player_pks):
+            row["player_pk"] = player_pk
+
+        count = ShotRepository(self.db).replace_game_shots(game_id, rows)
+        add_game_shots(self.db, game_id, shots=compact_shots(pd.DataFrame(rows, columns=SHOT_ANALYTICS_COLUMNS)))
+        replace_game_grid(self.db, game_id, shots=pd.DataFrame(rows, columns=GRID_SHOT_COLUMNS))
+        CrawlLedgerRepository(self.db).record(game_id, ENDPOINT_SHOTS, payload_hash)
+        if count > 0:
+            print(f"   🎯 {count} tiros guardados.")
+        return True
+
+    # --- INGESTA ---
+
+    def ingest_game(self, game_metadata, force: bool = False):
+        """
+        Boxscore + mapa de tiro de un partido en UNA transacción: el partido nunca
+        queda borrado a medias. Devuelve (stats_ok, shots_ok).
+        """
+        game_id = str(game_metadata["id"]).strip()
+        try:
+            stats = self._fetch_stats(game_id)
+        except Exception as e:
+            print(f"❌ Error descargando stats: {e}")
+            return False, False
+        if stats is None:
+            return False, False
+
+        try:
+            shots = self._fetch_shots(game_id)
+        except Exception as e:
+            print(f"❌ Excepción en ShotChart: {e}")
+            shots = None
+
+        try:
+            changed = self._write_stats(game_metadata, stats, force)
+            if shots is not None:
+                changed = self._write_shots(game_id, shots, force) or changed
+            self._commit(changed)
+            return True, shots is not None
+        except Exception as e:
+            self.db.rollback()
+            self._equipos.clear() # Pueden ser equipos creados en la transacción deshecha
+            print(f"❌ Error guardando partido: {e}")
+            return False, False
+
+    def ingest_game_statistics(self, game_metadata, force: bool = False):
+        """Solo el boxscore. Si la respuesta no cambió desde la última vez (y no hay force) no se reescribe."""
+        try:
+            data = self._fetch_stats(game_metadata["id"])
+            if data is None:
+                return False
+            self._commit(self._write_stats(game_metadata, data, force))
             return True
 
         except Exception as e:
             self.db.rollback()
+            self._equipos.clear() # Pueden ser equipos creados en la transacción deshecha
             print(f"❌ Error guardando stats: {e}")
             return False
         
-    def ingest_shot_chart(self, game_id: str):
+    def ingest_shot_chart(self, game_id: str, force: bool = False):
+        """Solo el mapa de tiro. Si la respuesta no cambió desde la última vez (y no hay force) no se reescribe."""
         game_id = str(game_id).strip()
-        url = f"{self.base_url}/envivo/mapa-de-tiro.ashx"
-        
-        payload_dict = {
-            "id_dispositivo": self.id_dispositivo,
-            "key": self.key,
-            "id_partido": game_id
-        }
-        payload_str = urlencode(payload_dict)
-
         try:
-            r = requests.post(url, data=payload_str, headers=self.headers, verify=False, timeout=10)
-            if r.status_code >= 400:
-                 time.sleep(0.5)
-                 r = requests.get(url, params=payload_dict, headers=self.headers, verify=False, timeout=10)
-
-            try:
-                data = r.json()
-            except:
-                print(f"   ⚠️ Error ShotChart: Respuesta no JSON")
+            data = self._fetch_shots(game_id)
+            if data is None:
                 return False
-
-            if data.get("resultado") != "correcto":
-                print(f"   ⚠️ Error API ShotChart: {data.get('error')}")
-                return False
-
-            shots_raw = data.get("mapadetiro", {}).get("tiros", [])
-            
-            from app.models.shot import Shot
-            self.db.query(Shot).filter(Shot.game_id == game_id).delete()
-            self.db.commit()
-            
-            if not shots_raw:
-                return True 
-
-            shots_to_ingest = []
-            for s in shots_raw:
-                shots_to_ingest.append(ShotIngest(
-                    equipo_id=s["equipo_id"],
-                    componente_id=s["componente_id"],
-                    dorsal=s["dorsal"],
-                    numero_periodo=s["numero_periodo"],
-                    accion_tipo=s["accion_tipo"],
-                    zona=s["zona"],
-                    metido=s["metido"],
-                    fallado=s["fallado"],
-                    posicion_x=s["posicion_x"],
-                    posicion_y=s["posicion_y"]
-                ))
-
-            shot_repo = ShotRepository(self.db)
-            count = shot_repo.create_batch(game_id, shots_to_ingest)
-            if count > 0:
-                print(f"   🎯 {count} tiros guardados.")
+            self._commit(self._write_shots(game_id, data, force))
             return True
 
         except Exception as e:
             self.db.rollback() 
             print(f"❌ Excepción en ShotChart: {e}")
-            return False
\ No newline at end of file
+            return False
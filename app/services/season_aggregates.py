@@ -0,0 +1,79 @@
+from sqlalchemy.orm import Session
+from app.repositories.aggregate_repository import AggregateRepository
+from app.repositories.data_version_repository import DataVersionRepository
+from app.repositories.frame_loader import read_shots
+from app.services.analytics import (
+    compute_game_metrics, compute_team_totals, compute_season_sums, compute_shot_profiles,
+    season_sums_from_sql, team_totals_from_sql
+)
+from app.services.shot_grid import GRID_SHOT_COLUMNS, grid_cells
+
+# Mantenimiento incremental de los agregados de temporada.
+# Ninguna función hace commit: van dentro de la transacción de la ingesta.
+
+def add_game_stats(db: Session, game_id: str, sign: int = 1, rows=None):
+    """
+    Suma (o resta, con sign=-1) la contribución del boxscore de un partido.
+    `rows` (opcional): las filas recién escritas, para no volver a leerlas de la BD.
+    """
+    repo = AggregateRepository(db)
+    if rows is None:
+        rows = repo.load_player_rows(game_id)
+    if rows.empty:
+        return
+
+    metrics = compute_game_metrics(rows)
+    repo.add_player_sums(compute_season_sums(metrics), sign=sign)
+
+    if sign > 0:
+        repo.replace_team_totals(game_id, compute_team_totals(metrics))
+    else:
+        repo.delete_team_totals(game_id)
+
+def remove_game_stats(db: Session, game_id: str):
+    """Llamar ANTES de reescribir las filas del partido."""
+    add_game_stats(db, game_id, sign=-1)
+
+def add_game_shots(db: Session, game_id: str, sign: int = 1, shots=None):
+    repo = AggregateRepository(db)
+    if shots is None:
+        shots = repo.load_shot_rows(game_id)
+    if shots.empty:
+        return
+    repo.add_shot_profiles(compute_shot_profiles(shots), sign=sign)
+
+def remove_game_shots(db: Session, game_id: str):
+    """Llamar ANTES de reescribir los tiros del partido."""
+    add_game_shots(db, game_id, sign=-1)
+
+def replace_game_grid(db: Session, game_id: str, shots=None):
+    """
+    Rejilla del mapa de calor del partido (se reescribe entera: no es un contador).
+    `shots` (opcional): los tiros recién escritos, con las columnas de GRID_SHOT_COLUMNS.
+    """
+    if shots is None:
+        shots = read_shots(db.connection(), game_id, columns=GRID_SHOT_COLUMNS)
+    AggregateRepository(db).replace_shot_grid(game_id, grid_cells(shots))
+
+def rebuild_season_aggregates(db: Session):
+    """
+    Recalcula todos los agregados desde las tablas crudas (backfill / reparación).
+    Las sumas se hacen en la BD: no se descargan las filas de player_stats ni de shots.
+    """
+    repo = AggregateRepository(db)
+    repo.clear()
+
+    sums = season_sums_from_sql(db)
+    if not sums.empty:
+        repo.add_player_sums(sums)
+        repo.insert_team_totals(team_totals_from_sql(db))
+
+    shots = repo.sql_shot_profiles()
+    if not shots.empty:
+        repo.add_shot_profiles(shots)
+
+    # Rejillas de los mapas de calor: se agrupan en NumPy (solo coordenadas y resultado de cada tiro)
+    repo.insert_shot_grid(grid_cells(read_shots(db.connection(), columns=GRID_SHOT_COLUMNS)))
+
+    DataVersionRepository(db).bump()
+    db.commit()
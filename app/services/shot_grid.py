@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+# --- MAPAS DE CALOR DE TIRO ---
+# Los tiros se agrupan en una rejilla fija de media pista (GRID_ROWS x GRID_COLS celdas):
+# la respuesta de la API mide lo mismo tenga el jugador 10 tiros o 10.000.
+# Coordenadas de la Federación: x, y en % de la pista completa. Se pliegan a media pista igual
+# que las pintaba el dashboard: ancho = y, fondo (desde la línea de fondo) = min(x, 100 - x) * 2.
+# Las rejillas por partido y jugador se guardan en shot_grid_cells y se combinan sumando.
+
+GRID_COLS = 20
+GRID_ROWS = 20
+CELLS = GRID_COLS * GRID_ROWS
+
+# Columnas de shots que necesita la rejilla
+GRID_SHOT_COLUMNS = ['game_id', 'player_pk', 'x', 'y', 'is_made']
+
+def cell_index(x, y) -> np.ndarray:
+    """Celda (fila * GRID_COLS + columna) de cada tiro; los que se salen van a la celda del borde."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    ancho = y
+    fondo = np.minimum(x, 100 - x) * 2
+    col = np.clip(np.floor(ancho / 100 * GRID_COLS), 0, GRID_COLS - 1).astype(np.int32)
+    row = np.clip(np.floor(fondo / 100 * GRID_ROWS), 0, GRID_ROWS - 1).astype(np.int32)
+    return row * GRID_COLS + col
+
+def grid_cells(shots: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tiros -> (game_id, player_pk, cell, attempts, makes): solo las celdas con tiros.
+    player_pk 0 = tiro sin atribuir (cuenta para el partido, no para jugador ni equipo).
+    """
+    columnas = ['game_id', 'player_pk', 'cell', 'attempts', 'makes']
+    if shots.empty:
+        return pd.DataFrame(columns=columnas)
+    df = pd.DataFrame({
+        'game_id': shots['game_id'].astype(str).to_numpy(),
+        'player_pk': shots['player_pk'].fillna(0).astype(np.int64).to_numpy(),
+        'cell': cell_index(shots['x'].to_numpy(), shots['y'].to_numpy()),
+        'makes': shots['is_made'].fillna(False).astype(np.int64).to_numpy(),
+    })
+    grouped = df.groupby(['game_id', 'player_pk', 'cell'], sort=False)['makes'].agg(['size', 'sum'])
+    grouped = grouped.reset_index().rename(columns={'size': 'attempts', 'sum': 'makes'})
+    return grouped[columnas]
+
+def dense_grid(cells: pd.DataFrame):
+    """Celdas sueltas (cell, attempts, makes) -> matrices (GRID_ROWS, GRID_COLS) de intentos y aciertos."""
+    if cells.empty:
+        vacio = np.zeros((GRID_ROWS, GRID_COLS), dtype=np.int64)
+        return vacio, vacio.copy()
+    cell = cells['cell'].to_numpy(dtype=np.int64)
+    attempts = np.bincount(cell, weights=cells['attempts'].to_numpy(dtype=np.float64), minlength=CELLS)
+    makes = np.bincount(cell, weights=cells['makes'].to_numpy(dtype=np.float64), minlength=CELLS)
+    return (attempts.astype(np.int64).reshape(GRID_ROWS, GRID_COLS),
+            makes.astype(np.int64).reshape(GRID_ROWS, GRID_COLS))
+
+def heatmap_payload(attempts: np.ndarray, makes: np.ndarray) -> dict:
+    """Respuesta de la API: matrices por filas (fila 0 = junto a la línea de fondo) y FG% por celda."""
+    fg = np.divide(makes * 100.0, attempts, out=np.zeros(attempts.shape), where=attempts > 0)
+    fg_pct = [[round(float(v), 1) if n else None for v, n in zip(fila, filas_n)] for fila, filas_n in zip(fg, attempts)]
+    return {
+        "rows": GRID_ROWS,
+        "cols": GRID_COLS,
+        "cell_size": 100 / GRID_COLS,
+        "total_attempts": int(attempts.sum()),
+        "total_makes": int(makes.sum()),
+        "attempts": attempts.tolist(),
+        "makes": makes.tolist(),
+        "fg_pct": fg_pct,
+    }
@@ -0,0 +1,120 @@
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.stats import Game, PlayerStat
+from app.models.shot import Shot
+from app.models.player import Player
+from app.repositories.data_version_repository import DataVersionRepository
+from app.repositories.frame_loader import (
+    PLAYER_STAT_COLUMNS, SHOT_ANALYTICS_COLUMNS, compact_player_stats, compact_shots
+)
+from app.services.analytics import (
+    build_advanced_stats, compute_game_metrics, compute_season_sums, compute_shot_profiles
+)
+
+# --- SNAPSHOT COLUMNAR DE LA TEMPORADA (PARQUET) ---
+# Estructura en disco (particionado hive por jornada):
+#   <SNAPSHOT_DIR>/games/jornada=7/part-0.parquet
+#   <SNAPSHOT_DIR>/player_stats/jornada=7/part-0.parquet
+#   <SNAPSHOT_DIR>/shots/jornada=7/part-0.parquet
+#   <SNAPSHOT_DIR>/players.parquet   <- dimensión de jugadores (sin particionar)
+#   <SNAPSHOT_DIR>/VERSION   <- data_version de la BD cuando se escribió
+# Se lee con memory-map: varios procesos comparten las mismas páginas de la caché del SO.
+
+VERSION_FILE = "VERSION"
+PLAYERS_FILE = "players.parquet"
+
+def write_season_snapshot(db: Session, path: str = None) -> int:
+    """
+    Vuelca games, player_stats, shots y players a Parquet y sustituye el snapshot anterior.
+    Devuelve la versión de datos escrita.
+    """
+    path = path or settings.SNAPSHOT_DIR
+    conn = db.connection()
+    version = DataVersionRepository(db).get()
+
+    games = pd.read_sql(select(Game), conn)
+    jornadas = games.set_index('id')['jornada']
+
+    stats = pd.read_sql(select(PlayerStat), conn)
+    stats['jornada'] = stats['game_id'].map(jornadas)
+
+    shots = pd.read_sql(select(Shot), conn)
+    shots['jornada'] = shots['game_id'].map(jornadas)
+
+    players = pd.read_sql(select(Player.id.label("player_pk"), Player.nombre, Player.equipo), conn)
+
+    # Escribimos en un directorio temporal y lo cambiamos de golpe por el anterior
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, df in (("games", games), ("player_stats", stats), ("shots", shots)):
+        df['jornada'] = df['jornada'].fillna("SIN_JORNADA").astype(str)
+        _write_partitioned(df, os.path.join(tmp_path, name))
+    pq.write_table(pa.Table.from_pandas(players, preserve_index=False), os.path.join(tmp_path, PLAYERS_FILE))
+    with open(os.path.join(tmp_path, VERSION_FILE), "w") as f:
+        f.write(str(version))
+
+    old_path = f"{path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return version
+
+def _write_partitioned(df: pd.DataFrame, path: str):
+    """Escribe una tabla particionada por jornada (o un fichero vacío con su esquema si no hay filas)."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if df.empty:
+        # write_dataset no crea nada con 0 filas; dejamos el directorio para que el snapshot esté completo
+        os.makedirs(path)
+        pq.write_table(table.drop(["jornada"]), os.path.join(path, "part-0.parquet"))
+        return
+    ds.write_dataset(table, path, format="parquet", partitioning=["jornada"], partitioning_flavor="hive")
+
+def _read_partitioned(path: str, columns: list) -> pd.DataFrame:
+    """Lee una tabla del snapshot; si falta (snapshot de una versión anterior sin filas) es un frame vacío."""
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns)
+    return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+def read_snapshot_version(path: str = None):
+    """Versión de datos del snapshot (None si todavía no hay snapshot)."""
+    path = path or settings.SNAPSHOT_DIR
+    try:
+        with open(os.path.join(path, VERSION_FILE)) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def read_snapshot_frames(path: str = None):
+    """player_stats y shots del snapshot, con las columnas y tipos compactos de frame_loader."""
+    path = path or settings.SNAPSHOT_DIR
+    stats = _read_partitioned(os.path.join(path, "player_stats"), PLAYER_STAT_COLUMNS)
+    shots = _read_partitioned(os.path.join(path, "shots"), SHOT_ANALYTICS_COLUMNS)
+    return compact_player_stats(stats), compact_shots(shots)
+
+def read_snapshot_players(path: str = None) -> pd.DataFrame:
+    """Dimensión de jugadores del snapshot (player_pk, nombre, equipo)."""
+    path = path or settings.SNAPSHOT_DIR
+    return pq.read_table(os.path.join(path, PLAYERS_FILE), memory_map=True).to_pandas()
+
+def read_snapshot_sums(path: str = None):
+    """(sumas de temporada por jugador, perfiles de tiro, jugadores) calculadas desde el snapshot."""
+    df, df_shots = read_snapshot_frames(path)
+    players = read_snapshot_players(path)
+    if df.empty:
+        return pd.DataFrame(), pd.DataFrame(), players
+    shot_sums = compute_shot_profiles(df_shots) if not df_shots.empty else pd.DataFrame()
+    return compute_season_sums(compute_game_metrics(df)), shot_sums, players
+
+def get_advanced_stats_from_snapshot(min_games=3, min_minutes=10, path: str = None):
+    """get_advanced_stats sin tocar la BD: todo sale del snapshot Parquet."""
+    return build_advanced_stats(*read_snapshot_sums(path), min_games=min_games, min_minutes=min_minutes)
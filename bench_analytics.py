@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import requests
+import uvicorn
+from app.core.database import SessionLocal
+from app.main import app
+from app.models.stats import Game
+from app.repositories.aggregate_repository import AggregateRepository
+from app.repositories.player_repository import PlayerRepository
+from app.services.analytics import (
+    get_advanced_stats, build_advanced_stats,
+    compute_game_metrics, compute_season_sums, compute_shot_profiles
+)
+from app.services.result_cache import advanced_stats_cache
+from app.services.season_aggregates import rebuild_season_aggregates
+from app.services.snapshot import write_season_snapshot, get_advanced_stats_from_snapshot
+
+# --- BENCHMARK DE LA ANALÍTICA ---
+# Mide cada etapa del pipeline (carga, cálculo en Pandas, cálculo en SQL, snapshot...) y cada
+# endpoint de la API (servidor uvicorn local en un hilo) contra la BD de DATABASE_URL
+# (SQLite o un Postgres local; para datos sintéticos: generate_season.py).
+# Por métrica: mediana de --repeat ejecuciones y pico de memoria Python (tracemalloc, en una
+# ejecución aparte para no contaminar los tiempos).
+#
+# Regresiones: con --baseline se compara contra un JSON guardado con --save-baseline y el script
+# sale con código 1 si alguna métrica empeora más de --threshold (y más que el margen absoluto).
+#
+# Uso:  python bench_analytics.py --save-baseline bench_baseline.json
+#       python bench_analytics.py --baseline bench_baseline.json --threshold 0.25
+
+# Diferencias por debajo de esto son ruido aunque superen el umbral relativo
+MIN_DELTA_SECONDS = 0.005
+MIN_DELTA_MB = 1.0
+
+def measure(fn, repeat: int):
+    """(mediana de segundos, pico de memoria en MB) de fn()."""
+    tiempos = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(tiempos), pico / 1024 / 1024
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _start_api():
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}/api/v1"
+
+def pipeline_stages(db, snapshot_dir):
+    """(nombre, función) de cada etapa, en orden (las entradas de una etapa salen de la anterior)."""
+    repo = AggregateRepository(db)
+    cache = {}
+
+    def _keep(name, fn):
+        def run():
+            cache[name] = fn()
+        return run
+
+    return [
+        ("load_player_rows", _keep("rows", repo.load_player_rows)),
+        ("load_shot_rows", _keep("shots", repo.load_shot_rows)),
+        ("compute_game_metrics", _keep("metrics", lambda: compute_game_metrics(cache["rows"]))),
+        ("compute_season_sums", lambda: compute_season_sums(cache["metrics"])),
+        ("compute_shot_profiles", lambda: compute_shot_profiles(cache["shots"])),
+        ("sql_player_sums", repo.sql_player_sums),
+        ("sql_team_totals", repo.sql_team_totals),
+        ("sql_shot_profiles", repo.sql_shot_profiles),
+        ("load_aggregates", _keep("inputs", lambda: (
+            repo.load_player_sums(), repo.load_shot_profiles(), PlayerRepository(db).load_frame()
+        ))),
+        ("build_advanced_stats", lambda: build_advanced_stats(*cache["inputs"])),
+        ("advanced_stats[aggregates]", lambda: get_advanced_stats(db, source="aggregates")),
+        ("advanced_stats[sql]", lambda: get_advanced_stats(db, source="sql")),
+        ("advanced_stats[raw]", lambda: get_advanced_stats(db, source="raw")),
+        ("write_snapshot", lambda: write_season_snapshot(db, snapshot_dir)),
+        ("advanced_stats[snapshot]", lambda: get_advanced_stats_from_snapshot(path=snapshot_dir)),
+        ("rebuild_season_aggregates", lambda: rebuild_season_aggregates(db)),
+    ]
+
+def endpoint_calls(db, base_url, http):
+    """(nombre, función) de cada endpoint de la API con parámetros reales de la BD."""
+    game_id = db.query(Game.id).order_by(Game.id).limit(1).scalar()
+    jugadores = PlayerRepository(db).load_frame()
+    jugador = jugadores.iloc[len(jugadores) // 2] if not jugadores.empty else None
+
+    def get(path, **params):
+        def run():
+            r = http.get(f"{base_url}{path}", params=params, timeout=120)
+            r.raise_for_status()
+        return run
+
+    def cold(fn):
+        def run():
+            advanced_stats_cache.clear()
+            fn()
+        return run
+
+    llamadas = [
+        ("GET /season/advanced (frío)", cold(get("/season/advanced"))),
+        ("GET /season/advanced (caché)", get("/season/advanced")),
+        ("GET /season/percentiles (caché)", get("/season/percentiles", usg=22, ast=3.5, reb=6, tpa=4, efg=52)),
+    ]
+    if jugador is not None:
+        llamadas.append(("GET /player/profile", get("/player/profile", name=jugador["nombre"], team=jugador["equipo"])))
+    if game_id is not None:
+        llamadas += [
+            ("GET /games/{id}/shots", get(f"/games/{game_id}/shots")),
+            ("GET /games/{id}/stats/zones", get(f"/games/{game_id}/stats/zones")),
+            ("GET /games/{id}/stats/players-advanced", get(f"/games/{game_id}/stats/players-advanced")),
+        ]
+    return llamadas
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Métricas que empeoran más del umbral respecto a la línea base."""
+    regresiones = []
+    for name, actual in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for campo, margen in (("seconds", MIN_DELTA_SECONDS), ("peak_mb", MIN_DELTA_MB)):
+            antes, ahora = base[campo], actual[campo]
+            if ahora > antes * (1 + threshold) and ahora - antes > margen:
+                regresiones.append(f"{name} [{campo}]: {antes:.4g} -> {ahora:.4g} (+{(ahora / antes - 1) if antes else float('inf'):.0%})")
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de etapas de la analítica y endpoints de la API")
+    parser.add_argument("--repeat", type=int, default=5, help="Ejecuciones por métrica (se usa la mediana)")
+    parser.add_argument("--save-baseline", default=None, help="Guardar los resultados como línea base (JSON)")
+    parser.add_argument("--baseline", default=None, help="Comparar contra esta línea base y fallar si hay regresiones")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Empeoramiento relativo permitido (0.25 = 25%%)")
+    parser.add_argument("--skip-api", action="store_true", help="Solo las etapas del pipeline")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    results = {}
+    print(f"{'métrica':<42}{'mediana':>12}{'pico mem.':>12}")
+    try:
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            grupos = [("pipeline", pipeline_stages(db, os.path.join(snapshot_dir, "snapshot")))]
+            if not args.skip_api:
+                server, base_url = _start_api()
+                grupos.append(("api", endpoint_calls(db, base_url, requests.Session())))
+            for grupo, etapas in grupos:
+                for name, fn in etapas:
+                    segundos, pico = measure(fn, args.repeat)
+                    results[f"{grupo}.{name}"] = {"seconds": round(segundos, 6), "peak_mb": round(pico, 3)}
+                    print(f"{grupo + '.' + name:<42}{segundos * 1000:>9.1f} ms{pico:>9.1f} MB")
+            if not args.skip_api:
+                server.should_exit = True
+    finally:
+        db.close()
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 Línea base guardada en {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regresiones = compare(results, json.load(f), args.threshold)
+        if regresiones:
+            print(f"❌ {len(regresiones)} regresiones (umbral {args.threshold:.0%}):")
+            for r in regresiones:
+                print(f"   - {r}")
+            sys.exit(1)
+        print(f"✅ Sin regresiones respecto a {args.baseline} (umbral {args.threshold:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+import requests
+from app.core.rate_limit import positive_rate # No lee la configuración: se puede importar ya
+
+# --- BENCHMARK DEL CRAWLER CONTRA EL SERVIDOR FBPA SIMULADO ---
+# Arranca mock_fbpa_server.py en local, apunta el crawler a él con una BD SQLite propia
+# (no toca la BD configurada) y mide:
+#   - partidos por segundo y filas de BD (player_stats + shots) por segundo
+#   - latencia por partido (p50 / p95 / máx.)
+#   - peticiones que ha recibido el servidor (reintentos y re-logins incluidos)
+#
+# Uso:  python bench_crawler.py --teams 12 --workers 4 --rate 20 --latency 0.05 --error-rate 0.02 --key-ttl 20
+#       python bench_crawler.py --archive data/raw   (con el FBPA_BASE_URL y los ids de la grabación en el entorno o el .env)
+
+# Ids que entran en los parámetros de cada petición (y por tanto en el hash del archivo)
+RECORDED_VARS = ("FBPA_ID_DISPOSITIVO", "FBPA_ID_FASE", "FBPA_ID_GRUPO", "FBPA_ID_EQUIPO_PROPIO")
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _percentile(values, pct):
+    ordenados = sorted(values)
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(round(pct / 100 * (len(ordenados) - 1))))]
+
+def _recorded_config() -> dict:
+    """
+    FBPA_BASE_URL e ids con los que se grabó el archivo (entorno > .env, igual que app/core/config.py).
+    Se leen sin importar app.*: la configuración del benchmark todavía no está lista.
+    """
+    from dotenv import dotenv_values
+    valores = {**dotenv_values(".env"), **os.environ}
+    faltan = [var for var in ("FBPA_BASE_URL",) + RECORDED_VARS if not valores.get(var)]
+    if faltan:
+        raise SystemExit(f"🛑 --archive necesita la configuración con la que se grabó (falta {', '.join(faltan)})")
+    # Misma limpieza que ScraperService (comillas del .env)
+    return {var: str(valores[var]).replace('"', '').replace("'", "").strip() for var in ("FBPA_BASE_URL",) + RECORDED_VARS}
+
+def _start_mock(args, port):
+    cmd = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_fbpa_server.py"),
+        "--port", str(port), "--teams", str(args.teams), "--shots", str(args.shots),
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate), "--key-ttl", str(args.key_ttl),
+    ]
+    if args.archive:
+        cmd += ["--archive", args.archive]
+    proc = subprocess.Popen(cmd)
+    for _ in range(100):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/_stats", timeout=1)
+            return proc
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("El servidor simulado no arrancó")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del crawler contra el servidor FBPA simulado")
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--shots", type=int, default=80, help="Tiros por partido")
+    parser.add_argument("--archive", default=None, help="Servir respuestas grabadas (RAW_ARCHIVE_DIR) en vez de sintéticas")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=positive_rate, default=1000.0, help="Peticiones/s del token bucket (alto = sin límite)")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--key-ttl", type=float, default=0.0)
+    parser.add_argument("--db", default="bench_crawler.sqlite",
+                        help="Fichero SQLite del benchmark (se recrea) o URL de una BD vacía (p. ej. Postgres)")
+    args = parser.parse_args()
+
+    port = _free_port()
+    if "://" in args.db:
+        database_url = args.db
+    else:
+        if os.path.exists(args.db):
+            os.remove(args.db)
+        database_url = f"sqlite:///{os.path.abspath(args.db)}"
+
+    # Con respuestas grabadas, la ruta base de la URL (p. ej. /v2) y los ids tienen que ser los de la
+    # grabación: forman parte del hash de cada petición. El servidor simulado responde en cualquier ruta.
+    grabacion = _recorded_config() if args.archive else {}
+    base_path = urlparse(grabacion["FBPA_BASE_URL"]).path.rstrip("/") if args.archive else ""
+
+    # La configuración se lee al importar app.*: el entorno tiene que estar listo antes
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "FBPA_BASE_URL": f"http://127.0.0.1:{port}{base_path}",
+        "FBPA_LOGIN_URL": f"http://127.0.0.1:{port}/login",
+        "RAW_ARCHIVE_ENABLED": "false",
+    })
+    if args.archive:
+        os.environ.update({var: grabacion[var] for var in RECORDED_VARS})
+    else:
+        os.environ["FBPA_ID_EQUIPO_PROPIO"] = "EQ01" # La liga sintética empieza en EQ01
+    for var in ("FBPA_ID_DISPOSITIVO", "FBPA_ID_FASE", "FBPA_ID_GRUPO",
+                "FBPA_DEVICE_UID", "FBPA_PUSH_TOKEN", "FBPA_APP_VERSION"):
+        os.environ.setdefault(var, "bench")
+
+    import contextlib
+    import io
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from sqlalchemy import func, select
+    from init_db import create_tables
+    import run_crawler
+    from app.core.database import SessionLocal
+    from app.core.rate_limit import TokenBucket
+    from app.models.stats import PlayerStat
+    from app.models.shot import Shot
+    from app.services.scraper_service import ScraperService
+
+    create_tables()
+    proc = _start_mock(args, port)
+    try:
+        limiter = TokenBucket(rate=args.rate, burst=max(1, args.workers))
+        db = SessionLocal()
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper = ScraperService(db, rate_limiter=limiter)
+            if not scraper.login():
+                raise RuntimeError("Login contra el servidor simulado fallido")
+            t_cal = time.perf_counter()
+            games, n_equipos = scraper.get_league_calendar(run_crawler.ID_EQUIPO_OBJETIVO, workers=args.workers)
+            t_cal = time.perf_counter() - t_cal
+
+        def _timed(game):
+            t = time.perf_counter()
+            resultado = run_crawler.ingest_game(game, scraper.session_key, limiter)
+            return resultado, time.perf_counter() - t
+
+        # redirect_stdout no es por hilo: se silencia el log de la ingesta entera de una vez
+        latencias, fallos = [], []
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            for future in as_completed([pool.submit(_timed, g) for g in games]):
+                resultado, segundos = future.result()
+                latencias.append(segundos)
+                if "TODO OK" not in resultado:
+                    fallos.append(resultado)
+        total = time.perf_counter() - t0
+
+        filas = db.execute(select(func.count()).select_from(PlayerStat)).scalar() + \
+            db.execute(select(func.count()).select_from(Shot)).scalar()
+        servidor = requests.get(f"http://127.0.0.1:{port}/_stats", timeout=5).json()
+        for sesion in run_crawler._sesiones:
+            sesion.close()
+        db.close()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print("📊 BENCHMARK CRAWLER (servidor simulado)")
+    print(f"   Liga:        {n_equipos} equipos, {len(games)} partidos (calendarios en {t_cal:.2f}s)")
+    print(f"   Config:      workers={args.workers} rate={args.rate:g}/s latencia={args.latency}s+{args.jitter}s "
+          f"errores={args.error_rate:.0%} key_ttl={args.key_ttl:g}s")
+    print(f"   Tiempo:      {total:.2f}s  ({len(fallos)} partidos con fallo)")
+    print(f"   Partidos/s:  {len(games) / total:.1f}")
+    print(f"   Filas/s:     {filas / total:.0f}  ({filas} filas)")
+    print(f"   Latencia:    p50 {_percentile(latencias, 50) * 1000:.0f} ms  "
+          f"p95 {_percentile(latencias, 95) * 1000:.0f} ms  máx {max(latencias, default=0) * 1000:.0f} ms")
+    print(f"   Servidor:    {servidor}")
+    for resultado in sorted(set(fallos)):
+        print(f"   {fallos.count(resultado)} x {resultado}")
+
+if __name__ == "__main__":
+    main()
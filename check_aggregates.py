@@ -0,0 +1,66 @@
+import sys
+import pandas as pd
+from app.core.database import SessionLocal
+from app.models.stats import Game
+from app.repositories.aggregate_repository import AggregateRepository
+from app.services.analytics import get_advanced_stats
+from app.services.season_aggregates import add_game_stats, add_game_shots, remove_game_stats, remove_game_shots
+
+# --- AGREGADOS INCREMENTALES == CÁLCULO DESDE CRUDO ---
+# La API lee los agregados que se van sumando (y restando, al reingestar) partido a partido.
+# Este script los rehace así sobre la BD de DATABASE_URL, reingesta uno de cada REINGEST_EVERY
+# partidos (resta + suma, como hace el crawler) y compara la tabla final con la calculada
+# desde las filas crudas (source="raw") y con las sumas en SQL (source="sql"), valor a valor.
+# Todo va en una transacción que se deshace al final: la BD no cambia.
+#
+# Uso:  python check_aggregates.py   (sale con código 1 si algún camino no coincide)
+
+POOLS = [(1, 5), (3, 10)] # (min_games, min_minutes)
+REINGEST_EVERY = 3
+
+def replay_incremental(db):
+    """Rehace los agregados partido a partido, con reingestas, dentro de la transacción abierta."""
+    AggregateRepository(db).clear()
+    game_ids = [g for (g,) in db.query(Game.id).order_by(Game.fecha, Game.id)]
+    for game_id in game_ids:
+        add_game_stats(db, game_id)
+        add_game_shots(db, game_id)
+    for game_id in game_ids[::REINGEST_EVERY]:
+        remove_game_stats(db, game_id)
+        remove_game_shots(db, game_id)
+        add_game_stats(db, game_id)
+        add_game_shots(db, game_id)
+    return len(game_ids)
+
+def compare(name, got, expected):
+    try:
+        pd.testing.assert_frame_equal(got, expected, check_exact=True)
+    except AssertionError as e:
+        print(f"❌ {name}: {e}")
+        return False
+    print(f"✅ {name}: {len(got)} jugadores idénticos")
+    return True
+
+def main():
+    db = SessionLocal()
+    ok = True
+    try:
+        expected = {pool: get_advanced_stats(db, *pool, source="raw") for pool in POOLS}
+        for pool in POOLS:
+            ok &= compare(f"sql == raw {pool}", get_advanced_stats(db, *pool, source="sql"), expected[pool])
+
+        partidos = replay_incremental(db)
+        print(f"🔄 Agregados rehechos partido a partido ({partidos} partidos, 1 de cada {REINGEST_EVERY} reingestado)")
+        for pool in POOLS:
+            ok &= compare(f"aggregates == raw {pool}", get_advanced_stats(db, *pool, source="aggregates"), expected[pool])
+    finally:
+        db.rollback()
+        db.close()
+
+    if not ok:
+        print("❌ Los agregados no coinciden con el cálculo desde crudo")
+        sys.exit(1)
+    print("✅ Agregados, SQL y crudo dan la misma tabla")
+
+if __name__ == "__main__":
+    main()
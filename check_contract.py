@@ -0,0 +1,104 @@
+import socket
+import sys
+import threading
+import time
+import requests
+import uvicorn
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.main import app
+from app.models.stats import Game
+
+# --- CONTRATO DE LA RUTA JSON RÁPIDA (FAST_JSON) ---
+# Pide cada endpoint dos veces a un servidor uvicorn local (BD de DATABASE_URL): por el camino
+# estándar de FastAPI (validación con Pydantic) y por el rápido (orjson, app/api/v1/fast_json.py).
+# Las dos respuestas tienen que tener los mismos campos en el mismo orden, el mismo tipo JSON en
+# cada valor (un float no puede salir como int) y los mismos valores. También se cuenta en cuántos
+# casos los bytes son idénticos (informativo: orjson y json pueden escribir distinto un mismo float).
+#
+# Uso:  python check_contract.py   (sale con código 1 si algún endpoint rompe el contrato)
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _start_api():
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}/api/v1"
+
+def differences(a, b, path="$") -> list[str]:
+    """Diferencias de forma, tipo y valor entre dos JSON ya parseados."""
+    if type(a) is not type(b):
+        return [f"{path}: {type(a).__name__} != {type(b).__name__}"]
+    if isinstance(a, dict):
+        if list(a) != list(b):
+            return [f"{path}: campos {list(a)} != {list(b)}"]
+        return [d for k in a for d in differences(a[k], b[k], f"{path}.{k}")]
+    if isinstance(a, list):
+        if len(a) != len(b):
+            return [f"{path}: {len(a)} elementos != {len(b)}"]
+        return [d for i, (x, y) in enumerate(zip(a, b)) for d in differences(x, y, f"{path}[{i}]")]
+    return [] if a == b else [f"{path}: {a!r} != {b!r}"]
+
+def cases(db):
+    """(nombre, ruta, parámetros) de cada caso a comprobar."""
+    game_id = db.query(Game.id).order_by(Game.id).limit(1).scalar()
+    casos = [
+        ("season", "/season/advanced", {}),
+        ("season (pool amplio, por TS%)", "/season/advanced", {"min_games": 1, "min_minutes": 5, "sort_by": "ts"}),
+        ("season (página)", "/season/advanced", {"min_games": 1, "min_minutes": 5, "limit": 25}),
+        ("season (sin resultados)", "/season/advanced", {"team": "___ninguno___"}),
+    ]
+    if game_id is not None:
+        casos += [
+            ("shots", f"/games/{game_id}/shots", {}),
+            ("shots (página)", f"/games/{game_id}/shots", {"limit": 10}),
+        ]
+    return casos
+
+def main():
+    db = SessionLocal()
+    server, base_url = _start_api()
+    http = requests.Session()
+    fallos, identicos = 0, 0
+    original = settings.FAST_JSON
+    try:
+        casos = cases(db)
+        for name, path, params in casos:
+            respuestas = {}
+            for fast in (False, True):
+                settings.FAST_JSON = fast
+                r = http.get(f"{base_url}{path}", params=params, timeout=120)
+                r.raise_for_status()
+                respuestas[fast] = r
+            estandar, rapida = respuestas[False], respuestas[True]
+
+            diffs = differences(estandar.json(), rapida.json())
+            if estandar.headers.get("X-Next-Cursor") != rapida.headers.get("X-Next-Cursor"):
+                diffs.append("cabecera X-Next-Cursor distinta")
+            identicos += estandar.content == rapida.content
+            if diffs:
+                fallos += 1
+                print(f"❌ {name}: {len(diffs)} diferencias")
+                for d in diffs[:10]:
+                    print(f"   - {d}")
+            else:
+                print(f"✅ {name} ({len(rapida.content)} bytes{', idénticos' if estandar.content == rapida.content else ''})")
+    finally:
+        settings.FAST_JSON = original
+        server.should_exit = True
+        db.close()
+
+    print(f"   {identicos}/{len(casos)} respuestas idénticas byte a byte")
+    if fallos:
+        print(f"❌ {fallos} caso(s) rompen el contrato de la respuesta")
+        sys.exit(1)
+    print("✅ La ruta rápida respeta el contrato de la estándar")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import subprocess
+import sys
+import time
+import types
+import numpy as np
+import pandas as pd
+from app.core.database import SessionLocal
+from app.core.rules import POSITION_RULES, POSITION_DEFAULT, ROLE_RULES, ROLE_DEFAULT
+from app.services.analytics import classify, get_advanced_stats, season_means, pool_filter
+from app.services.percentiles import PercentileIndex, PERCENTILE_METRICS
+from app.services.result_cache import get_player_advanced_stats
+from app.repositories.aggregate_repository import AggregateRepository
+from app.repositories.player_repository import PlayerRepository
+
+# --- EQUIVALENCIAS DE LAS OPTIMIZACIONES DE LA ANALÍTICA ---
+# Rehace las comprobaciones con las que se dieron por buenas:
+#   1. Reglas vectorizadas (app/core/rules.py + classify) == los if encadenados originales
+#      (estimar_posicion / definir_rol_dinamico, copiados aquí tal cual), sobre filas aleatorias
+#      con percentiles NaN y valores justo en los umbrales. No necesita BD.
+#   2. PercentileIndex == Series.rank(pct=True) para los jugadores del pool (BD de DATABASE_URL).
+#   3. Perfil de un jugador (/player/profile, búsqueda binaria) == su fila en la tabla de la liga.
+#   4. Tabla de la liga == la de get_advanced_stats original (ORIGINAL_COMMIT, leído con git show) sobre
+#      la misma BD: percentiles idénticos; posición y rol idénticos salvo en jugadores cuyo perfil de tiro
+#      cambió a propósito (antes se agrupaba por dorsal, mezclando equipos); medias con 1 decimal a ±0.1.
+# Las sumas en SQL y los agregados incrementales frente al cálculo desde crudo: check_aggregates.py.
+#
+# Uso:  python check_equivalence.py [--rows 20000]   (sale con código 1 si algo no coincide)
+
+POOLS = [(1, 5), (3, 10)] # (min_games, min_minutes)
+ORIGINAL_COMMIT = "a3da584" # Analítica antes de las optimizaciones
+
+# --- REFERENCIA: reglas originales fila a fila (no tocar: es contra lo que se compara) ---
+
+def estimar_posicion(row):
+    if pd.isna(row.get('P_3PA')): return "Rotación"
+
+    p_ast = row.get('P_AST', 0)
+    p_reb = row.get('P_REB', 0)
+    p_3pa = row.get('P_3PA', 0)
+    rim_freq = row.get('rim_freq', 0)
+
+    cond_base_puro = (p_ast > 0.80 and p_reb < 0.70)
+    cond_base_bajito = (p_ast > 0.65 and p_reb < 0.50)
+
+    if (cond_base_puro or cond_base_bajito) and rim_freq < 0.60:
+        return "Base (PG)"
+
+    if p_reb > 0.72 or (p_reb > 0.60 and rim_freq > 0.45):
+        if p_ast > 0.65: return "Alero/Generador (Point Fwd)"
+        if p_3pa > 0.55: return "Ala-Pívot (PF)"
+        if rim_freq > 0.35 or p_reb > 0.85:
+            return "Pívot (C)"
+        return "Ala-Pívot (PF)"
+
+    if p_ast > 0.55: return "Combo Guard (CG)"
+    if p_reb > 0.55: return "Alero (SF)"
+    if p_3pa > 0.55: return "Escolta (SG)"
+
+    return "Exterior (G/F)"
+
+def definir_rol_dinamico(row):
+    if pd.isna(row['P_USG']): return "Fondo de Armario"
+
+    p_usg = row['P_USG']
+    p_eff = row['P_EFF']
+    p_def = row['P_DEF']
+    p_3pa = row['P_3PA']
+    p_ast = row['P_AST']
+    pct_3pt_real = row.get('3P%', 0)
+    rim_freq = row.get('rim_freq', 0)
+    corner_freq = row.get('corner_freq', 0)
+
+    if p_usg > 0.85 and p_ast > 0.75: return "Motor Ofensivo (Offensive Engine)"
+    if p_ast > 0.90: return "Director de Juego (Floor General)"
+    if p_usg > 0.80 and p_eff > 0.70: return "Anotador Élite (Bucket Getter)"
+
+    if row['Posicion'] in ["Pívot (C)", "Ala-Pívot (PF)", "Point Center", "Alero/Generador (Point Forward)"]:
+        if p_3pa > 0.65 and pct_3pt_real > 32.0: return "Interior Abierto (Stretch Big)"
+        if p_ast > 0.75: return "Distribuidor desde Poste"
+        if p_def > 0.80: return "Ancla Defensiva (Rim Protector)"
+        if rim_freq > 0.50: return "Finalizador (Rim Runner)"
+
+    if p_3pa > 0.75 and pct_3pt_real > 34.0:
+        if p_eff > 0.70: return "Francotirador (Sniper)"
+        return "Tirador de Volumen (Volume Shooter)"
+
+    if p_3pa > 0.60 and pct_3pt_real > 30.0 and p_def > 0.70:
+        if corner_freq > 0.20: return "Especialista de Esquina (3&D)"
+        return "3&D Wing"
+
+    if rim_freq > 0.40 and p_usg > 0.50: return "Penetrador (Slasher)"
+
+    if p_ast > 0.70: return "Conector (Connector)"
+    if p_def > 0.70: return "Especialista Defensivo"
+    if p_eff > 0.70: return "Oportunista Eficiente"
+    if p_usg > 0.80: return "Microondas (High Volume)"
+
+    return "Rol de Rotación"
+
+# --- COMPROBACIONES ---
+
+def random_rows(n: int, seed: int = 7) -> pd.DataFrame:
+    """Filas con percentiles redondeados a 2 decimales (caen justo en los umbrales) y ~10% sin pool."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({p: rng.random(n).round(2) for p in PERCENTILE_METRICS})
+    df.loc[rng.random(n) < 0.1, list(PERCENTILE_METRICS)] = np.nan
+    df['3P%'] = (rng.random(n) * 50).round(0)
+    df['rim_freq'] = rng.random(n).round(2)
+    df['corner_freq'] = rng.random(n).round(2)
+    return df
+
+def check_rules(rows: int) -> bool:
+    df = random_rows(rows)
+
+    t0 = time.perf_counter()
+    posicion = classify(df, POSITION_RULES, POSITION_DEFAULT)
+    rol = classify(df.assign(Posicion=posicion), ROLE_RULES, ROLE_DEFAULT)
+    t_vector = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    posicion_ref = df.apply(estimar_posicion, axis=1).to_numpy()
+    rol_ref = df.assign(Posicion=posicion_ref).apply(definir_rol_dinamico, axis=1).to_numpy()
+    t_apply = time.perf_counter() - t0
+
+    distintas = int((posicion != posicion_ref).sum() + (rol != rol_ref).sum())
+    if distintas:
+        print(f"❌ Reglas: {distintas} etiquetas distintas de {2 * rows}")
+        return False
+    print(f"✅ Reglas: {rows} filas, etiquetas idénticas ({t_apply / t_vector:.0f}x más rápido que apply)")
+    return True
+
+def check_percentiles(db) -> bool:
+    repo = AggregateRepository(db)
+    means = season_means(repo.load_player_sums(), repo.load_shot_profiles(), PlayerRepository(db).load_frame())
+    if means.empty:
+        print("⚠️ Percentiles: la BD no tiene datos de temporada, no se comprueba")
+        return True
+    ok = True
+    for min_games, min_minutes in POOLS:
+        pool = pool_filter(means, min_games, min_minutes)
+        got = PercentileIndex.from_pool(pool).percentiles(pool)
+        expected = pd.DataFrame({p: pool[m].rank(pct=True) for p, m in PERCENTILE_METRICS.items()})
+        try:
+            pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-12)
+        except AssertionError as e:
+            print(f"❌ Percentiles {(min_games, min_minutes)}: {e}")
+            ok = False
+            continue
+        print(f"✅ Percentiles {(min_games, min_minutes)}: {len(pool)} jugadores, iguales a rank(pct=True)")
+    return ok
+
+def check_profiles(db) -> bool:
+    """/player/profile se calcula con el pool por defecto del endpoint (1 partido, 5 minutos)."""
+    tabla = get_advanced_stats(db, min_games=1, min_minutes=5)
+    if tabla.empty:
+        print("⚠️ Perfiles: la BD no tiene datos de temporada, no se comprueba")
+        return True
+    distintos = []
+    for _, fila in tabla.iterrows():
+        perfil = get_player_advanced_stats(db, fila['Jugador'], fila['Equipo'])
+        perfil = perfil[perfil['player_pk'] == fila['player_pk']]
+        try:
+            pd.testing.assert_series_equal(perfil.iloc[0], fila, check_names=False, check_exact=True)
+        except (AssertionError, IndexError):
+            distintos.append(fila['Jugador'])
+    if distintos:
+        print(f"❌ Perfiles: {len(distintos)} jugadores con perfil distinto a su fila (p. ej. {distintos[0]})")
+        return False
+    print(f"✅ Perfiles: {len(tabla)} jugadores, perfil == fila de la tabla de la liga")
+    return True
+
+def load_original_analytics():
+    """Módulo app/services/analytics.py de ORIGINAL_COMMIT (None si no hay git o no está el commit)."""
+    try:
+        src = subprocess.run(["git", "show", f"{ORIGINAL_COMMIT}:app/services/analytics.py"],
+                             capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    module = types.ModuleType("analytics_original")
+    exec(compile(src, f"{ORIGINAL_COMMIT}:app/services/analytics.py", "exec"), module.__dict__)
+    return module
+
+def check_original(db) -> bool:
+    original = load_original_analytics()
+    if original is None:
+        print(f"⚠️ Original: no se pudo leer {ORIGINAL_COMMIT} con git, no se comprueba")
+        return True
+    ok = True
+    for min_games, min_minutes in POOLS:
+        antes = original.get_advanced_stats(db, min_games=min_games, min_minutes=min_minutes)
+        ahora = get_advanced_stats(db, min_games=min_games, min_minutes=min_minutes)
+        if antes.empty and ahora.empty:
+            print(f"⚠️ Original {(min_games, min_minutes)}: la BD no tiene datos de temporada, no se comprueba")
+            continue
+        tabla = antes.merge(ahora, on=['Jugador', 'Equipo'], how='outer', suffixes=('_antes', '_ahora'), indicator=True)
+        sueltos = int((tabla['_merge'] != 'both').sum())
+        if sueltos:
+            print(f"❌ Original {(min_games, min_minutes)}: {sueltos} jugadores solo en una de las dos tablas")
+            ok = False
+            continue
+
+        def distintos(col):
+            return tabla[col + '_antes'].ne(tabla[col + '_ahora']) & ~(tabla[col + '_antes'].isna() & tabla[col + '_ahora'].isna())
+
+        fallos = {p: int(distintos(p).sum()) for p in PERCENTILE_METRICS}
+        mismo_perfil = ~(distintos('Corner_Freq') | distintos('Rim_Freq'))
+        for col in ('Posicion', 'Rol_Tactical'):
+            fallos[col] = int((distintos(col) & mismo_perfil).sum())
+        for col in ('PPP', 'RPP', 'APP', 'USG_pct', 'TS_pct', 'eFG_pct', 'GmSc'):
+            fallos[col] = int(((tabla[col + '_antes'] - tabla[col + '_ahora']).abs() > 0.1 + 1e-9).sum())
+        fallos = {col: n for col, n in fallos.items() if n}
+        if fallos:
+            print(f"❌ Original {(min_games, min_minutes)}: jugadores distintos por columna {fallos}")
+            ok = False
+            continue
+        print(f"✅ Original {(min_games, min_minutes)}: {len(tabla)} jugadores, mismos percentiles que {ORIGINAL_COMMIT} "
+              f"({int((~mismo_perfil).sum())} con el perfil de tiro ya por jugador)")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Equivalencias de las optimizaciones de la analítica")
+    parser.add_argument("--rows", type=int, default=20000, help="Filas aleatorias para comprobar las reglas")
+    args = parser.parse_args()
+
+    ok = check_rules(args.rows)
+
+    db = SessionLocal()
+    try:
+        ok &= check_percentiles(db)
+        ok &= check_profiles(db)
+        ok &= check_original(db)
+    finally:
+        db.close()
+
+    if not ok:
+        print("❌ Alguna optimización no da lo mismo que el cálculo original")
+        sys.exit(1)
+    print("✅ Todas las equivalencias se cumplen")
+
+if __name__ == "__main__":
+    main()
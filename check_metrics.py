@@ -1,5 +1,7 @@
+import argparse
 from app.core.database import SessionLocal
 from app.services.analytics import get_advanced_stats
+from app.services.snapshot import get_advanced_stats_from_snapshot
 import pandas as pd
 
 # Configuración de visualización de pandas
@@ -8,11 +10,18 @@ pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
 
 def main():
+    parser = argparse.ArgumentParser(description="Tops de métricas Moneyball por consola")
+    parser.add_argument("--snapshot", action="store_true", help="Leer del snapshot Parquet en vez de la BD")
+    args = parser.parse_args()
+
     db = SessionLocal()
     print("🧠 Calculando métricas Moneyball...")
     
     # Pedimos jugadores con al menos 3 partidos y 15 minutos de media
-    df = get_advanced_stats(db, min_games=3, min_minutes=15)
+    if args.snapshot:
+        df = get_advanced_stats_from_snapshot(min_games=3, min_minutes=15)
+    else:
+        df = get_advanced_stats(db, min_games=3, min_minutes=15)
     
     print("\n--- TOP 10 EFICIENCIA OFENSIVA (TS%) ---")
     print("(Jugadores que anotan mucho con pocos tiros)")
@@ -0,0 +1,92 @@
+import sys
+from fastapi import Response
+from app.core.database import SessionLocal, assert_max_queries
+from app.models.stats import Game
+from app.repositories.player_repository import PlayerRepository
+from app.services.result_cache import advanced_stats_cache
+from app.api.v1.endpoints import analytics
+
+# --- PRESUPUESTO DE CONSULTAS POR ENDPOINT ---
+# Llama a cada endpoint (la función, sin servidor) contra la BD de DATABASE_URL con la caché vacía
+# y falla si lanza más consultas SQL de las previstas: así se pilla un N+1 antes de que llegue a producción.
+# Si un cambio necesita de verdad más consultas, se sube aquí el presupuesto a conciencia.
+#
+# Uso:  python check_query_budget.py   (sale con código 1 si algún endpoint se pasa)
+
+# endpoint -> máximo de consultas (caché fría)
+BUDGETS = {
+    "/season/advanced": 4,           # versión + agregados de jugadores + perfiles de tiro + jugadores
+    "/season/advanced (caché)": 1,   # solo la versión de datos
+    "/season/percentiles": 4,
+    "/season/version": 1,
+    "/player/profile": 5,            # lo de /season/advanced + los tiros del jugador
+    "/games/{id}/shots": 1,
+    "/games/{id}/shots (página)": 1,
+    "/shots/heatmap": 1,
+    "/games/{id}/stats/zones": 1,
+    "/games/{id}/stats/players-advanced": 1,
+}
+
+def endpoint_calls(db):
+    """(nombre, función) de cada endpoint con parámetros reales de la BD."""
+    game_id = db.query(Game.id).order_by(Game.id).limit(1).scalar()
+    jugadores = PlayerRepository(db).load_frame()
+    jugador = jugadores.iloc[len(jugadores) // 2] if not jugadores.empty else None
+
+    def advanced():
+        return analytics.get_moneyball_stats(
+            min_games=3, min_minutes=10, team=None, sort_by="GmSc", limit=None, cursor=None, format="json", db=db
+        )
+
+    llamadas = [
+        ("/season/advanced", advanced),
+        ("/season/advanced (caché)", advanced),
+        ("/season/version", lambda: analytics.get_season_version(db=db)),
+        ("/season/percentiles", lambda: analytics.get_what_if_percentiles(
+            usg=22, ast=3.5, reb=6, tpa=4, efg=52, rdef=None, rec=None, min_games=1, min_minutes=5, db=db
+        )),
+    ]
+    if jugador is not None:
+        llamadas.append(("/player/profile", lambda: analytics.get_player_profile(
+            name=jugador["nombre"], team=jugador["equipo"], db=db
+        )))
+        llamadas.append(("/shots/heatmap", lambda: analytics.get_shot_heatmap(
+            player_pk=int(jugador["player_pk"]), team=None, game_id=None, db=db
+        )))
+    if game_id is not None:
+        llamadas += [
+            ("/games/{id}/shots", lambda: analytics.get_game_shots(
+                game_id, Response(), limit=None, cursor=None, format="json", db=db
+            )),
+            ("/games/{id}/shots (página)", lambda: analytics.get_game_shots(
+                game_id, Response(), limit=20, cursor=None, format="json", db=db
+            )),
+            ("/games/{id}/stats/zones", lambda: analytics.get_game_zone_stats(game_id, db=db)),
+            ("/games/{id}/stats/players-advanced", lambda: analytics.get_game_player_advanced_stats(game_id, db=db)),
+        ]
+    return llamadas
+
+def main():
+    db = SessionLocal()
+    fallos = []
+    try:
+        for name, fn in endpoint_calls(db):
+            if "(caché)" not in name:
+                advanced_stats_cache.clear()
+            try:
+                with assert_max_queries(BUDGETS[name]) as q:
+                    fn()
+                print(f"✅ {name:<40} {q.queries}/{BUDGETS[name]} consultas")
+            except AssertionError as e:
+                fallos.append(name)
+                print(f"❌ {name:<40} {e}")
+    finally:
+        db.close()
+
+    if fallos:
+        print(f"❌ {len(fallos)} endpoint(s) por encima de su presupuesto de consultas")
+        sys.exit(1)
+    print("✅ Todos los endpoints dentro de su presupuesto de consultas")
+
+if __name__ == "__main__":
+    main()
@@ -12,35 +12,68 @@ st.set_page_config(page_title="Moneyball FBPA", layout="wide", page_icon="🏀")
 API_URL = os.getenv("API_INTERNAL_URL", "http://127.0.0.1:8000/api/v1")
 
 # --- FUNCIONES DE CARGA ---
-@st.cache_data(ttl=300)
-def load_season_stats(min_games, min_minutes, team_filter=None):
+# La tabla de temporada se pide UNA vez por versión de datos, con el pool más amplio que permiten
+# los sliders, y los filtros (partidos, minutos, equipo, posición) se aplican aquí en Pandas:
+# mover un slider no cuesta ninguna llamada a la API.
+POOL_MIN_GAMES = 1
+POOL_MIN_MINUTES = 5
+
+@st.cache_resource
+def get_http_session():
+    """Sesión HTTP compartida (keep-alive: reutiliza las conexiones con el backend)."""
+    return requests.Session()
+
+# Las funciones cacheadas NO capturan errores: Streamlit no cachea una excepción, así que un fallo
+# puntual del backend no deja el dashboard vacío hasta el siguiente cambio de versión.
+# Los errores se tratan fuera, con api_call.
+
+@st.cache_data(ttl=60)
+def load_data_version():
+    """Versión de datos del backend; se consulta como mucho una vez por minuto."""
+    response = get_http_session().get(f"{API_URL}/season/version", timeout=10)
+    response.raise_for_status()
+    return response.json()["data_version"]
+
+@st.cache_data(max_entries=2)
+def load_season_stats(data_version):
+    """Tabla completa de la temporada (la versión solo está para la clave de la caché)."""
+    params = {
+        "min_games": POOL_MIN_GAMES,
+        "min_minutes": POOL_MIN_MINUTES,
+        "sort_by": "GmSc"
+    }
+    response = get_http_session().get(f"{API_URL}/season/advanced", params=params, timeout=60)
+    response.raise_for_status()
+    
+    data = response.json()
+    df = pd.DataFrame(data["data"])
+    return df
+
+@st.cache_data(max_entries=128)
+def load_player_profile_api(player_name, team, data_version):
+    """Perfil de un jugador (LRU: los últimos 128 jugadores consultados en esta versión de datos). None si no existe."""
+    response = get_http_session().get(f"{API_URL}/player/profile", params={"name": player_name, "team": team}, timeout=30)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(max_entries=128)
+def load_shot_heatmap_api(player_pk, data_version):
+    """Rejilla del mapa de calor del jugador (tamaño fijo, tenga los tiros que tenga). None si no hay datos."""
+    response = get_http_session().get(f"{API_URL}/shots/heatmap", params={"player_pk": player_pk}, timeout=30)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+def api_call(load, *args, default=None):
+    """Llama a una función de carga; si el backend falla, lo avisa y devuelve `default` (sin cachearlo)."""
     try:
-        params = {
-            "min_games": min_games,
-            "min_minutes": min_minutes,
-            "sort_by": "GmSc"
-        }
-        if team_filter and team_filter != "Todos":
-            params["team"] = team_filter
-
-        response = requests.get(f"{API_URL}/season/advanced", params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        df = pd.DataFrame(data["data"])
-        return df
+        return load(*args)
     except Exception as e:
         st.error(f"❌ Error conectando con la API: {e}")
-        return pd.DataFrame()
-
-def load_player_profile_api(player_name):
-    try:
-        response = requests.get(f"{API_URL}/player/profile", params={"name": player_name})
-        if response.status_code == 200:
-            return response.json()
-        return None
-    except Exception:
-        return None
+        return default
 
 # --- FUNCIONES DE DIBUJO ---
 def draw_radar_chart(profile_data):
@@ -79,28 +112,24 @@ def draw_radar_chart(profile_data):
     )
     return fig
 
-def draw_shot_chart(shots_list, title="Mapa de Tiros"):
-    fig = go.Figure()
-    if not shots_list: pass 
-    else:
-        df_shots = pd.DataFrame(shots_list)
-        df_shots['x_final'] = df_shots['y'] 
-        df_shots['y_final'] = df_shots['x'].apply(lambda x: x if x <= 50 else 100 - x)
-        df_shots['y_final'] = df_shots['y_final'] * 2
-
-        for is_made_val, color, symbol, name in [(True, "#00FF00", "circle", "Anotado"), 
-                                                 (False, "#FF0000", "x", "Fallado")]:
-            subset = df_shots[df_shots['is_made'] == is_made_val]
-            if not subset.empty:
-                fig.add_trace(go.Scatter(
-                    x=subset['x_final'], y=subset['y_final'], mode='markers',
-                    marker=dict(color=color, symbol=symbol, size=10, opacity=0.8, line=dict(width=1, color='black')),
-                    name=name, hoverinfo='text', text=subset['action_type']
-                ))
+def draw_shot_heatmap(heatmap, title="Mapa de Tiros"):
+    """Capa de densidad de la rejilla del backend (media pista: x = ancho, y = fondo)."""
+    size = heatmap['cell_size']
+    centros_x = [size * (c + 0.5) for c in range(heatmap['cols'])]
+    centros_y = [size * (r + 0.5) for r in range(heatmap['rows'])]
+    fg = [[f"{v:.0f}%" if v is not None else "-" for v in fila] for fila in heatmap['fg_pct']]
+    # Celdas sin tiros transparentes (None) para que se vea la pista
+    intentos = [[n if n else None for n in fila] for fila in heatmap['attempts']]
+
+    fig = go.Figure(go.Heatmap(
+        x=centros_x, y=centros_y, z=intentos, customdata=fg,
+        colorscale="YlOrRd", showscale=False, opacity=0.85, hoverongaps=False,
+        hovertemplate="%{z} tiros · FG %{customdata}<extra></extra>"
+    ))
 
     fig.update_layout(
         title=title,
-        xaxis=dict(range=[10, 90], showgrid=False, zeroline=False, showticklabels=False),
+        xaxis=dict(range=[0, 100], showgrid=False, zeroline=False, showticklabels=False),
         yaxis=dict(range=[0, 100], showgrid=False, zeroline=False, showticklabels=False),
         width=450, height=600, template="plotly_dark",
         shapes=[
@@ -114,16 +143,22 @@ def draw_shot_chart(shots_list, title="Mapa de Tiros"):
 
 # --- INTERFAZ ---
 st.sidebar.title("🛠️ Filtros API")
-min_games = st.sidebar.slider("Min Partidos", 1, 10, 3)
-min_minutes = st.sidebar.slider("Min Minutos", 5, 30, 15)
+min_games = st.sidebar.slider("Min Partidos", POOL_MIN_GAMES, 10, 3)
+min_minutes = st.sidebar.slider("Min Minutos", POOL_MIN_MINUTES, 30, 15)
 
-# Cargar datos
-df = load_season_stats(min_games, min_minutes)
+# Cargar datos (de la caché si la versión de datos no ha cambiado)
+data_version = api_call(load_data_version)
+df = api_call(load_season_stats, data_version, default=pd.DataFrame())
 
 if df.empty:
     st.warning("⚠️ No se pudieron cargar datos. Verifica que el Backend esté corriendo.")
     st.stop()
 
+df = df[(df['PJ'] >= min_games) & (df['MPP'] >= min_minutes)]
+if df.empty:
+    st.warning("⚠️ Ningún jugador cumple los mínimos de partidos y minutos.")
+    st.stop()
+
 # Filtros
 equipos = ["Todos"] + sorted(df['Equipo'].unique().tolist())
 equipo_sel = st.sidebar.selectbox("Equipo", equipos)
@@ -166,18 +201,19 @@ jugadores = sorted(df['Jugador'].unique())
 jugador_sel = st.selectbox("Selecciona jugador:", jugadores)
 
 if jugador_sel:
-    profile_response = load_player_profile_api(jugador_sel)
+    equipo_jugador = df.loc[df['Jugador'] == jugador_sel, 'Equipo'].iloc[0]
+    profile_response = api_call(load_player_profile_api, jugador_sel, equipo_jugador, data_version)
     if profile_response:
         stats = profile_response['profile']
-        shots = profile_response['shots']
+        heatmap = api_call(load_shot_heatmap_api, int(stats['player_pk']), data_version)
         
         c_izq, c_der = st.columns([1, 1])
         with c_izq:
             st.plotly_chart(draw_radar_chart(stats), width="stretch")
             st.info(f"**Rol:** {stats['Rol_Tactical']} | **Posición:** {stats['Posicion']} | **Partidos jugados:** {stats['PJ']}")
         with c_der:
-            if shots:
-                st.caption(f"Mapa de Tiros ({len(shots)} tiros)")
-                st.plotly_chart(draw_shot_chart(shots, title=""), width="stretch")
+            if heatmap and heatmap['total_attempts']:
+                st.caption(f"Mapa de Tiros ({heatmap['total_attempts']} tiros, {heatmap['total_makes']} anotados)")
+                st.plotly_chart(draw_shot_heatmap(heatmap, title=""), width="stretch")
             else:
                 st.warning("Sin datos de tiro.")
\ No newline at end of file
@@ -1,13 +1,22 @@
+import argparse
 import pandas as pd
 from app.core.database import SessionLocal
 from app.services.analytics import get_advanced_stats
+from app.services.snapshot import get_advanced_stats_from_snapshot
 
 def main():
+    parser = argparse.ArgumentParser(description="Exporta la tabla Moneyball a Excel/CSV")
+    parser.add_argument("--snapshot", action="store_true", help="Leer del snapshot Parquet en vez de la BD")
+    args = parser.parse_args()
+
     print("📊 Generando informe de laboratorio Moneyball...")
     db = SessionLocal()
     
     # Obtenemos TODOS los datos sin filtrar casi nada
-    df = get_advanced_stats(db, min_games=1, min_minutes=5)
+    if args.snapshot:
+        df = get_advanced_stats_from_snapshot(min_games=1, min_minutes=5)
+    else:
+        df = get_advanced_stats(db, min_games=1, min_minutes=5)
     
     if df.empty:
         print("❌ No hay datos suficientes en la base de datos.")
@@ -0,0 +1,201 @@
+import argparse
+import hashlib
+import time
+import uuid
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import func, select, text
+from app.core.database import SessionLocal
+import init_db
+from app.models.stats import Game, PlayerStat
+from app.models.shot import Shot
+from app.models.player import Player
+from app.models.team import Team, TeamAlias
+from app.core.shot_zones import shot_attributes
+from app.services.season_aggregates import rebuild_season_aggregates
+from app.services.snapshot import write_season_snapshot
+from mock_fbpa_server import ZONAS, ZONAS_TRIPLE
+
+# --- GENERADOR DE TEMPORADAS SINTÉTICAS ---
+# Llena games, player_stats y shots (y las dimensiones teams / team_aliases / players)
+# directamente en la BD configurada, a la escala que se pida, para medir cómo escala la analítica:
+#   N equipos a doble vuelta -> N * (N - 1) partidos por temporada, tantas temporadas como se pida.
+# Todo se genera con NumPy por bloques de partidos: millones de tiros sin pasar por la ingesta.
+#
+# Uso:  python generate_season.py --reset --teams 16 --seasons 3 --shots-per-game 120
+#       (DATABASE_URL=sqlite:///bench.sqlite para no tocar la BD de verdad)
+
+CHUNK_GAMES = 500 # Partidos por bloque (acota la memoria con escalas grandes)
+
+def _game_id(seed: int, season: int, local: int, visitante: int) -> str:
+    """Id con la forma de los reales (96 caracteres hexadecimales)."""
+    return hashlib.sha384(f"{seed}-{season}-{local}-{visitante}".encode()).hexdigest().upper()
+
+def _fixtures(teams: int, seasons: int, max_games: int, rng):
+    """(temporada, jornada, local, visitante) de todas las temporadas, recortado a max_games."""
+    fixtures = []
+    for season in range(seasons):
+        pares = [(l, v) for l in range(teams) for v in range(teams) if l != v]
+        rng.shuffle(pares)
+        fixtures += [(season, n // max(1, teams // 2) + 1, l, v) for n, (l, v) in enumerate(pares)]
+    return fixtures[:max_games] if max_games else fixtures
+
+def _dimensions(db, teams: int, players: int, rng):
+    """Equipos, alias y plantillas. Devuelve (nombres de equipo, plantillas [(player_pk, nombre, dorsal, componente)])."""
+    nombres = [f"C.B. SINTETICO {i + 1:02d}" for i in range(teams)]
+    db.execute(Team.__table__.insert(), [{"id": i + 1, "nombre": n} for i, n in enumerate(nombres)])
+    db.execute(TeamAlias.__table__.insert(), [{"alias": n, "team_id": i + 1} for i, n in enumerate(nombres)])
+
+    plantillas, filas = [], []
+    for t, equipo in enumerate(nombres):
+        dorsales = rng.choice(np.arange(0, 55), size=players, replace=False)
+        plantilla = []
+        for d in dorsales:
+            pk = len(filas) + 1
+            componente = str(uuid.UUID(int=int(rng.integers(0, 2**63)) << 64 | pk))
+            nombre = f"JUGADOR {t + 1:02d}-{int(d):02d}"
+            filas.append({"id": pk, "nombre": nombre, "equipo": equipo, "team_pk": t + 1, "componente_id": componente})
+            plantilla.append((pk, nombre, str(int(d)), componente))
+        plantillas.append(plantilla)
+    db.execute(Player.__table__.insert(), filas)
+    _sync_sequences(db, (Team.__table__, Player.__table__))
+    return nombres, plantillas
+
+def _sync_sequences(db, tables):
+    """
+    Postgres: con ids explícitos la secuencia de la tabla no avanza; sin esto, la siguiente
+    ingesta del crawler en la misma BD chocaría con las claves ya usadas. (SQLite no lo necesita.)
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in tables:
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), (SELECT MAX(id) FROM {table.name}))"
+        ))
+
+def _box_rows(rng, game_id, equipo_idx, nombre_equipo, plantilla):
+    """Líneas de boxscore de un equipo en un partido (5 titulares con más minutos; algún DNP)."""
+    n = len(plantilla)
+    titular = np.arange(n) < 5
+    segundos = np.where(titular, rng.integers(900, 2100, n), rng.integers(0, 1200, n))
+    segundos[rng.random(n) < 0.08] = 0 # No juega
+    carga = segundos / 2400 # Producción proporcional a los minutos
+    t1i, t2i, t3i = (rng.poisson(lam * carga) for lam in (3.0, 9.0, 5.0))
+    t1a, t2a, t3a = rng.binomial(t1i, 0.7), rng.binomial(t2i, 0.48), rng.binomial(t3i, 0.33)
+    rd, ro = rng.poisson(4.0 * carga), rng.poisson(1.5 * carga)
+    ast, tov, rec, pf, fr = (rng.poisson(lam * carga) for lam in (2.5, 2.0, 1.2, 2.5, 2.5))
+    puntos = t1a + 2 * t2a + 3 * t3a
+
+    filas = []
+    for j, (pk, nombre, dorsal, _) in enumerate(plantilla):
+        filas.append({
+            "game_id": game_id, "player_pk": pk, "team_pk": equipo_idx + 1,
+            "equipo": nombre_equipo, "nombre": nombre, "dorsal": dorsal, "es_titular": bool(titular[j]),
+            "minutos": f"{segundos[j] // 60:02d}:{segundos[j] % 60:02d}", "segundos_jugados": int(segundos[j]),
+            "puntos": int(puntos[j]), "valoracion": 0, "mas_menos": 0,
+            "rebotes_total": int(rd[j] + ro[j]), "rebotes_def": int(rd[j]), "rebotes_of": int(ro[j]),
+            "asistencias": int(ast[j]), "perdidas": int(tov[j]), "recuperaciones": int(rec[j]),
+            "t1_anotados": int(t1a[j]), "t1_intentados": int(t1i[j]),
+            "t2_anotados": int(t2a[j]), "t2_intentados": int(t2i[j]),
+            "t3_anotados": int(t3a[j]), "t3_intentados": int(t3i[j]),
+            "faltas_cometidas": int(pf[j]), "faltas_recibidas": int(fr[j]),
+        })
+    return filas, segundos
+
+def _shot_rows(rng, game_id, n, lados):
+    """n tiros del mapa repartidos entre los jugadores que han jugado (más minutos, más tiros)."""
+    candidatos = [(lado, j) for lado, (plantilla, segundos) in enumerate(lados) for j in range(len(plantilla)) if segundos[j] > 0]
+    pesos = np.array([lados[lado][1][j] for lado, j in candidatos], dtype=float)
+    elegidos = rng.choice(len(candidatos), size=n, p=pesos / pesos.sum())
+    zonas = rng.choice(len(ZONAS), size=n)
+    triple = np.array([ZONAS[z] in ZONAS_TRIPLE for z in zonas])
+    metido = rng.random(n) < np.where(triple, 0.33, 0.48)
+    xs, ys = rng.uniform(0, 100, n), rng.uniform(0, 100, n)
+    periodos = rng.integers(1, 5, n)
+
+    filas = []
+    for seq in range(n):
+        lado, j = candidatos[elegidos[seq]]
+        pk, _, dorsal, componente = lados[lado][0][j]
+        tipo = "TIRO3" if triple[seq] else "TIRO2"
+        filas.append({
+            "game_id": game_id, "seq": seq, "team_id": lado + 1, "player_id": componente, "player_pk": pk,
+            "dorsal": dorsal, "period": int(periodos[seq]), "action_type": tipo,
+            "x": round(float(xs[seq]), 2), "y": round(float(ys[seq]), 2), "zone": ZONAS[zonas[seq]],
+            "is_made": bool(metido[seq]),
+            **shot_attributes(tipo, ZONAS[zonas[seq]]),
+        })
+    return filas
+
+def generate(db, teams=12, seasons=1, players=12, shots_per_game=80, max_games=0, seed=7):
+    """Genera las temporadas y devuelve (partidos, filas de player_stats, tiros)."""
+    rng = np.random.default_rng(seed)
+    nombres, plantillas = _dimensions(db, teams, players, rng)
+    fixtures = _fixtures(teams, seasons, max_games, rng)
+
+    totales = [0, 0, 0]
+    for inicio in range(0, len(fixtures), CHUNK_GAMES):
+        games, stats, shots = [], [], []
+        for season, jornada, local, visitante in fixtures[inicio:inicio + CHUNK_GAMES]:
+            game_id = _game_id(seed, season, local, visitante)
+            lados, puntos = [], []
+            for equipo_idx in (local, visitante):
+                filas, segundos = _box_rows(rng, game_id, equipo_idx, nombres[equipo_idx], plantillas[equipo_idx])
+                stats += filas
+                lados.append((plantillas[equipo_idx], segundos))
+                puntos.append(sum(f["puntos"] for f in filas))
+            shots += _shot_rows(rng, game_id, int(rng.poisson(shots_per_game)), lados)
+            games.append({
+                "id": game_id, "jornada": str(jornada),
+                "fecha": (date(2025 - seasons + 1 + season, 9, 1) + timedelta(days=7 * (jornada - 1))).isoformat(),
+                "equipo_local": nombres[local], "equipo_visitante": nombres[visitante],
+                "puntos_local": puntos[0], "puntos_visitante": puntos[1], "estado": "FINALIZADO",
+            })
+        db.execute(Game.__table__.insert(), games)
+        db.execute(PlayerStat.__table__.insert(), stats)
+        if shots: # --shots-per-game 0: un insert sin filas no vale
+            db.execute(Shot.__table__.insert(), shots)
+        db.commit()
+        totales = [totales[0] + len(games), totales[1] + len(stats), totales[2] + len(shots)]
+        print(f"   ... {totales[0]}/{len(fixtures)} partidos")
+    return tuple(totales)
+
+def main():
+    parser = argparse.ArgumentParser(description="Temporadas sintéticas para medir la analítica a escala")
+    parser.add_argument("--teams", type=int, default=12, help="Equipos (doble vuelta: N * (N - 1) partidos por temporada)")
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--players", type=int, default=12, help="Jugadores por equipo")
+    parser.add_argument("--shots-per-game", type=int, default=80, help="Media de tiros del mapa por partido")
+    parser.add_argument("--games", type=int, default=0, help="Recortar a este nº de partidos (0 = todos)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--snapshot", action="store_true", help="Escribir también el snapshot Parquet")
+    parser.add_argument("--reset", action="store_true", help="Borrar TODAS las tablas antes de generar")
+    args = parser.parse_args()
+
+    if args.reset:
+        init_db.init_db()
+    else:
+        init_db.create_tables()
+
+    db = SessionLocal()
+    try:
+        if db.execute(select(func.count()).select_from(Game)).scalar():
+            print("🛑 La BD ya tiene partidos: usa --reset (borra todo) o apunta DATABASE_URL a otra BD.")
+            return
+
+        print(f"🎲 Generando {args.seasons} temporada(s) de {args.teams} equipos...")
+        t0 = time.perf_counter()
+        games, stats, shots = generate(
+            db, args.teams, args.seasons, args.players, args.shots_per_game, args.games, args.seed
+        )
+        print(f"✅ {games} partidos, {stats} filas de player_stats y {shots} tiros en {time.perf_counter() - t0:.1f}s")
+
+        print("🔄 Recalculando agregados de temporada...")
+        rebuild_season_aggregates(db)
+        if args.snapshot:
+            print(f"💾 Snapshot Parquet escrito (versión de datos {write_season_snapshot(db)})")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,13 @@ from app.models.shot import Shot
 # Nota: Importamos 'Game' desde stats, porque ese es el que tiene la relación con PlayerStat.
 # Si tenías un 'app.models.game' antiguo, coméntalo para no tener dos clases 'Game' chocando.
 from app.models.stats import Game, PlayerStat 
+from app.models.player import Player
+from app.models.team import Team, TeamAlias
+from app.models.crawl_ledger import CrawlLedger
+
+# 3. Agregados de temporada (se rellenan en cada ingesta)
+from app.models.aggregates import TeamGameTotals, PlayerSeasonAggregate, ShotProfileAggregate, ShotGridCell
+from app.models.data_version import DataVersion
 
 def init_db():
     print("🔄 Conectando a la base de datos...")
@@ -25,5 +32,9 @@ def init_db():
 
     print("✅ ¡Base de datos lista y limpia!")
 
+def create_tables():
+    """Crea las tablas que falten (no borra nada): para BDs de pruebas y benchmarks."""
+    Base.metadata.create_all(bind=engine)
+
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
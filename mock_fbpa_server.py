@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import date, timedelta
+from urllib.parse import parse_qsl
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import uvicorn
+
+# --- SERVIDOR FBPA SIMULADO (LOCAL) ---
+# Imita los endpoints que usa ScraperService para poder probar y medir el crawler sin la API real:
+#   /login (o cualquier ruta que acabe en "login")   -> key de sesión
+#   .../equipo.ashx (accion=horariosJornadas)        -> calendario de un equipo
+#   .../envivo/estadisticas.ashx                     -> boxscore
+#   .../envivo/mapa-de-tiro.ashx                     -> mapa de tiro
+# Los datos son una liga sintética (doble vuelta, determinista con --seed) o, con --archive,
+# las respuestas grabadas por el crawler (RAW_ARCHIVE_DIR), buscadas por el hash de la petición.
+# Fallos configurables: latencia, tasa de 503 y caducidad de la key.
+#
+# Uso:  python mock_fbpa_server.py --port 8765 --teams 12 --latency 0.05 --error-rate 0.02 --key-ttl 30
+#       FBPA_BASE_URL=http://127.0.0.1:8765  FBPA_LOGIN_URL=http://127.0.0.1:8765/login  FBPA_ID_EQUIPO_PROPIO=EQ01
+# Responde en cualquier ruta base: con --archive, FBPA_BASE_URL tiene que llevar la misma ruta que en la
+# grabación (p. ej. http://127.0.0.1:8765/v2), porque la ruta entra en el hash de cada petición archivada.
+
+ZONAS = ['Z1-CE', 'Z1-IZ', 'Z1-DE', 'Z2-CE', 'Z4-IZ', 'Z6-DE', 'Z11-IZ', 'Z11-DE', 'Z12-CE', 'Z13-IZ', 'Z13-DE']
+ZONAS_TRIPLE = {'Z11-IZ', 'Z11-DE', 'Z12-CE', 'Z13-IZ', 'Z13-DE'}
+
+# --- LIGA SINTÉTICA ---
+
+def _team_id(i: int) -> str:
+    return f"EQ{i + 1:02d}"
+
+def _boxscore(rng, local, visitante, plantillas):
+    """Líneas de boxscore de los dos equipos (y el marcador) en el formato de la Federación."""
+    equipos, tanteos = {}, {}
+    for lado, equipo in (("local", local), ("visitante", visitante)):
+        lineas = []
+        for j, (nombre, dorsal) in enumerate(plantillas[equipo]):
+            titular = j < 5
+            segundos = rng.randint(900, 2000) if titular else rng.randint(0, 1100)
+            t1i, t2i, t3i = rng.randint(0, 6), rng.randint(0, 12), rng.randint(0, 8)
+            t1a, t2a, t3a = rng.randint(0, t1i), rng.randint(0, t2i), rng.randint(0, t3i)
+            rd, ro = rng.randint(0, 8), rng.randint(0, 4)
+            lineas.append({
+                "nombre": nombre, "dorsal": dorsal, "quintetotitular": titular,
+                "tiempo_jugado": f"{segundos // 60:02d}:{segundos % 60:02d}",
+                "puntos": t1a + 2 * t2a + 3 * t3a, "valoracion": 0, "masMenos": 0,
+                "rebotes": rd + ro, "rebotedefensivo": rd, "reboteofensivo": ro,
+                "asistencias": rng.randint(0, 6), "perdidas": rng.randint(0, 5),
+                "recuperaciones": rng.randint(0, 4),
+                "canasta1p": t1a, "tiro1p": t1i, "canasta2p": t2a, "tiro2p": t2i,
+                "canasta3p": t3a, "tiro3p": t3i,
+                "faltascometidas": rng.randint(0, 5), "faltasrecibidas": rng.randint(0, 5),
+            })
+        tanteos[lado] = sum(l["puntos"] for l in lineas)
+        equipos[lado] = lineas + [{"nombre": "TOTALES", "puntos": tanteos[lado]}]
+    return equipos, tanteos
+
+def _tiros(rng, equipos_id, plantillas, componentes, tiros_por_partido):
+    tiros = []
+    for _ in range(tiros_por_partido):
+        lado = rng.randrange(2)
+        equipo = equipos_id[lado]
+        nombre, dorsal = rng.choice(plantillas[equipo])
+        zona = rng.choice(ZONAS)
+        metido = rng.random() < (0.35 if zona in ZONAS_TRIPLE else 0.5)
+        tiros.append({
+            "equipo_id": lado + 1, "componente_id": componentes[(equipo, dorsal)], "dorsal": dorsal,
+            "numero_periodo": rng.randint(1, 4), "accion_tipo": "TIRO3" if zona in ZONAS_TRIPLE else "TIRO2",
+            "zona": zona, "metido": int(metido), "fallado": int(not metido),
+            "posicion_x": f"{rng.uniform(0, 100):.2f}%", "posicion_y": f"{rng.uniform(0, 100):.2f}%",
+        })
+    return tiros
+
+def build_league(teams: int = 12, players: int = 12, shots: int = 80, seed: int = 7):
+    """
+    Liga sintética a doble vuelta: teams * (teams - 1) partidos.
+    Devuelve (calendarios por id de equipo, boxscores por id de partido, mapas de tiro por id de partido).
+    """
+    rng = random.Random(seed)
+    nombres = {_team_id(i): f"C.B. SIMULADO {i + 1:02d}" for i in range(teams)}
+    plantillas = {
+        eq: [(f"JUGADOR {eq[2:]}-{d:02d}", str(d)) for d in rng.sample(range(0, 55), players)]
+        for eq in nombres
+    }
+    componentes = {(eq, dorsal): str(uuid.UUID(int=rng.getrandbits(128))) for eq, pl in plantillas.items() for _, dorsal in pl}
+
+    calendarios = {eq: [] for eq in nombres}
+    boxscores, mapas = {}, {}
+    # Doble vuelta: cada par ordenado (local, visitante) una vez, teams // 2 partidos por jornada
+    emparejamientos = [(local, visitante) for local in nombres for visitante in nombres if local != visitante]
+    rng.shuffle(emparejamientos)
+    for n, (local, visitante) in enumerate(emparejamientos):
+        jornada = n // max(1, teams // 2) + 1
+        game_id = f"P{jornada:03d}{local}{visitante}"
+        equipos, tanteos = _boxscore(rng, local, visitante, plantillas)
+        entrada = {
+            "IdPartido": game_id, "Estado": "Terminado", "NumeroJornada": jornada,
+            "Fecha": (date(2025, 9, 20) + timedelta(days=7 * (jornada - 1))).isoformat(),
+            "IdEquipoLocal": local, "IdEquipoVisitante": visitante,
+            "NombreEquipoLocal": nombres[local], "NombreEquipoVisitante": nombres[visitante],
+            "Resultados": {"ResultadoLocal": str(tanteos["local"]), "ResultadoVisitante": str(tanteos["visitante"])},
+        }
+        calendarios[local].append(entrada)
+        calendarios[visitante].append(entrada)
+        boxscores[game_id] = {
+            "resultado": "correcto",
+            "partido": {
+                "local": nombres[local], "visitante": nombres[visitante],
+                "tanteo_local": tanteos["local"], "tanteo_visitante": tanteos["visitante"],
+                "estado_partido": "FINALIZADO",
+            },
+            "estadisticas": {
+                "equipolocal": nombres[local], "equipovisitante": nombres[visitante],
+                "estadisticasequipolocal": equipos["local"],
+                "estadisticasequipovisitante": equipos["visitante"],
+            },
+        }
+        mapas[game_id] = {
+            "resultado": "correcto",
+            "mapadetiro": {"tiros": _tiros(rng, (local, visitante), plantillas, componentes, shots)},
+        }
+    return calendarios, boxscores, mapas
+
+# --- SERVIDOR ---
+
+def create_app(args) -> FastAPI:
+    app = FastAPI(title="Mock FBPA")
+    rng = random.Random(args.seed)
+    keys = {} # key -> momento de emisión
+    stats = {"requests": 0, "login": 0, "calendario": 0, "estadisticas": 0, "mapa-de-tiro": 0,
+             "errores_503": 0, "keys_caducadas": 0}
+
+    calendarios, boxscores, mapas = ({}, {}, {}) if args.archive else build_league(
+        args.teams, args.players, args.shots, args.seed
+    )
+    if args.archive:
+        from app.services.raw_archive import RawArchive
+        archivo = RawArchive(args.archive)
+
+    def _key_valida(key: str) -> bool:
+        emitida = keys.get(key)
+        if emitida is None:
+            return False
+        return args.key_ttl <= 0 or time.monotonic() - emitida < args.key_ttl
+
+    def _respuesta(path: str, params: dict):
+        if path.endswith("login"):
+            stats["login"] += 1
+            key = uuid.uuid4().hex
+            keys[key] = time.monotonic()
+            return {"resultado": "correcto", "key": key}
+
+        if not _key_valida(params.get("key", "")):
+            stats["keys_caducadas"] += 1
+            return {"resultado": "error", "error": "La key no es válida o ha caducado"}
+
+        endpoint = ("calendario" if path.endswith("equipo.ashx")
+                    else "estadisticas" if path.endswith("estadisticas.ashx")
+                    else "mapa-de-tiro" if path.endswith("mapa-de-tiro.ashx") else None)
+        if endpoint is None:
+            return None
+        stats[endpoint] += 1
+
+        if args.archive:
+            return archivo.load(path, params) or {"resultado": "error", "error": "No grabado"}
+        if endpoint == "calendario":
+            return {"resultado": "correcto", "partidos": calendarios.get(params.get("id_equipo"), [])}
+        origen = boxscores if endpoint == "estadisticas" else mapas
+        return origen.get(params.get("id_partido")) or {"resultado": "error", "error": "Partido no encontrado"}
+
+    @app.get("/_stats")
+    def get_stats():
+        """Contadores de peticiones (los lee bench_crawler.py)."""
+        return stats
+
+    @app.api_route("/{path:path}", methods=["GET", "POST"])
+    async def endpoint(path: str, request: Request):
+        stats["requests"] += 1
+        if args.latency > 0 or args.jitter > 0:
+            await asyncio.sleep(args.latency + rng.uniform(0, args.jitter))
+        if rng.random() < args.error_rate:
+            stats["errores_503"] += 1
+            return JSONResponse({"error": "Servicio no disponible"}, status_code=503)
+
+        params = dict(request.query_params)
+        params.update(parse_qsl((await request.body()).decode(), keep_blank_values=True))
+        data = _respuesta("/" + path, params)
+        if data is None:
+            return JSONResponse({"error": "No encontrado"}, status_code=404)
+        return JSONResponse(data)
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor FBPA simulado para pruebas y benchmarks del crawler")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--teams", type=int, default=12, help="Equipos de la liga sintética")
+    parser.add_argument("--players", type=int, default=12, help="Jugadores por equipo")
+    parser.add_argument("--shots", type=int, default=80, help="Tiros por partido")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--archive", default=None,
+                        help="Servir las respuestas grabadas en este RAW_ARCHIVE_DIR en vez de la liga sintética")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia fija por petición (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latencia extra aleatoria, de 0 a este valor (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de peticiones que responden 503")
+    parser.add_argument("--key-ttl", type=float, default=0.0, help="Segundos de vida de una key (0 = no caduca)")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
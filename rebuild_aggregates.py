@@ -0,0 +1,14 @@
+from app.core.database import SessionLocal
+from app.services.season_aggregates import rebuild_season_aggregates
+
+def main():
+    db = SessionLocal()
+    try:
+        print("🔄 Recalculando agregados de temporada desde player_stats y shots...")
+        rebuild_season_aggregates(db)
+        print("✅ Agregados reconstruidos.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
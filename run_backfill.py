@@ -0,0 +1,267 @@
+from sqlalchemy import inspect, text, select, update, bindparam, func
+from app.core.database import SessionLocal, engine, Base
+from app.core.normalization import parse_tiempo_jugado
+from app.core.shot_zones import shot_value, is_corner, is_rim, zone_code
+# Todos los modelos: create_missing_tables necesita tenerlos en Base.metadata
+from app.models.stats import PlayerStat
+from app.models.shot import Shot
+from app.models.player import Player
+from app.models.team import Team, TeamAlias
+from app.models.aggregates import TeamGameTotals, PlayerSeasonAggregate, ShotProfileAggregate, ShotGridCell
+from app.models.data_version import DataVersion
+from app.models.crawl_ledger import CrawlLedger
+from app.repositories.player_repository import PlayerRepository
+from app.repositories.team_repository import TeamRepository
+from app.services.season_aggregates import rebuild_season_aggregates
+
+# --- BACKFILL DE UNA SOLA VEZ ---
+# Pone al día una base de datos creada con un esquema anterior
+# (las ingestas nuevas ya escriben estas columnas).
+
+BATCH_SIZE = 5000
+
+def create_missing_tables():
+    """Tablas nuevas del esquema (las existentes no se tocan)."""
+    Base.metadata.create_all(bind=engine)
+
+def add_column_if_missing(table: str, column: str, ddl_type: str):
+    """ALTER TABLE ... ADD COLUMN solo si la columna no existe todavía."""
+    columnas = {c["name"] for c in inspect(engine).get_columns(table)}
+    if column in columnas:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+    print(f"   ➕ Columna {table}.{column} creada")
+    return True
+
+def add_index_if_missing(table: str, column: str):
+    """Índice ix_<tabla>_<columna> (el mismo nombre que genera index=True en el modelo)."""
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+
+def backfill_segundos_jugados(db):
+    """Rellena player_stats.segundos_jugados a partir del texto 'minutos'."""
+    add_column_if_missing("player_stats", "segundos_jugados", "INTEGER")
+
+    stmt = (
+        update(PlayerStat.__table__)
+        .where(PlayerStat.__table__.c.id == bindparam("row_id"))
+        .values(segundos_jugados=bindparam("segundos"))
+    )
+    total = 0
+    while True:
+        pendientes = db.execute(
+            select(PlayerStat.id, PlayerStat.minutos)
+            .where(PlayerStat.segundos_jugados.is_(None))
+            .limit(BATCH_SIZE)
+        ).all()
+        if not pendientes:
+            break
+        db.execute(stmt, [{"row_id": pid, "segundos": parse_tiempo_jugado(m)} for pid, m in pendientes])
+        db.commit()
+        total += len(pendientes)
+    print(f"   ⏱️ segundos_jugados rellenado en {total} filas")
+
+def backfill_team_pk(db):
+    """Crea teams / team_aliases a partir de los nombres crudos y rellena player_stats.team_pk."""
+    add_column_if_missing("player_stats", "team_pk", "INTEGER REFERENCES teams(id)")
+    add_index_if_missing("player_stats", "team_pk")
+
+    repo = TeamRepository(db)
+    crudos = db.execute(select(PlayerStat.equipo).where(PlayerStat.team_pk.is_(None)).distinct()).scalars().all()
+    for equipo in crudos:
+        team_pk, _ = repo.resolve(equipo)
+        db.execute(
+            update(PlayerStat.__table__)
+            .where(func.coalesce(PlayerStat.__table__.c.equipo, "") == (equipo or ""))
+            .values(team_pk=team_pk)
+        )
+    db.commit()
+    print(f"   🏀 team_pk rellenado para {len(crudos)} nombres de equipo")
+
+def backfill_player_pk(db):
+    """Crea la dimensión players y rellena player_stats.player_pk (y players.team_pk)."""
+    add_column_if_missing("player_stats", "player_pk", "INTEGER REFERENCES players(id)")
+    add_index_if_missing("player_stats", "player_pk")
+    add_column_if_missing("players", "team_pk", "INTEGER REFERENCES teams(id)")
+    add_index_if_missing("players", "team_pk")
+
+    nombre = func.coalesce(PlayerStat.nombre, "")
+    pendientes = db.execute(
+        select(nombre, PlayerStat.team_pk, Team.nombre)
+        .join(Team, Team.id == PlayerStat.team_pk)
+        .where(PlayerStat.player_pk.is_(None))
+        .distinct()
+    ).all()
+    if pendientes:
+        pks = PlayerRepository(db).resolve_many(
+            [(n, canonico) for n, _, canonico in pendientes],
+            team_pks={canonico: team_pk for _, team_pk, canonico in pendientes}
+        )
+        db.execute(
+            update(PlayerStat.__table__)
+            .where(func.coalesce(PlayerStat.__table__.c.nombre, "") == bindparam("n"))
+            .where(PlayerStat.__table__.c.team_pk == bindparam("t"))
+            .values(player_pk=bindparam("pk")),
+            [{"n": n, "t": team_pk, "pk": pks[(n, canonico)]} for n, team_pk, canonico in pendientes]
+        )
+
+    # Jugadores creados antes de existir teams
+    repo = TeamRepository(db)
+    for equipo in db.execute(select(Player.equipo).where(Player.team_pk.is_(None)).distinct()).scalars().all():
+        db.execute(update(Player).where(Player.equipo == equipo).values(team_pk=repo.get_by_name(equipo)))
+    db.commit()
+    print(f"   👤 player_pk rellenado para {len(pendientes)} combinaciones jugador/equipo")
+
+def backfill_shot_player_pk(db):
+    """Atribuye a jugadores los tiros ya guardados (mismo criterio que la ingesta)."""
+    add_column_if_missing("shots", "player_pk", "INTEGER REFERENCES players(id)")
+    add_index_if_missing("shots", "player_pk")
+
+    repo = PlayerRepository(db)
+    stmt = (
+        update(Shot.__table__)
+        .where(Shot.__table__.c.id == bindparam("shot_id"))
+        .values(player_pk=bindparam("pk"))
+    )
+    game_ids = db.execute(select(Shot.game_id).where(Shot.player_pk.is_(None)).distinct()).scalars().all()
+    total = 0
+    for game_id in game_ids:
+        tiros = db.execute(
+            select(Shot.id, Shot.team_id, Shot.player_id, Shot.dorsal)
+            .where(Shot.game_id == game_id, Shot.player_pk.is_(None))
+        ).all()
+        pks = repo.attribute_shots(game_id, [(t, c, d) for _, t, c, d in tiros])
+        filas = [{"shot_id": sid, "pk": pk} for (sid, *_), pk in zip(tiros, pks) if pk is not None]
+        if filas:
+            db.execute(stmt, filas)
+        db.commit()
+        total += len(filas)
+    print(f"   🎯 player_pk rellenado en {total} tiros de {len(game_ids)} partidos")
+
+def backfill_shot_seq(db):
+    """Número de orden de cada tiro dentro de su partido (clave natural game_id + seq)."""
+    add_column_if_missing("shots", "seq", "INTEGER")
+    stmt = (
+        update(Shot.__table__)
+        .where(Shot.__table__.c.id == bindparam("shot_id"))
+        .values(seq=bindparam("n"))
+    )
+    game_ids = db.execute(select(Shot.game_id).where(Shot.seq.is_(None)).distinct()).scalars().all()
+    filas = []
+    if game_ids:
+        # Se renumeran los partidos enteros, en el orden en que se insertaron
+        seq = func.row_number().over(partition_by=Shot.game_id, order_by=Shot.id) - 1
+        filas = [
+            {"shot_id": sid, "n": n}
+            for sid, n in db.execute(select(Shot.id, seq).where(Shot.game_id.in_(game_ids))).all()
+        ]
+    for i in range(0, len(filas), BATCH_SIZE):
+        db.execute(stmt, filas[i:i + BATCH_SIZE])
+        db.commit()
+    print(f"   🔢 seq rellenado en {len(filas)} tiros de {len(game_ids)} partidos")
+
+def backfill_shot_attributes(db):
+    """
+    shots.shot_value / is_corner / is_rim / zone_code a partir de action_type y zone.
+    Se calcula por valor distinto (hay pocos tipos de acción y zonas): un UPDATE por valor, no por fila.
+    """
+    for column, ddl_type in (("shot_value", "SMALLINT"), ("is_corner", "BOOLEAN"),
+                             ("is_rim", "BOOLEAN"), ("zone_code", "SMALLINT")):
+        add_column_if_missing("shots", column, ddl_type)
+
+    # is_corner IS NULL marca las filas pendientes (tras el backfill nunca es NULL): shot_value sí puede
+    # quedarse a NULL (tiros libres, tipos desconocidos) y no sirve para saber qué falta
+    shots = Shot.__table__
+    pendientes = shots.c.is_corner.is_(None)
+    tipos = db.execute(select(shots.c.action_type).where(pendientes).distinct()).scalars().all()
+    for tipo in tipos:
+        db.execute(update(shots).where(pendientes, _igual(shots.c.action_type, tipo)).values(shot_value=shot_value(tipo)))
+
+    zonas = db.execute(select(shots.c.zone).where(pendientes).distinct()).scalars().all()
+    for zona in zonas:
+        db.execute(
+            update(shots).where(pendientes, _igual(shots.c.zone, zona))
+            .values(is_corner=is_corner(zona), is_rim=is_rim(zona), zone_code=zone_code(zona))
+        )
+    db.commit()
+    if tipos or zonas:
+        print(f"   🎯 Atributos de tiro calculados ({len(tipos)} tipos de acción, {len(zonas)} zonas)")
+
+def _igual(column, value):
+    """column = value, con NULL explícito (zonas o tipos de acción sin informar)."""
+    return column.is_(None) if value is None else column == value
+
+def add_shot_indexes():
+    """Índices compuestos de shots; sustituyen a los simples de game_id y player_pk."""
+    for index in Shot.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_shots_game_team")) # Versión anterior, por zone_code
+        conn.execute(text("DROP INDEX IF EXISTS ix_shots_game_player")) # Versión anterior, con is_made
+        conn.execute(text("DROP INDEX IF EXISTS ix_shots_game_id"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_shots_player_pk"))
+
+def add_natural_keys(db):
+    """Índices únicos de las claves naturales que usan los upserts de la ingesta."""
+    # Un jugador repetido en un mismo acta (esquema anterior) impediría el índice: se queda la última fila
+    duplicados = (
+        select(func.max(PlayerStat.id))
+        .where(PlayerStat.player_pk.is_not(None))
+        .group_by(PlayerStat.game_id, PlayerStat.player_pk)
+        .having(func.count() > 1)
+    )
+    claves = db.execute(
+        select(PlayerStat.game_id, PlayerStat.player_pk).where(PlayerStat.id.in_(duplicados))
+    ).all()
+    for game_id, player_pk in claves:
+        db.execute(
+            PlayerStat.__table__.delete()
+            .where(PlayerStat.game_id == game_id, PlayerStat.player_pk == player_pk)
+            .where(PlayerStat.id.not_in(duplicados))
+        )
+    db.commit()
+    if claves:
+        print(f"   🧹 {len(claves)} filas de player_stats duplicadas eliminadas")
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_player_stats_game_player ON player_stats (game_id, player_pk)"))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_shots_game_seq ON shots (game_id, seq)"))
+
+def migrate_aggregate_keys():
+    """Los agregados van por claves enteras: los de un esquema anterior se recrean vacíos."""
+    inspector = inspect(engine)
+    for model, clave in (
+        (TeamGameTotals, "team_pk"),
+        (PlayerSeasonAggregate, "player_pk"),
+        (ShotProfileAggregate, "player_pk"),
+    ):
+        tabla = model.__tablename__
+        if inspector.has_table(tabla) and clave in {c["name"] for c in inspector.get_columns(tabla)}:
+            continue
+        model.__table__.drop(bind=engine, checkfirst=True)
+        model.__table__.create(bind=engine)
+        print(f"   ♻️ Tabla {tabla} recreada con clave {clave}")
+
+def main():
+    db = SessionLocal()
+    try:
+        print("🔄 Backfill de columnas nuevas...")
+        create_missing_tables()
+        backfill_segundos_jugados(db)
+        backfill_team_pk(db)
+        backfill_player_pk(db)
+        backfill_shot_player_pk(db)
+        backfill_shot_seq(db)
+        add_natural_keys(db)
+        backfill_shot_attributes(db)
+        add_shot_indexes()
+        migrate_aggregate_keys()
+        # Los agregados dependen de las claves que acabamos de rellenar
+        rebuild_season_aggregates(db)
+        print("✅ Backfill completado.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
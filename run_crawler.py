@@ -1,15 +1,66 @@
-import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.core.database import SessionLocal
-from app.services.scraper_service import ScraperService
+from app.services.scraper_service import ScraperService, SessionKey
 from app.core.config import settings
+from app.core.rate_limit import TokenBucket, positive_rate
+from app.services.snapshot import write_season_snapshot
 
 # Limpieza de la variable raíz por si acaso
 ID_EQUIPO_OBJETIVO = str(settings.FBPA_ID_EQUIPO_PROPIO).replace('"', '').replace("'", "").strip()
 
+# Cada hilo del pool tiene su propia sesión de BD y su propio ScraperService; la key es la misma
+# para todos (SessionKey del login principal), así que al caducar se hace un solo re-login
+_local = threading.local()
+_sesiones = []
+_sesiones_lock = threading.Lock()
+
+def _worker_scraper(session_key: SessionKey, limiter: TokenBucket) -> ScraperService:
+    if not hasattr(_local, "scraper"):
+        db = SessionLocal()
+        with _sesiones_lock:
+            _sesiones.append(db)
+        # El token bucket se consume en cada petición HTTP (reintentos incluidos)
+        _local.scraper = ScraperService(db, rate_limiter=limiter, session_key=session_key)
+    return _local.scraper
+
+def ingest_game(game, session_key: SessionKey, limiter: TokenBucket, force: bool = False) -> str:
+    """Boxscore + tiros de un partido (dentro de un hilo). Devuelve el resultado para el log."""
+    scraper = _worker_scraper(session_key, limiter)
+    try:
+        # 0. Los partidos FINALIZADOS ya guardados no cambian: ni se piden
+        if not force and scraper.is_game_finalized(game['id']):
+            return "⏭️ Ya FINALIZADO, sin cambios"
+
+        # 1. ESTADÍSTICAS + TIROS (una sola transacción)
+        stats_ok, shots_ok = scraper.ingest_game(game, force=force)
+        if not stats_ok:
+            return "⚠️ Fallo en Boxscore"
+        if not shots_ok:
+            return "⚠️ Stats OK pero TIROS FALLARON"
+        return "✅ TODO OK"
+    except Exception as e:
+        return f"❌ Error General: {e}"
+
 def main():
+    parser = argparse.ArgumentParser(description="Crawler de partidos de la FBPA")
+    parser.add_argument("--workers", type=int, default=settings.CRAWLER_WORKERS,
+                        help="Partidos que se procesan a la vez (1 = secuencial)")
+    parser.add_argument("--rate", type=positive_rate, default=settings.CRAWLER_REQUESTS_PER_SECOND,
+                        help="Peticiones por segundo como máximo al servidor de la Federación")
+    parser.add_argument("--force", action="store_true",
+                        help="Vuelve a descargar y reescribir todos los partidos (ignora crawl_ledger)")
+    parser.add_argument("--league", action="store_true",
+                        help="Todos los equipos de la fase/grupo, no solo el nuestro (cada partido una vez)")
+    args = parser.parse_args()
+
+    # El token bucket sustituye al sleep fijo: respetamos el servidor sin esperar de más
+    limiter = TokenBucket(rate=args.rate, burst=settings.CRAWLER_BURST)
+
     # 1. Conectar a BD
     db = SessionLocal()
-    scraper = ScraperService(db)
+    scraper = ScraperService(db, rate_limiter=limiter)
     
     print("🚀 INICIANDO CRAWLER FBPA")
     print(f"ℹ️  Equipo Objetivo Hash: {ID_EQUIPO_OBJETIVO[:10]}...") 
@@ -22,37 +73,35 @@ def main():
         return
 
     # 2. Obtener lista de partidos
-    games_to_scrape = scraper.get_calendar_from_team(ID_EQUIPO_OBJETIVO)
+    if args.league:
+        games_to_scrape, _ = scraper.get_league_calendar(ID_EQUIPO_OBJETIVO, workers=args.workers)
+    else:
+        games_to_scrape = scraper.get_calendar_from_team(ID_EQUIPO_OBJETIVO)
     
     if not games_to_scrape:
         print("⚠️ No se encontraron partidos terminados o hubo un error.")
         return
 
-    print(f"📅 Se procesarán {len(games_to_scrape)} partidos terminados.")
-
-    # 3. Bucle de procesamiento
-    for i, game in enumerate(games_to_scrape):
-        print(f"[{i+1}/{len(games_to_scrape)}] Procesando: {game['local']} vs {game['visitante']}...", end=" ")
-        
-        try:
-            # 1. ESTADÍSTICAS
-            stats_ok = scraper.ingest_game_statistics(game)
-            
-            if stats_ok:
-                # 2. TIROS
-                shots_ok = scraper.ingest_shot_chart(game['id'])
-                
-                if shots_ok:
-                    print("✅ TODO OK")
-                else:
-                    print("⚠️ Stats OK pero TIROS FALLARON")
-            else:
-                print("⚠️ Fallo en Boxscore")
-            
-            time.sleep(1.0) # Respetamos un poco el servidor
-            
-        except Exception as e:
-            print(f"❌ Error General: {e}")
+    print(f"📅 Se procesarán {len(games_to_scrape)} partidos terminados "
+          f"({args.workers} en paralelo, máx. {args.rate:g} peticiones/s).")
+
+    # 3. Procesamiento en paralelo
+    total = len(games_to_scrape)
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(ingest_game, game, scraper.session_key, limiter, args.force): game for game in games_to_scrape}
+        for i, future in enumerate(as_completed(futures)):
+            game = futures[future]
+            print(f"[{i+1}/{total}] Procesando: {game['local']} vs {game['visitante']}... {future.result()}")
+
+    for sesion in _sesiones:
+        sesion.close()
+
+    # 4. Snapshot Parquet para analítica offline / API sin BD
+    try:
+        version = write_season_snapshot(db)
+        print(f"💾 Snapshot Parquet actualizado (versión de datos {version})")
+    except Exception as e:
+        print(f"⚠️ No se pudo escribir el snapshot: {e}")
 
     db.close()
     print("\n✨ PROCESO COMPLETADO ✨")
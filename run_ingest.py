@@ -1,37 +1,85 @@
+import argparse
+import time
 from app.core.database import SessionLocal
+from app.core.config import settings
 from app.services.scraper_service import ScraperService
+from app.services.snapshot import write_season_snapshot
 
 # ID de prueba
 TEST_GAME_ID = "36007A00450072004500790065007400360031003900450048006E00780052005A00720047006600370067003D003D00"
 
+ID_EQUIPO_OBJETIVO = str(settings.FBPA_ID_EQUIPO_PROPIO).replace('"', '').replace("'", "").strip()
+
+def ingest_test_game(db):
+    scraper = ScraperService(db)
+
+    # Preparamos metadatos mínimos que espera ingest_game_statistics
+    game_metadata = {
+        "id": TEST_GAME_ID,
+        "jornada": "99",
+        "fecha": "2026-01-10"
+    }
+
+    print(f"🚀 Iniciando ingesta manual del partido: {TEST_GAME_ID}")
+
+    # 1. Ingesta de Estadísticas (Acta oficial)
+    success_stats = scraper.ingest_game_statistics(game_metadata)
+
+    if success_stats:
+        print("✅ Estadísticas procesadas correctamente.")
+        # 2. Ingesta de Mapa de Tiros (Coordenadas)
+        success_shots = scraper.ingest_shot_chart(TEST_GAME_ID)
+        if success_shots:
+            print("✅ Mapa de tiros procesado correctamente.")
+    else:
+        print("❌ Falló la ingesta de estadísticas generales.")
+
+def replay_archive(db, league: bool = False):
+    """
+    Reingesta de la temporada entera desde el archivo de respuestas crudas (RAW_ARCHIVE_DIR):
+    mismo código de parseo que el crawler, pero sin red ni límite de peticiones.
+    Se fuerza la reescritura: el objetivo es aplicar la lógica de parseo / analítica actual.
+    """
+    scraper = ScraperService(db, offline=True)
+    print(f"📦 Reingesta offline desde {scraper.archive.path}")
+
+    if league:
+        games, _ = scraper.get_league_calendar(ID_EQUIPO_OBJETIVO)
+    else:
+        games = scraper.get_calendar_from_team(ID_EQUIPO_OBJETIVO)
+    if not games:
+        print("⚠️ El calendario no está en el archivo (hay que pasar el crawler al menos una vez).")
+        return
+
+    t0 = time.perf_counter()
+    incompletos = 0
+    for i, game in enumerate(games):
+        stats_ok, shots_ok = scraper.ingest_game(game, force=True)
+        if not (stats_ok and shots_ok):
+            incompletos += 1
+            print(f"[{i+1}/{len(games)}] ⚠️ {game['local']} vs {game['visitante']}: falta en el archivo")
+    segundos = time.perf_counter() - t0
+    print(f"✅ {len(games) - incompletos}/{len(games)} partidos reingestados en {segundos:.1f}s")
+
+    version = write_season_snapshot(db)
+    print(f"💾 Snapshot Parquet actualizado (versión de datos {version})")
+
 def main():
+    parser = argparse.ArgumentParser(description="Ingesta manual de partidos")
+    parser.add_argument("--from-archive", action="store_true",
+                        help="Reingesta toda la temporada desde el archivo local de respuestas (sin red)")
+    parser.add_argument("--league", action="store_true",
+                        help="Con --from-archive: todos los equipos archivados por run_crawler.py --league")
+    args = parser.parse_args()
+
     db = SessionLocal()
     try:
-        scraper = ScraperService(db)
-        
-        # Preparamos metadatos mínimos que espera ingest_game_statistics
-        game_metadata = {
-            "id": TEST_GAME_ID,
-            "jornada": "99",
-            "fecha": "2026-01-10"
-        }
-
-        print(f"🚀 Iniciando ingesta manual del partido: {TEST_GAME_ID}")
-        
-        # 1. Ingesta de Estadísticas (Acta oficial)
-        success_stats = scraper.ingest_game_statistics(game_metadata)
-        
-        if success_stats:
-            print("✅ Estadísticas procesadas correctamente.")
-            # 2. Ingesta de Mapa de Tiros (Coordenadas)
-            success_shots = scraper.ingest_shot_chart(TEST_GAME_ID)
-            if success_shots:
-                print("✅ Mapa de tiros procesado correctamente.")
+        if args.from_archive:
+            replay_archive(db, league=args.league)
         else:
-            print("❌ Falló la ingesta de estadísticas generales.")
-
+            ingest_test_game(db)
     finally:
         db.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()